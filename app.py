@@ -5,22 +5,26 @@
 Pipeline Data Engineering pour l'analyse des données de cacao
 """
 
-from flask import Flask, render_template, send_file, jsonify, request
+from flask import Blueprint, Flask, Response, current_app, g, has_request_context, render_template, send_file, send_from_directory, jsonify, request, stream_with_context, url_for
 import os
-import pandas as pd
 import json
+import math
+import mimetypes
+import hashlib
+import threading
+import time
 from datetime import datetime
 import logging
 
+# pandas et les modules ETL sont importés à la première utilisation (voir
+# _pandas et _profileur) pour que l'import de l'application reste rapide
+# pour chaque worker gunicorn.
+
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = Flask(__name__)
-
-# Configuration
-app.config['SECRET_KEY'] = 'etl_cacao_secret_key_2024'
-app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max
+bp = Blueprint('etl', __name__)
 
 # Chemins des datasets
 DATASETS_PATH = {
@@ -29,65 +33,335 @@ DATASETS_PATH = {
     'clean': 'data/processed/cacao_clean.csv'
 }
 
+# ===========================================
+# IMPORTS DIFFÉRÉS
+# ===========================================
+
+def _pandas():
+    """Importe pandas à la première utilisation"""
+    import pandas as pd
+    return pd
+
+def _profileur():
+    """Importe le moteur de profilage à la première utilisation"""
+    from package_exploration_data.profilage import ProfileurDonnees
+    return ProfileurDonnees
+
+def _bus():
+    """Bus d'événements du pipeline (SQLite) et son diffuseur pour ce processus"""
+    from pipeline.evenements import BusEvenements, DiffuseurEvenements
+    bus = BusEvenements(current_app.config['EVENEMENTS_PATH'])
+    return bus, DiffuseurEvenements.pour(bus)
+
+def _file_travaux():
+    """File des exécutions du pipeline, créée à la première demande"""
+    with _verrou_cache:
+        file_travaux = current_app.extensions.get('file_travaux')
+        if file_travaux is None:
+            from pipeline.evenements import BusEvenements
+            from pipeline.travaux import FileTravaux
+            file_travaux = FileTravaux(
+                BusEvenements(current_app.config['EVENEMENTS_PATH']),
+                nb_workers=current_app.config['PIPELINE_WORKERS'],
+                capacite=current_app.config['PIPELINE_CAPACITE']
+            )
+            current_app.extensions['file_travaux'] = file_travaux
+    return file_travaux
+
+_verrou_metriques = threading.Lock()
+
+def _metriques():
+    """
+    Métriques du processus (voir /metrics), créées à la première requête :
+    ni l'import ni un master gunicorn --preload ne créent le dossier partagé
+    ou le thread de sauvegarde
+    """
+    with _verrou_metriques:
+        metriques = current_app.extensions.get('metriques')
+        if metriques is None:
+            from pipeline.metriques import Metriques
+            metriques = Metriques(current_app.config['METRIQUES_DOSSIER'])
+            current_app.extensions['metriques'] = metriques
+    return metriques
+
+def _datasets_partages():
+    """Renvoie DatasetsPartages si le mode Arrow mappé en mémoire est actif et disponible"""
+    if not current_app.config.get('DATASETS_ARROW'):
+        return None
+    from data.load.memoire_partagee import DatasetsPartages
+    return DatasetsPartages if DatasetsPartages.disponible() else None
+
+# ===========================================
+# CACHE HTTP (ETag, Cache-Control, sérialisation)
+# ===========================================
+
+# Réponses JSON déjà sérialisées : clé -> (version, etag, corps)
+_cache_reponses = {}
+# Empreinte du contenu des fichiers : chemin -> ((taille, mtime), empreinte)
+_empreintes_fichiers = {}
+_verrou_cache = threading.Lock()
+
+def _nettoyer_nan(valeur):
+    """Remplace récursivement NaN/inf par None (JSON valide)"""
+    if isinstance(valeur, float) and not math.isfinite(valeur):
+        return None
+    if isinstance(valeur, dict):
+        return {cle: _nettoyer_nan(v) for cle, v in valeur.items()}
+    if isinstance(valeur, (list, tuple)):
+        return [_nettoyer_nan(v) for v in valeur]
+    if hasattr(valeur, 'item') and not isinstance(valeur, (str, bytes)):
+        # Scalaires NumPy
+        return _nettoyer_nan(valeur.item())
+    return valeur
+
+def _valeur_json(valeur):
+    """Types pandas non sérialisables nativement : dates en ISO 8601, NaT / NA → null"""
+    pd = _pandas()
+    if valeur is pd.NaT or valeur is pd.NA:
+        return None
+    if hasattr(valeur, 'isoformat'):
+        return valeur.isoformat()
+    raise TypeError(f"Type non sérialisable en JSON : {type(valeur).__name__}")
+
+def _serialiser_json(payload):
+    """Sérialise en JSON (orjson si disponible), NaN → null"""
+    debut = time.perf_counter()
+    try:
+        import orjson
+    except ImportError:
+        corps = json.dumps(_nettoyer_nan(payload), ensure_ascii=False, allow_nan=False,
+                           default=_valeur_json).encode('utf-8')
+    else:
+        # orjson écrit NaN en null et gère les types NumPy
+        corps = orjson.dumps(payload, default=_valeur_json,
+                             option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    if has_request_context():
+        _metriques().observer('etl_cacao_json_serialization_seconds', time.perf_counter() - debut, route=_route())
+    return corps
+
+def _profil_dataset(file_path):
+    """
+    Profil en cache du dataset ; s'il est absent ou périmé, il est recalculé
+    depuis la table Arrow mappée en mémoire (mode Arrow) ou par read_csv
+    """
+    profileur = _profileur()
+    partages = _datasets_partages()
+    if partages is None:
+        return profileur.charger_profil(file_path)
+    profil = profileur.charger_profil(file_path, recalculer=False)
+    if profil is None:
+        debut = time.perf_counter()
+        table = partages.ouvrir(file_path)
+        _observer_chargement(file_path, 'arrow', debut)
+        profil = profileur.sauvegarder_profil(file_path, profileur.profiler_table(table))
+    return profil
+
+def _lire_csv(file_path):
+    """pd.read_csv d'un dataset, compté dans etl_cacao_dataset_load_seconds"""
+    debut = time.perf_counter()
+    df = _pandas().read_csv(file_path)
+    _observer_chargement(file_path, 'csv', debut)
+    return df
+
+def _parametre_limite(defaut, maximum):
+    """Paramètre limit de la requête borné à maximum (ValueError s'il n'est pas un entier positif)"""
+    limite = int(request.args.get('limit', defaut))
+    if limite < 0:
+        raise ValueError("Paramètre limit : entier positif attendu")
+    return min(limite, maximum)
+
+def _observer_chargement(file_path, format_dataset, debut):
+    """Compte un chargement de dataset et sa durée depuis debut"""
+    dataset = next((t for t, chemin in DATASETS_PATH.items() if chemin == file_path), os.path.basename(file_path))
+    _metriques().observer('etl_cacao_dataset_load_seconds', time.perf_counter() - debut,
+                          dataset=dataset, format=format_dataset)
+
+def _empreinte_fichier(file_path):
+    """Empreinte du contenu d'un fichier, recalculée seulement s'il a changé"""
+    stat = os.stat(file_path)
+    signature = (stat.st_size, stat.st_mtime_ns)
+    
+    en_cache = _empreintes_fichiers.get(file_path)
+    if en_cache is not None and en_cache[0] == signature:
+        return en_cache[1]
+    
+    h = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for bloc in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloc)
+    empreinte = h.hexdigest()
+    _empreintes_fichiers[file_path] = (signature, empreinte)
+    return empreinte
+
+def _version_datasets(*types):
+    """Version des datasets demandés (empreinte du contenu, 'absent' sinon)"""
+    return '|'.join(
+        _empreinte_fichier(DATASETS_PATH[t]) if os.path.exists(DATASETS_PATH[t]) else f'{t}:absent'
+        for t in types
+    )
+
+def _reponse_en_cache(cle, construire, version=None, cache_control='public, no-cache'):
+    """
+    Renvoie une réponse JSON mise en cache avec un ETag fort.
+
+    Si version est fournie (empreinte des données, identifiant d'exécution...),
+    l'ETag en dérive et un If-None-Match correspondant reçoit un 304 sans
+    reconstruire ni resérialiser la réponse. Sinon le contenu est construit
+    une fois par processus et l'ETag dérive du corps sérialisé.
+    """
+    etag = None
+    # Famille de la clé ('dataset:raw:csv' -> 'dataset') pour les métriques
+    cache = cle.split(':', 1)[0]
+    if version is not None:
+        etag = hashlib.blake2b(f'{cle}|{version}'.encode('utf-8'), digest_size=16).hexdigest()
+        if request.if_none_match.contains(etag):
+            _metriques().incrementer('etl_cacao_cache_requests_total', cache=cache, result='not_modified')
+            reponse = current_app.response_class(status=304)
+            reponse.set_etag(etag)
+            reponse.headers['Cache-Control'] = cache_control
+            return reponse
+    
+    en_cache = _cache_reponses.get(cle)
+    trouve = en_cache is not None and en_cache[0] == version
+    _metriques().incrementer('etl_cacao_cache_requests_total', cache=cache, result='hit' if trouve else 'miss')
+    if not trouve:
+        corps = _serialiser_json(construire())
+        if etag is None:
+            etag = hashlib.blake2b(corps, digest_size=16).hexdigest()
+        en_cache = (version, etag, corps)
+        with _verrou_cache:
+            _cache_reponses[cle] = en_cache
+    
+    reponse = current_app.response_class(en_cache[2], mimetype='application/json')
+    reponse.set_etag(en_cache[1])
+    reponse.headers['Cache-Control'] = cache_control
+    return reponse.make_conditional(request)
+
+# ===========================================
+# FICHIERS STATIQUES CONSTRUITS (construction_assets.py)
+# ===========================================
+
+# Manifeste chargé une fois par version du fichier : (mtime, contenu)
+_manifeste_assets = [None, {}]
+
+def _manifeste():
+    """Renvoie le manifeste static/dist/manifest.json ({} s'il n'est pas construit)"""
+    chemin = os.path.join(bp.root_path, 'static', 'dist', 'manifest.json')
+    try:
+        mtime = os.path.getmtime(chemin)
+    except OSError:
+        return {}
+    if _manifeste_assets[0] != mtime:
+        with open(chemin, encoding='utf-8') as f:
+            _manifeste_assets[1] = json.load(f)
+        _manifeste_assets[0] = mtime
+    return _manifeste_assets[1]
+
+@bp.app_context_processor
+def _injecter_asset_url():
+    """Expose asset_url() aux templates"""
+    def asset_url(chemin):
+        """URL publiée (empreinte) du fichier, ou l'original si non construit"""
+        publie = _manifeste().get(chemin)
+        if publie is not None:
+            return url_for('etl.assets', filename=publie)
+        if chemin.startswith(('http://', 'https://')):
+            return chemin
+        return url_for('static', filename=chemin)
+    return {'asset_url': asset_url}
+
+@bp.route('/assets/<path:filename>')
+def assets(filename):
+    """Fichiers à empreinte : variante précompressée et cache immuable"""
+    dossier = os.path.join(bp.root_path, 'static', 'dist')
+    acceptes = request.accept_encodings
+    
+    for encodage, extension in (('br', '.br'), ('gzip', '.gz')):
+        if acceptes[encodage] and os.path.isfile(os.path.join(dossier, filename + extension)):
+            reponse = send_from_directory(dossier, filename + extension, max_age=31536000)
+            reponse.headers['Content-Encoding'] = encodage
+            reponse.mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            break
+    else:
+        reponse = send_from_directory(dossier, filename, max_age=31536000)
+    
+    reponse.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    reponse.headers['Vary'] = 'Accept-Encoding'
+    return reponse
+
 # ===========================================
 # ROUTES PRINCIPALES
 # ===========================================
 
-@app.route('/')
+@bp.route('/')
 def index():
     """Page d'accueil - Dashboard futuriste ETL Cacao"""
     logger.info(" Accès au dashboard principal")
     return render_template('index.html')
 
-@app.route('/datasets')
+@bp.route('/datasets')
 def datasets():
     """Page des datasets - Dashboard futuriste"""
     logger.info(" Accès à la page des datasets")
     return render_template('datasets.html')
 
-@app.route('/transformations')
+@bp.route('/transformations')
 def transformations():
     """Page des transformations - Dashboard futuriste"""
     logger.info(" Accès à la page des transformations")
     return render_template('transformations.html')
 
 
-@app.route('/api/datasets')
+@bp.route('/api/datasets')
 def get_datasets():
     """API pour récupérer les informations des datasets"""
     try:
-        datasets_info = {}
-        
-        for dataset_type, file_path in DATASETS_PATH.items():
-            if os.path.exists(file_path):
-                # Lire le fichier CSV
-                df = pd.read_csv(file_path)
-                
-                # Calculer la taille du fichier
-                file_size = os.path.getsize(file_path)
-                size_mb = file_size / (1024 * 1024)
-                
-                datasets_info[dataset_type] = {
-                    'rows': len(df),
-                    'columns': len(df.columns),
-                    'size': f"{size_mb:.1f} MB",
-                    'columns_list': df.columns.tolist(),
-                    'last_modified': datetime.fromtimestamp(os.path.getmtime(file_path)).isoformat(),
-                    'dtypes': df.dtypes.astype(str).to_dict()
-                }
-            else:
-                datasets_info[dataset_type] = {
-                    'error': f"Fichier {file_path} non trouvé",
-                    'rows': 0,
-                    'columns': 0,
-                    'size': '0 MB'
-                }
+        from package_exploration_data.esquisses import EsquissesDataset
         
-        return jsonify({
-            'success': True,
-            'datasets': datasets_info,
-            'timestamp': datetime.now().isoformat()
-        })
+        def construire():
+            datasets_info = {}
+            
+            for dataset_type, file_path in DATASETS_PATH.items():
+                if os.path.exists(file_path):
+                    # Profil mis en cache à côté du fichier (recalculé s'il est périmé)
+                    profil = _profil_dataset(file_path)
+                    
+                    # Calculer la taille du fichier
+                    file_size = os.path.getsize(file_path)
+                    size_mb = file_size / (1024 * 1024)
+                    
+                    datasets_info[dataset_type] = {
+                        'rows': profil['rows'],
+                        'columns': profil['columns'],
+                        'size': f"{size_mb:.1f} MB",
+                        'columns_list': list(profil['colonnes']),
+                        'last_modified': datetime.fromtimestamp(os.path.getmtime(file_path)).isoformat(),
+                        'dtypes': {col: infos['dtype'] for col, infos in profil['colonnes'].items()},
+                        # Statistiques approchées enregistrées à côté du fichier (HyperLogLog, t-digest, top-k) ;
+                        # jamais recalculées dans la requête (null si absentes ou périmées)
+                        'sketches': EsquissesDataset.charger_resume(file_path, recalculer=False)
+                    }
+                else:
+                    datasets_info[dataset_type] = {
+                        'error': f"Fichier {file_path} non trouvé",
+                        'rows': 0,
+                        'columns': 0,
+                        'size': '0 MB'
+                    }
+            
+            return {
+                'success': True,
+                'datasets': datasets_info,
+                'timestamp': datetime.now().isoformat()
+            }
+        
+        # Les esquisses sont écrites après le CSV : leur signature fait partie de la version
+        esquisses = [EsquissesDataset.chemin(file_path) for file_path in DATASETS_PATH.values()]
+        signatures = '|'.join(
+            f"{os.stat(chemin).st_size}:{os.stat(chemin).st_mtime_ns}" if os.path.exists(chemin) else 'absent'
+            for chemin in esquisses
+        )
+        return _reponse_en_cache('datasets', construire, version=f"{_version_datasets(*DATASETS_PATH)}|{signatures}")
         
     except Exception as e:
         logger.error(f" Erreur lors de la récupération des datasets: {e}")
@@ -96,7 +370,7 @@ def get_datasets():
             'error': str(e)
         }), 500
 
-@app.route('/api/dataset/<dataset_type>')
+@bp.route('/api/dataset/<dataset_type>')
 def get_dataset_preview(dataset_type):
     """API pour récupérer un aperçu d'un dataset"""
     try:
@@ -108,31 +382,137 @@ def get_dataset_preview(dataset_type):
         if not os.path.exists(file_path):
             return jsonify({'error': 'Fichier non trouvé'}), 404
         
-        # Lire le dataset
-        df = pd.read_csv(file_path)
+        partages = _datasets_partages()
+        
+        def construire():
+            if partages is not None:
+                # Table Arrow mappée en mémoire, partagée entre workers
+                debut = time.perf_counter()
+                table = partages.ouvrir(file_path)
+                _observer_chargement(file_path, 'arrow', debut)
+                return {
+                    'success': True,
+                    'dataset_type': dataset_type,
+                    'filename': os.path.basename(file_path),
+                    'rows': table.num_rows,
+                    'columns': table.num_columns,
+                    'columns_list': table.column_names,
+                    'preview_data': partages.apercu(table, 10),
+                    'dtypes': partages.types(table)
+                }
+            
+            # Lire le dataset
+            df = _lire_csv(file_path)
+            
+            # Récupérer les 10 premières lignes (NaN → null à la sérialisation)
+            preview_data = df.head(10).to_dict('records')
+            
+            return {
+                'success': True,
+                'dataset_type': dataset_type,
+                'filename': os.path.basename(file_path),
+                'rows': len(df),
+                'columns': len(df.columns),
+                'columns_list': df.columns.tolist(),
+                'preview_data': preview_data,
+                'dtypes': df.dtypes.astype(str).to_dict()
+            }
         
-        # Récupérer les 10 premières lignes
-        preview_data = df.head(10).to_dict('records')
+        return _reponse_en_cache(
+            f'dataset:{dataset_type}:{"arrow" if partages is not None else "csv"}',
+            construire,
+            version=_version_datasets(dataset_type)
+        )
         
+    except Exception as e:
+        logger.error(f" Erreur lors de la récupération du dataset {dataset_type}: {e}")
         return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@bp.route('/api/dataset/<dataset_type>/rows')
+def get_dataset_rows(dataset_type):
+    """
+    API pour lire les lignes d'un dataset filtrées par année et localisation.
+
+    Paramètres : year (répétable), year_min, year_max, location (répétable),
+    limit. Si le dataset a été écrit en partitions (ETL_CACAO_PARTITIONS) et
+    que le CSV n'a pas été réécrit depuis, seules les partitions
+    correspondant aux filtres sont lues ; sinon la
+    table Arrow mappée en mémoire (mode Arrow) ou le CSV est filtré.
+    """
+    try:
+        if dataset_type not in DATASETS_PATH:
+            return jsonify({'error': 'Type de dataset invalide'}), 400
+        
+        from data.load.partitionnement import MANIFESTE, StockagePartitionne
+        
+        filtres = {}
+        try:
+            annees = [int(a) for a in request.args.getlist('year')]
+            bornes = {op: int(request.args[cle]) for op, cle in (('>=', 'year_min'), ('<=', 'year_max'))
+                      if request.args.get(cle)}
+            limite = _parametre_limite(100, 1000)
+        except ValueError:
+            return jsonify({'success': False, 'error': "Paramètres year, year_min, year_max et limit entiers (limit positif) attendus"}), 400
+        if annees:
+            filtres['Date de la revue'] = annees
+        elif bornes:
+            filtres['Date de la revue'] = bornes
+        if request.args.getlist('location'):
+            filtres["Localisation de l'entreprise"] = request.args.getlist('location')
+        
+        file_path = DATASETS_PATH[dataset_type]
+        dossier = os.path.splitext(file_path)[0]
+        manifeste = os.path.join(dossier, MANIFESTE)
+        # Copie partitionnée périmée si le CSV a été réécrit depuis (exécution sans partitions)
+        partitions_a_jour = os.path.exists(manifeste) and (
+            not os.path.exists(file_path) or os.path.getmtime(manifeste) >= os.path.getmtime(file_path))
+        
+        if partitions_a_jour:
+            retenues, total = StockagePartitionne.partitions(dossier, filtres)
+            df = StockagePartitionne.lire(dossier, filtres)
+            source = {'type': 'partitions', 'partitions_lues': len(retenues), 'partitions_totales': total}
+        elif not os.path.exists(file_path):
+            return jsonify({'error': 'Fichier non trouvé'}), 404
+        elif _datasets_partages() is not None:
+            # Seules les colonnes filtrées sont converties ; les lignes renvoyées sont une tranche de la table
+            debut = time.perf_counter()
+            table = _datasets_partages().ouvrir(file_path)
+            _observer_chargement(file_path, 'arrow', debut)
+            for col, filtre in filtres.items():
+                masque = StockagePartitionne.masque(table.column(col).to_pandas(), filtre)
+                table = table.filter(masque.to_numpy())
+            return Response(_serialiser_json({
+                'success': True,
+                'dataset_type': dataset_type,
+                'source': {'type': 'arrow'},
+                'rows': table.num_rows,
+                'data': table.slice(0, limite).to_pylist()
+            }), mimetype='application/json')
+        else:
+            df = _lire_csv(file_path)
+            for col, filtre in filtres.items():
+                df = df[StockagePartitionne.masque(df[col], filtre)]
+            source = {'type': 'csv'}
+        
+        return Response(_serialiser_json({
             'success': True,
             'dataset_type': dataset_type,
-            'filename': os.path.basename(file_path),
+            'source': source,
             'rows': len(df),
-            'columns': len(df.columns),
-            'columns_list': df.columns.tolist(),
-            'preview_data': preview_data,
-            'dtypes': df.dtypes.astype(str).to_dict()
-        })
+            'data': df.head(limite).to_dict('records')
+        }), mimetype='application/json')
         
     except Exception as e:
-        logger.error(f" Erreur lors de la récupération du dataset {dataset_type}: {e}")
+        logger.error(f" Erreur lors de la lecture filtrée du dataset {dataset_type}: {e}")
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
-@app.route('/api/download/<dataset_type>')
+@bp.route('/api/download/<dataset_type>')
 def download_dataset(dataset_type):
     """Téléchargement d'un dataset"""
     try:
@@ -160,112 +540,295 @@ def download_dataset(dataset_type):
             'error': str(e)
         }), 500
 
-@app.route('/api/pipeline/status')
+@bp.route('/api/pipeline/status')
 def get_pipeline_status():
-    """API pour récupérer le statut du pipeline ETL"""
+    """
+    API pour récupérer le statut du pipeline ETL, reconstruit depuis les
+    événements de la dernière exécution (ETag dérivé de l'exécution et du
+    dernier événement publié)
+    """
     try:
-        pipeline_status = {
-            'extract': {
-                'status': 'completed',
-                'description': 'Web scraping terminé',
-                'records': 1795,
-                'timestamp': '2024-01-15T10:30:00Z'
-            },
-            'transform': {
-                'status': 'completed',
-                'description': 'Transformation des données terminée',
-                'steps': [
-                    'Nettoyage des caractères',
-                    'Conversion des types',
-                    'Uniformisation des pays',
-                    'Imputation des valeurs manquantes'
-                ],
-                'timestamp': '2024-01-15T10:45:00Z'
-            },
-            'load': {
-                'status': 'completed',
-                'description': 'Chargement final terminé',
-                'final_records': 1795,
-                'duplicates_removed': 0,
-                'timestamp': '2024-01-15T11:00:00Z'
-            }
-        }
+        from pipeline.evenements import BusEvenements
+        
+        bus = BusEvenements(current_app.config['EVENEMENTS_PATH'])
+        run_id = bus.dernier_run()
+        
+        def construire():
+            return {'success': True, **_statut_pipeline(bus, run_id)}
+        
+        return _reponse_en_cache('pipeline_status', construire, version=(run_id, bus.dernier_id()))
+        
+    except Exception as e:
+        logger.error(f" Erreur lors de la récupération du statut du pipeline: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+# Phases affichées par le dashboard : étapes de chaque phase (les autres sont des transformations)
+PHASES_PIPELINE = {
+    'extract': ('Extraction des données', {'Extraction', 'Stockage data/raw'}),
+    'transform': ('Transformation des données', None),
+    'load': ('Chargement final', {'Stockage data/processed', 'Stockage SQL'}),
+}
+
+# Événement de fin d'exécution -> statut global
+STATUTS_RUN = {'run_end': 'completed', 'run_error': 'failed', 'run_cancelled': 'cancelled'}
+
+def _statut_pipeline(bus, run_id):
+    """
+    Statut global et par phase (extract / transform / load) d'une exécution
+
+    Arguments
+    ---------------
+        bus : BusEvenements
+        run_id : str, exécution à décrire (None : aucune exécution publiée)
+
+    Return
+    ---------------
+        statut : dict, run_id, overall_status, last_run, finished_at et pipeline
+    """
+    phases = {nom: {'status': 'pending', 'description': description, 'steps': [], 'records': None,
+                    'duration': 0.0, 'timestamp': None}
+              for nom, (description, _) in PHASES_PIPELINE.items()}
+    statut = {'run_id': run_id, 'overall_status': 'never_run', 'last_run': None, 'finished_at': None,
+              'pipeline': phases}
+    if run_id is None:
+        return statut
+    
+    statut['overall_status'] = 'running'
+    etats = {}
+    evenements = []
+    depuis = 0
+    while True:
+        page = bus.lire(depuis, run_id=run_id)
+        evenements.extend(page)
+        if len(page) < 1000:
+            break
+        depuis = page[-1]['id']
+    
+    for evenement in evenements:
+        if evenement['type'] == 'run_start':
+            statut['last_run'] = evenement['horodatage']
+        elif evenement['type'] in STATUTS_RUN:
+            statut['overall_status'] = STATUTS_RUN[evenement['type']]
+            statut['finished_at'] = evenement['horodatage']
+        elif evenement['type'] in ('step_start', 'step_end', 'step_error'):
+            nom = evenement['etape']
+            phase = next((p for p, (_, etapes) in PHASES_PIPELINE.items() if etapes and nom in etapes), 'transform')
+            if nom not in phases[phase]['steps']:
+                phases[phase]['steps'].append(nom)
+            etats[nom] = evenement['type']
+            phases[phase]['timestamp'] = evenement['horodatage']
+            if evenement['type'] == 'step_end':
+                phases[phase]['records'] = evenement['lignes']
+                phases[phase]['duration'] = round(phases[phase]['duration'] + (evenement['duree'] or 0), 4)
+    
+    noms = list(phases)
+    for rang, (nom, phase) in enumerate(phases.items()):
+        types = [etats[etape] for etape in phase['steps']]
+        suite_commencee = any(phases[suivante]['steps'] for suivante in noms[rang + 1:])
+        if 'step_error' in types:
+            phase['status'] = 'failed'
+        elif not types:
+            phase['status'] = 'pending'
+        elif 'step_start' in types or (statut['overall_status'] == 'running' and not suite_commencee):
+            phase['status'] = 'running'
+        else:
+            phase['status'] = 'completed'
+    return statut
+
+@bp.route('/api/pipeline/run', methods=['POST'])
+def run_pipeline():
+    """
+    Met une exécution du pipeline en file (réponse immédiate 202).
+
+    Corps JSON optionnel : {"source": "web"} (scraping, par défaut),
+    {"source": "raw"} (relance depuis data/raw/cacao_raw.csv) ou
+    {"source": "files", "pattern": "*.csv"} (exports déposés dans
+    data/imports : CSV/TSV, JSON Lines, Excel ou pages HTML enregistrées),
+    {"backend": "pandas"} (par défaut) ou {"backend": "polars"}, et
+    {"incremental": true} pour ne nettoyer que les avis ajoutés ou modifiés
+    depuis le dernier instantané brut. Avec le backend pandas, les cellules
+    modifiées par chaque étape sont journalisées (ETL_CACAO_LIGNEE, voir
+    /api/lineage).
+    """
+    try:
+        from pipeline.travaux import FilePleine
+        from pipeline.execution import BACKENDS
+        
+        corps = request.get_json(silent=True) or {}
+        source = corps.get('source', 'web')
+        if source not in ('web', 'raw', 'files'):
+            return jsonify({'success': False, 'error': "Source invalide (attendu : 'web', 'raw' ou 'files')"}), 400
+        backend = corps.get('backend', 'pandas')
+        if backend not in BACKENDS:
+            return jsonify({'success': False, 'error': f"Backend invalide (attendu : {', '.join(BACKENDS)})"}), 400
+        
+        parametres = {'source': DATASETS_PATH['raw'] if source == 'raw' else None}
+        if source == 'files':
+            from extraction.connecteurs import DOSSIER_IMPORTS
+            motif = str(corps.get('pattern', '*'))
+            if os.path.isabs(motif) or '..' in motif.replace('\\', '/').split('/'):
+                return jsonify({'success': False, 'error': f"Le motif doit rester dans {DOSSIER_IMPORTS}"}), 400
+            parametres['source'] = os.path.join(DOSSIER_IMPORTS, motif)
+        if backend != 'pandas':
+            parametres['backend'] = backend
+        if current_app.config['PARTITIONS']:
+            parametres['partitions'] = current_app.config['PARTITIONS']
+        if current_app.config['LIGNEE'] and backend == 'pandas':
+            parametres['lignee'] = True
+        if corps.get('incremental'):
+            if backend != 'pandas':
+                return jsonify({'success': False, 'error': "Le mode incrémental n'est disponible qu'avec le backend pandas"}), 400
+            parametres['incremental'] = True
+        try:
+            travail, doublon = _file_travaux().soumettre(parametres)
+        except FilePleine as e:
+            return jsonify({'success': False, 'error': str(e)}), 429, {'Retry-After': '60'}
         
+        logger.info(f" Exécution du pipeline {travail.id} en file (source: {source}, backend: {backend})")
         return jsonify({
             'success': True,
-            'pipeline': pipeline_status,
-            'overall_status': 'completed',
-            'last_run': '2024-01-15T11:00:00Z'
-        })
+            'job': travail.to_dict(),
+            'deduplicated': doublon
+        }), 202, {'Location': url_for('etl.get_pipeline_job', job_id=travail.id)}
         
     except Exception as e:
-        logger.error(f" Erreur lors de la récupération du statut du pipeline: {e}")
+        logger.error(f" Erreur lors de la mise en file du pipeline: {e}")
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
-@app.route('/api/transformations')
+@bp.route('/api/pipeline/jobs')
+def list_pipeline_jobs():
+    """API pour lister les exécutions demandées"""
+    return jsonify({
+        'success': True,
+        'jobs': [travail.to_dict() for travail in _file_travaux().lister()]
+    })
+
+@bp.route('/api/pipeline/jobs/<job_id>')
+def get_pipeline_job(job_id):
+    """API pour suivre une exécution et la progression de ses étapes"""
+    file_travaux = _file_travaux()
+    travail = file_travaux.obtenir(job_id)
+    if travail is None:
+        return jsonify({'success': False, 'error': 'Exécution inconnue'}), 404
+    
+    return jsonify({
+        'success': True,
+        'job': travail.to_dict(),
+        'steps': file_travaux.progression(job_id)
+    })
+
+@bp.route('/api/pipeline/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_pipeline_job(job_id):
+    """API pour annuler une exécution en attente ou en cours"""
+    travail = _file_travaux().annuler(job_id)
+    if travail is None:
+        return jsonify({'success': False, 'error': 'Exécution inconnue'}), 404
+    
+    logger.info(f" Annulation de l'exécution {job_id} demandée")
+    return jsonify({'success': True, 'job': travail.to_dict()})
+
+# Événements relus par requête lors du rattrapage de l'historique
+TAILLE_PAGE_SSE = 1000
+
+@bp.route('/api/pipeline/events')
+def stream_pipeline_events():
+    """
+    Flux Server-Sent Events de la progression du pipeline.
+
+    Un client neuf reçoit d'abord les événements de la dernière exécution,
+    puis chaque nouvel événement dès sa publication. Last-Event-ID (ou
+    ?depuis=<id>) permet de reprendre après une reconnexion ; ?run_id=
+    filtre sur une exécution.
+
+    Le flux est fermé après SSE_DUREE_MAX secondes : EventSource se
+    reconnecte alors avec Last-Event-ID, sans perte. Chaque flux ouvert
+    occupe un thread : servir l'application avec des workers gthread (voir
+    README) plutôt que des workers sync.
+    """
+    bus, diffuseur = _bus()
+    run_id = request.args.get('run_id')
+    depuis = request.headers.get('Last-Event-ID') or request.args.get('depuis')
+    
+    if depuis is not None:
+        try:
+            depuis = int(depuis)
+        except ValueError:
+            depuis = -1
+        if depuis < 0:
+            return jsonify({'success': False, 'error': "Last-Event-ID / depuis : entier positif attendu"}), 400
+        debut, run_historique, reprise = depuis, run_id, depuis
+        lire_historique = True
+    else:
+        # Client neuf : la dernière exécution, puis seulement les nouveaux événements
+        debut, run_historique, reprise = 0, run_id or bus.dernier_run(), bus.dernier_id()
+        lire_historique = run_historique is not None
+    duree_max = current_app.config['SSE_DUREE_MAX']
+    
+    def format_sse(evenement):
+        return f"id: {evenement['id']}\nevent: {evenement['type']}\ndata: {json.dumps(evenement, ensure_ascii=False)}\n\n"
+    
+    def flux():
+        courant = debut
+        # Historique relu page par page jusqu'au dernier événement publié
+        while lire_historique:
+            page = bus.lire(courant, run_id=run_historique, limite=TAILLE_PAGE_SSE)
+            for evenement in page:
+                yield format_sse(evenement)
+            if page:
+                courant = page[-1]['id']
+            if len(page) < TAILLE_PAGE_SSE:
+                break
+        courant = max(courant, reprise)
+        
+        fin = time.monotonic() + duree_max
+        while time.monotonic() < fin:
+            evenements = diffuseur.attendre(courant, timeout=min(15, max(fin - time.monotonic(), 0)))
+            if not evenements:
+                # Commentaire périodique : garde la connexion ouverte derrière le proxy
+                yield ": keep-alive\n\n"
+                continue
+            for evenement in evenements:
+                courant = evenement['id']
+                if run_id is None or evenement['run_id'] == run_id:
+                    yield format_sse(evenement)
+    
+    return Response(stream_with_context(flux()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@bp.route('/api/transformations')
 def get_transformations():
     """API pour récupérer les détails des transformations"""
     try:
-        transformations = {
-            'character_cleaning': {
-                'name': 'Nettoyage des Caractères',
-                'description': 'Suppression des caractères de contrôle, spéciaux et correction des problèmes d\'encodage',
-                'steps': [
-                    'Détection des caractères de contrôle',
-                    'Suppression des caractères spéciaux (*, +)',
-                    'Correction des problèmes d\'encodage (Nave → Naive)',
-                    'Uniformisation des chaînes de caractères'
-                ],
-                'files_affected': ['Company', 'Origine spécifique du harirot', 'Type de fève'],
-                'records_modified': 6
-            },
-            'type_conversion': {
-                'name': 'Conversion des Types',
-                'description': 'Transformation des types de données pour optimiser l\'analyse',
-                'steps': [
-                    'Suppression du symbole % et conversion en float',
-                    'Conversion des dates et REF en int',
-                    'Uniformisation des noms de pays',
-                    'Validation des types de données'
-                ],
-                'files_affected': ['Pourcentage de cacao', 'Date de la revue', 'REF', 'Broad Bean Origin'],
-                'records_modified': 1795
-            },
-            'missing_values': {
-                'name': 'Imputation des Valeurs Manquantes',
-                'description': 'Gestion intelligente des valeurs manquantes selon leur proportion',
-                'steps': [
-                    'Analyse des valeurs manquantes par colonne',
-                    'Type de fève: 888 valeurs (49.5%) → "Unknown"',
-                    'Broad Bean Origin: 74 valeurs (4.1%) → Mode "Venezuela"',
-                    'Validation de la distribution finale'
-                ],
-                'files_affected': ['Type de fève', 'Broad Bean Origin'],
-                'records_modified': 962
-            },
-            'quality_check': {
-                'name': 'Contrôle Qualité Final',
-                'description': 'Validation finale de la qualité des données',
-                'steps': [
-                    'Vérification des doublons (0 trouvé)',
-                    'Contrôle de la cohérence des données',
-                    'Validation des types de données',
-                    'Génération du dataset final'
-                ],
-                'files_affected': 'Toutes les colonnes',
-                'records_modified': 1795
+        from pipeline.lignee import DOSSIER_LIGNEE, JournalLignee
+        from imputation.valeurs_aberrantes import DetecteurAberrants, RESUME_PATH
+        
+        def construire():
+            transformations = _details_transformations()
+            return {
+                'success': True,
+                'transformations': transformations,
+                'total_steps': len(transformations),
+                'pipeline_duration': '30 minutes',
+                'lineage': JournalLignee.charger_resume(),
+                # Comptes des valeurs aberrantes signalées (voir /api/outliers)
+                'outliers': DetecteurAberrants.charger_resume()
             }
-        }
         
-        return jsonify({
-            'success': True,
-            'transformations': transformations,
-            'total_steps': len(transformations),
-            'pipeline_duration': '30 minutes'
-        })
+        # Revalidé à chaque requête : lignage et comptes changent à chaque exécution
+        dernier_lignage = JournalLignee.dernier_run()
+        version = tuple(
+            os.path.getmtime(chemin) if chemin and os.path.exists(chemin) else None
+            for chemin in (dernier_lignage and os.path.join(DOSSIER_LIGNEE, f'{dernier_lignage}.json'), RESUME_PATH)
+        )
+        return _reponse_en_cache('transformations', construire, version=version)
         
     except Exception as e:
         logger.error(f" Erreur lors de la récupération des transformations: {e}")
@@ -274,16 +837,364 @@ def get_transformations():
             'error': str(e)
         }), 500
 
+def _details_transformations():
+    """Détails des étapes de transformation affichés par le dashboard"""
+    transformations = {
+        'character_cleaning': {
+            'name': 'Nettoyage des Caractères',
+            'description': 'Suppression des caractères de contrôle, spéciaux et correction des problèmes d\'encodage',
+            'steps': [
+                'Détection des caractères de contrôle',
+                'Suppression des caractères spéciaux (*, +)',
+                'Correction des problèmes d\'encodage (Nave → Naive)',
+                'Uniformisation des chaînes de caractères'
+            ],
+            'files_affected': ['Company', 'Origine spécifique du harirot', 'Type de fève'],
+            'records_modified': 6
+        },
+        'type_conversion': {
+            'name': 'Conversion des Types',
+            'description': 'Transformation des types de données pour optimiser l\'analyse',
+            'steps': [
+                'Suppression du symbole % et conversion en float',
+                'Conversion des dates et REF en int',
+                'Uniformisation des noms de pays',
+                'Validation des types de données'
+            ],
+            'files_affected': ['Pourcentage de cacao', 'Date de la revue', 'REF', 'Broad Bean Origin'],
+            'records_modified': 1795
+        },
+        'missing_values': {
+            'name': 'Imputation des Valeurs Manquantes',
+            'description': 'Gestion intelligente des valeurs manquantes selon leur proportion',
+            'steps': [
+                'Analyse des valeurs manquantes par colonne',
+                'Type de fève: 888 valeurs (49.5%) → "Unknown"',
+                'Broad Bean Origin: 74 valeurs (4.1%) → Mode "Venezuela"',
+                'Validation de la distribution finale'
+            ],
+            'files_affected': ['Type de fève', 'Broad Bean Origin'],
+            'records_modified': 962
+        },
+        'quality_check': {
+            'name': 'Contrôle Qualité Final',
+            'description': 'Validation finale de la qualité des données',
+            'steps': [
+                'Vérification des doublons (0 trouvé)',
+                'Contrôle de la cohérence des données',
+                'Validation des types de données',
+                'Génération du dataset final'
+            ],
+            'files_affected': 'Toutes les colonnes',
+            'records_modified': 1795
+        }
+    }
+
+    return transformations
+
+@bp.route('/api/lineage')
+def get_lineage():
+    """
+    API de lignage des cellules d'une exécution (la dernière par défaut).
+
+    Sans paramètre : nombre de cellules modifiées par étape et par colonne.
+    Avec row (position dans cacao_clean.csv) ou source_row (position dans
+    l'extraction, lignes mises en quarantaine comprises) et/ou column :
+    historique des modifications, dans l'ordre des étapes. Chaque
+    modification donne les deux positions (ligne, ligne_finale ; -1 si la
+    ligne a été retirée). Paramètres : run_id, limit.
+    """
+    from pipeline.lignee import JournalLignee
+    
+    run_id = request.args.get('run_id') or None
+    if run_id is not None and not run_id.isalnum():
+        return jsonify({'success': False, 'error': 'Identifiant d\'exécution invalide'}), 400
+    colonne = request.args.get('column') or None
+    if request.args.get('row') and request.args.get('source_row'):
+        return jsonify({'success': False, 'error': "Paramètres row et source_row exclusifs"}), 400
+    extraction = bool(request.args.get('source_row'))
+    try:
+        ligne = request.args.get('source_row') or request.args.get('row')
+        ligne = int(ligne) if ligne else None
+        limite = _parametre_limite(1000, 10000)
+    except ValueError:
+        return jsonify({'success': False, 'error': "Paramètres row, source_row et limit entiers (limit positif) attendus"}), 400
+    
+    resume = JournalLignee.charger_resume(run_id)
+    if resume is None:
+        return jsonify({'success': False, 'error': 'Aucun lignage enregistré'}), 404
+    if ligne is None and colonne is None:
+        return Response(_serialiser_json({'success': True, **resume}), mimetype='application/json')
+    
+    try:
+        historique = JournalLignee.historique(ligne, colonne, resume['run_id'], extraction=extraction)
+    except FileNotFoundError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    
+    champs = [c for c in ('etape', 'colonne', 'ligne', 'ligne_finale', 'avant', 'apres') if c in historique.columns]
+    return Response(_serialiser_json({
+        'success': True,
+        'run_id': resume['run_id'],
+        'row': None if extraction else ligne,
+        'source_row': ligne if extraction else None,
+        'column': colonne,
+        'changes': len(historique),
+        'history': historique[champs].head(limite).to_dict('records')
+    }), mimetype='application/json')
+
+@bp.route('/api/validation')
+def get_validation():
+    """
+    API du dernier rapport de validation : lignes en échec et exemples par
+    règle de qualité, lignes mises en quarantaine (data/interim/cacao_quarantaine.csv)
+    """
+    from transformation.validation import ValidateurQualite
+    
+    rapport = ValidateurQualite.charger_rapport()
+    if rapport is None:
+        return jsonify({'success': False, 'error': 'Aucune validation enregistrée'}), 404
+    return Response(_serialiser_json({'success': True, **rapport}), mimetype='application/json')
+
+@bp.route('/api/outliers')
+def get_outliers():
+    """
+    API des valeurs aberrantes de la note et du pourcentage de cacao
+    (IQR, z-score, MAD ; sur tout le dataset, par entreprise et par année).
+
+    Sans paramètre : comptes par colonne, groupement et méthode. Avec
+    column, group et/ou method : signalements correspondants (ligne du
+    dataset final, valeur, bornes du groupe). Paramètre : limit.
+    """
+    from imputation.valeurs_aberrantes import DetecteurAberrants, GROUPES, METHODES
+    
+    resume = DetecteurAberrants.charger_resume()
+    if resume is None:
+        return jsonify({'success': False, 'error': 'Aucune détection de valeurs aberrantes enregistrée'}), 404
+    
+    colonne = request.args.get('column') or None
+    groupe = request.args.get('group') or None
+    methode = request.args.get('method') or None
+    if groupe is not None and groupe not in GROUPES:
+        return jsonify({'success': False, 'error': f"Groupe invalide (attendu : {', '.join(GROUPES)})"}), 400
+    if methode is not None and methode not in METHODES:
+        return jsonify({'success': False, 'error': f"Méthode invalide (attendu : {', '.join(METHODES)})"}), 400
+    try:
+        limite = _parametre_limite(1000, 10000)
+    except ValueError:
+        return jsonify({'success': False, 'error': "Paramètre limit entier positif attendu"}), 400
+    if colonne is None and groupe is None and methode is None:
+        return Response(_serialiser_json({'success': True, **resume}), mimetype='application/json')
+    
+    table = DetecteurAberrants.charger_table(colonne, groupe, methode)
+    return Response(_serialiser_json({
+        'success': True,
+        'total': len(table),
+        'outliers': table.head(limite).to_dict('records')
+    }), mimetype='application/json')
+
+@bp.route('/api/encoding')
+def get_encoding():
+    """
+    API du rapport d'encodage de la dernière extraction : encodage détecté
+    (BOM, UTF-8 doublement encodé), régions réparées à l'ingestion et
+    régions laissées à l'étape de réparation cellule par cellule
+    """
+    from extraction.encodage import DecodeurOctets
+    
+    rapport = DecodeurOctets.charger_rapport()
+    if rapport is None:
+        return jsonify({'success': False, 'error': "Aucun rapport d'encodage enregistré"}), 404
+    return Response(_serialiser_json({'success': True, **rapport}), mimetype='application/json')
+
+# ===========================================
+# REQUÊTES SQL (LECTURE SEULE)
+# ===========================================
+
+def _base_sql():
+    """Classe de la base SQL, (re)construite depuis le CSV final s'il est plus récent"""
+    from data.load.save_sql_data import SaveSqlData
+    chemin, csv = SaveSqlData.chemin(), DATASETS_PATH['clean']
+    with _verrou_cache:
+        if os.path.exists(csv) and (not os.path.exists(chemin) or os.path.getmtime(chemin) < os.path.getmtime(csv)):
+            SaveSqlData.save(_lire_csv(csv))
+    return SaveSqlData
+
+@bp.route('/api/sql', methods=['GET', 'POST'])
+def query_sql():
+    """
+    Requête SQL en lecture seule sur le dataset final (table 'cacao' et
+    tables agregats_origine, agregats_annee, agregats_entreprise,
+    statistiques_colonnes).
+
+    Corps JSON : {"query": "SELECT ...", "params": [...], "limit": 100}
+    ou paramètres d'URL ?q=SELECT...&limit=100. Le nombre de lignes est
+    borné par SQL_MAX_ROWS et la durée par SQL_TIMEOUT_MS.
+    """
+    from data.load.save_sql_data import DelaiDepasse, RequeteInterdite
+    import sqlite3
+    
+    corps = request.get_json(silent=True) or {}
+    if not isinstance(corps, dict):
+        return jsonify({'success': False, 'error': "Corps JSON attendu : un objet {\"query\": ...}"}), 400
+    sql = corps.get('query') or request.args.get('q', '')
+    if not isinstance(sql, str):
+        return jsonify({'success': False, 'error': "Paramètre 'query' : chaîne attendue"}), 400
+    if not sql.strip():
+        return jsonify({'success': False, 'error': "Paramètre 'query' (ou 'q') manquant"}), 400
+    if not isinstance(corps.get('params') or [], (list, dict)):
+        return jsonify({'success': False, 'error': "Paramètre 'params' : liste ou objet attendu"}), 400
+    
+    max_lignes = current_app.config['SQL_MAX_ROWS']
+    try:
+        limite = min(int(corps.get('limit') or request.args.get('limit', max_lignes)), max_lignes)
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': "Paramètre 'limit' invalide"}), 400
+    
+    try:
+        resultat = _base_sql().requeter(sql, corps.get('params') or (), limite=max(limite, 0),
+                                        delai_ms=current_app.config['SQL_TIMEOUT_MS'])
+    except FileNotFoundError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except RequeteInterdite as e:
+        return jsonify({'success': False, 'error': str(e)}), 403
+    except DelaiDepasse as e:
+        return jsonify({'success': False, 'error': str(e)}), 504
+    except (sqlite3.Error, ValueError) as e:
+        return jsonify({'success': False, 'error': f"Requête invalide : {e}"}), 400
+    
+    return Response(_serialiser_json({'success': True, **resultat}), mimetype='application/json')
+
+# ===========================================
+# RECHERCHE ET AUTOCOMPLÉTION
+# ===========================================
+
+def _index_recherche():
+    """Index de recherche du dataset final, (re)construit depuis le CSV s'il est plus récent"""
+    from data.load.index_recherche import IndexRecherche
+    csv = DATASETS_PATH['clean']
+    chemin = IndexRecherche.chemin(csv)
+    with _verrou_cache:
+        if os.path.exists(csv) and (not os.path.exists(chemin) or os.path.getmtime(chemin) < os.path.getmtime(csv)):
+            IndexRecherche.construire(_lire_csv(csv), csv)
+    return IndexRecherche.ouvrir(csv)
+
+def _parametres_recherche():
+    """Texte, champ et limite communs à /api/search et /api/autocomplete"""
+    texte = request.args.get('q', '').strip()
+    if not texte:
+        raise ValueError("Paramètre 'q' manquant")
+    return texte, request.args.get('field') or None, _parametre_limite(10, 100)
+
+@bp.route('/api/search')
+def search():
+    """
+    Recherche approximative (sans accents, tolérante aux fautes) dans les
+    entreprises et les origines du dataset final.
+
+    Paramètres : q, field ('company', 'origin', 'bean_origin'), limit.
+    Chaque résultat donne la valeur, son nombre de lignes et leurs numéros.
+    """
+    try:
+        texte, champ, limite = _parametres_recherche()
+        resultats = _index_recherche().rechercher(texte, champ, limite)
+    except FileNotFoundError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return Response(_serialiser_json({'success': True, 'query': texte, 'results': resultats}),
+                    mimetype='application/json')
+
+@bp.route('/api/autocomplete')
+def autocomplete():
+    """
+    Suggestions des entreprises et origines dont un mot commence par q
+    (sans accents), les plus fréquentes d'abord. Paramètres : q, field, limit.
+    """
+    try:
+        texte, champ, limite = _parametres_recherche()
+        suggestions = _index_recherche().completer(texte, champ, limite)
+    except FileNotFoundError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return Response(_serialiser_json({'success': True, 'query': texte, 'suggestions': suggestions}),
+                    mimetype='application/json')
+
+# ===========================================
+# SONDES DE DISPONIBILITÉ
+# ===========================================
+
+@bp.route('/healthz')
+def liveness():
+    """Sonde de vie : le processus répond"""
+    return jsonify({'status': 'alive'})
+
+@bp.route('/readyz')
+def readiness():
+    """Sonde de disponibilité : les datasets sont présents et lisibles"""
+    datasets = {
+        dataset_type: os.access(file_path, os.R_OK)
+        for dataset_type, file_path in DATASETS_PATH.items()
+    }
+    ready = all(datasets.values())
+    
+    return jsonify({
+        'status': 'ready' if ready else 'not_ready',
+        'datasets': datasets
+    }), 200 if ready else 503
+
+# ===========================================
+# MÉTRIQUES (FORMAT PROMETHEUS)
+# ===========================================
+
+def _route():
+    """Gabarit de la route (cardinalité bornée), 'unmatched' sans route"""
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+@bp.before_app_request
+def _debut_requete():
+    """Début de la requête, mesuré par _mesurer_requete"""
+    g.debut_requete = time.perf_counter()
+
+@bp.after_app_request
+def _mesurer_requete(reponse):
+    """Compte la requête, sa durée et la taille du corps (hors flux SSE)"""
+    debut = g.pop('debut_requete', None)
+    if debut is None:
+        return reponse
+    metriques = _metriques()
+    route = _route()
+    metriques.observer('etl_cacao_http_request_duration_seconds', time.perf_counter() - debut, route=route)
+    metriques.incrementer('etl_cacao_http_requests_total', route=route, method=request.method,
+                          status=str(reponse.status_code))
+    if reponse.content_length is not None:
+        metriques.observer('etl_cacao_http_response_size_bytes', reponse.content_length, route=route)
+    return reponse
+
+@bp.route('/metrics')
+def metrics():
+    """
+    Métriques de tous les workers au format d'exposition Prometheus, avec
+    la durée et les lignes des étapes de la dernière exécution du pipeline
+    """
+    from pipeline.evenements import BusEvenements
+    from pipeline.metriques import Metriques
+    
+    jauges = Metriques.jauges_pipeline(BusEvenements(current_app.config['EVENEMENTS_PATH']))
+    reponse = Response(_metriques().exposer(jauges), content_type='text/plain; version=0.0.4; charset=utf-8')
+    reponse.headers['Cache-Control'] = 'no-store'
+    return reponse
+
 # ===========================================
 # ROUTES D'ERREUR
 # ===========================================
 
-@app.errorhandler(404)
+@bp.app_errorhandler(404)
 def not_found(error):
     """Page 404 personnalisée"""
     return render_template('index.html'), 404
 
-@app.errorhandler(500)
+@bp.app_errorhandler(500)
 def internal_error(error):
     """Page 500 personnalisée"""
     logger.error(f" Erreur interne: {error}")
@@ -317,17 +1228,18 @@ def get_dataset_stats(file_path):
         if not os.path.exists(file_path):
             return None
         
-        df = pd.read_csv(file_path)
+        profil = _profil_dataset(file_path)
         file_size = os.path.getsize(file_path)
         
         return {
-            'rows': len(df),
-            'columns': len(df.columns),
+            'rows': profil['rows'],
+            'columns': profil['columns'],
             'size_bytes': file_size,
             'size_mb': file_size / (1024 * 1024),
-            'memory_usage': df.memory_usage(deep=True).sum(),
-            'dtypes': df.dtypes.astype(str).to_dict(),
-            'null_counts': df.isnull().sum().to_dict()
+            'dtypes': {col: infos['dtype'] for col, infos in profil['colonnes'].items()},
+            'null_counts': {col: infos['nb_nulls'] for col, infos in profil['colonnes'].items()},
+            'duplicates': profil['duplicates'],
+            'profile': profil['colonnes']
         }
     except Exception as e:
         logger.error(f" Erreur lors de l'analyse du dataset {file_path}: {e}")
@@ -352,8 +1264,55 @@ def initialize_app():
     
     logger.info(" ETL Cacao initialisé avec succès!")
 
-# Initialiser l'application au démarrage
-initialize_app()
+def create_app(initialiser=False, precharger=False):
+    """
+    Fabrique de l'application Flask.
+
+    Aucun accès disque n'est fait à l'import : la vérification des datasets
+    et la création des dossiers n'ont lieu que si initialiser=True (lancement
+    direct ou `gunicorn 'app:create_app(initialiser=True)'`). La disponibilité
+    est exposée par /readyz.
+
+    Avec precharger=True (et `gunicorn --preload`), les datasets sont
+    convertis en Arrow et mappés en mémoire dans le master avant le fork :
+    tous les workers partagent alors une seule copie physique des données.
+    Le mode Arrow peut aussi être activé seul via ETL_CACAO_ARROW=1.
+    """
+    flask_app = Flask(__name__)
+    
+    # Configuration
+    flask_app.config['SECRET_KEY'] = 'etl_cacao_secret_key_2024'
+    flask_app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max
+    flask_app.config['DATASETS_ARROW'] = precharger or os.environ.get('ETL_CACAO_ARROW') == '1'
+    flask_app.config['EVENEMENTS_PATH'] = os.environ.get('ETL_CACAO_EVENEMENTS', 'data/pipeline_evenements.sqlite')
+    flask_app.config['PIPELINE_WORKERS'] = int(os.environ.get('ETL_CACAO_PIPELINE_WORKERS', 1))
+    flask_app.config['PIPELINE_CAPACITE'] = int(os.environ.get('ETL_CACAO_PIPELINE_CAPACITE', 4))
+    flask_app.config['PARTITIONS'] = os.environ.get('ETL_CACAO_PARTITIONS', '')
+    flask_app.config['SQL_TIMEOUT_MS'] = int(os.environ.get('ETL_CACAO_SQL_TIMEOUT_MS', 2000))
+    flask_app.config['SQL_MAX_ROWS'] = int(os.environ.get('ETL_CACAO_SQL_MAX_ROWS', 1000))
+    flask_app.config['LIGNEE'] = os.environ.get('ETL_CACAO_LIGNEE', '1') == '1'
+    flask_app.config['SSE_DUREE_MAX'] = float(os.environ.get('ETL_CACAO_SSE_DUREE_MAX', 300))
+    # Métriques par worker, agrégées entre workers gunicorn si un dossier partagé est fourni
+    flask_app.config['METRIQUES_DOSSIER'] = (os.environ.get('ETL_CACAO_METRIQUES')
+                                             or os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+    
+    flask_app.register_blueprint(bp)
+    
+    if initialiser:
+        initialize_app()
+    
+    if precharger:
+        from data.load.memoire_partagee import DatasetsPartages
+        if DatasetsPartages.disponible():
+            DatasetsPartages.precharger(DATASETS_PATH.values())
+            logger.info(" Datasets Arrow préchargés (mémoire partagée)")
+        else:
+            logger.warning(" pyarrow absent : préchargement des datasets ignoré")
+    
+    return flask_app
+
+# Application par défaut pour `gunicorn app:app` (sans effet de bord)
+app = create_app()
 
 # ===========================================
 # LANCEMENT DE L'APPLICATION
@@ -370,8 +1329,8 @@ if __name__ == '__main__':
     
     """)
     
-    # Vérifier les datasets au démarrage
-    check_datasets_exist()
+    # Vérifier les datasets et créer les dossiers au démarrage
+    initialize_app()
     
     # Lancer l'application
     app.run(
@@ -0,0 +1,157 @@
+"""
+Parité et benchmark du backend Polars
+1. Parité : chaque transformation, puis le pipeline complet, sont exécutés
+   avec les deux backends sur le CSV brut et sur un jeu synthétique
+   contenant les cas limites (blancs, caractères de contrôle et spéciaux,
+   encodage, pays mal capitalisés, valeurs manquantes) ; les résultats
+   doivent être identiques cellule par cellule.
+2. Benchmark : durée de chaque étape avec pandas et Polars sur N lignes.
+
+Usage : python -m benchmarks.bench_backend_polars [nb_lignes]
+"""
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+import polars as pl
+
+from pipeline.evenements import BusEvenements
+from pipeline.execution import PipelineCacao, _etapes_cacao, _etapes_cacao_polars
+from transformation.backend_polars import TransformationsPolars
+
+CSV_BRUT = 'data/raw/cacao_raw.csv'
+
+
+def jeu_synthetique(nb_lignes, graine=0):
+    """Jeu au schéma cacao reprenant les valeurs brutes et des cas limites"""
+    rng = np.random.default_rng(graine)
+    brut = pd.read_csv(CSV_BRUT)
+    df = brut.sample(nb_lignes, replace=True, random_state=graine).reset_index(drop=True)
+    # Un REF par ligne : les avis tirés plusieurs fois ne sont pas des doublons pour la validation
+    df['REF'] = np.arange(1, nb_lignes + 1)
+
+    cas_limites = {
+        'Company': ['  ', '#Cacao Co!', 'Na\x01ve Choc', 'CafÃ© Noir', '\t', 'Bonnat\x07'],
+        'Type de fève': ['Criollo (Ã©)', '\xa0', '~Trinitario', 'Forastero\ufffd'],
+        'Broad Bean Origin': ['dominican republic', '  ghana  ', 'U.S.A.', 'papua  new\tguinea', '\xa0', 'venezuela/ ghana'],
+        "Localisation de l'entreprise": ['u.k.', 'UK', 'new zealand', 'sao tome & principe'],
+        'Pourcentage de cacao': ['70.5%', ' 72% ', '100%'],
+    }
+    for col, valeurs in cas_limites.items():
+        positions = rng.choice(nb_lignes, size=min(nb_lignes, len(valeurs) * 50), replace=False)
+        df.loc[positions, col] = np.resize(np.array(valeurs, dtype=object), len(positions))
+    return df
+
+
+def en_pandas(df):
+    """Résultat Polars ramené en pandas pour la comparaison"""
+    return df.to_pandas() if isinstance(df, pl.DataFrame) else df
+
+
+def comparer(attendu, obtenu, contexte):
+    """Lève AssertionError en décrivant la première différence"""
+    # La validation retire des lignes en gardant l'index pandas : comparaison par position
+    attendu, obtenu = attendu.reset_index(drop=True), en_pandas(obtenu)
+    assert list(attendu.columns) == list(obtenu.columns), f"{contexte} : colonnes différentes"
+    for col in attendu.columns:
+        a, b = attendu[col], obtenu[col]
+        if pd.api.types.is_numeric_dtype(a) != pd.api.types.is_numeric_dtype(b):
+            raise AssertionError(f"{contexte} : type différent pour '{col}' ({a.dtype} / {b.dtype})")
+        egal = (a.isna() & b.isna()) | (a.astype(object) == b.astype(object))
+        if not egal.all():
+            i = int(np.flatnonzero(~egal.to_numpy())[0])
+            raise AssertionError(f"{contexte} : '{col}' ligne {i} : {a.iloc[i]!r} (pandas) / {b.iloc[i]!r} (polars)")
+
+
+def verifier_parite(df_pandas, df_polars, libelle):
+    """Compare les backends étape par étape sur les mêmes données"""
+    etapes_pandas = [e for e in _etapes_cacao() if not e.nom.startswith("Stockage")]
+    etapes_polars = [e for e in _etapes_cacao_polars() if not e.nom.startswith("Stockage")]
+
+    comparer(df_pandas, df_polars, f"{libelle} / lecture")
+    with contextlib.redirect_stdout(io.StringIO()):
+        for etape_pd, etape_pl in zip(etapes_pandas, etapes_polars):
+            df_pandas = etape_pd.fonction(df_pandas)
+            df_polars = etape_pl.fonction(df_polars)
+            comparer(df_pandas, df_polars, f"{libelle} / {etape_pd.nom}")
+    print(f"  {libelle} : parité OK ({len(df_pandas):,} lignes, {len(etapes_pandas)} étapes)")
+
+
+def verifier_fichiers():
+    """Exécute le pipeline complet avec chaque backend et compare les CSV écrits"""
+    racine = os.getcwd()
+    contenus = {}
+    for backend in ("pandas", "polars"):
+        with tempfile.TemporaryDirectory() as dossier:
+            os.makedirs(os.path.join(dossier, 'data', 'raw'))
+            shutil.copy(CSV_BRUT, os.path.join(dossier, 'data', 'raw', 'source.csv'))
+            os.chdir(dossier)
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    PipelineCacao.executer(source='data/raw/source.csv', backend=backend,
+                                           bus=BusEvenements('evenements.sqlite'))
+                contenus[backend] = {}
+                for etage in ('raw', 'interim', 'processed'):
+                    for nom in sorted(os.listdir(os.path.join('data', etage))):
+                        if nom.endswith('.csv') and nom != 'source.csv':
+                            with open(os.path.join('data', etage, nom), 'rb') as f:
+                                contenus[backend][f"{etage}/{nom}"] = f.read()
+            finally:
+                os.chdir(racine)
+
+    assert contenus['pandas'].keys() == contenus['polars'].keys(), "Fichiers écrits différents"
+    for nom, contenu in contenus['pandas'].items():
+        assert contenu == contenus['polars'][nom], f"Pipeline complet : {nom} diffère"
+    print(f"  Pipeline complet : fichiers identiques ({', '.join(contenus['pandas'])})")
+
+
+def chronometrer_etapes(etapes, df):
+    """Durée (s) de chaque étape, sorties console masquées"""
+    durees = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for etape in etapes:
+            debut = time.perf_counter()
+            df = etape.fonction(df)
+            durees[etape.nom] = time.perf_counter() - debut
+    return durees
+
+
+def main(nb_lignes=1_000_000):
+    print("Parité pandas / Polars")
+    verifier_parite(pd.read_csv(CSV_BRUT), TransformationsPolars.lire_csv(CSV_BRUT), "CSV brut")
+
+    synthetique = jeu_synthetique(20_000)
+    verifier_parite(synthetique, pl.from_pandas(synthetique), "Cas limites")
+
+    # Même fichier relu par chaque backend (valeurs manquantes lues à l'identique)
+    tampon = io.StringIO()
+    synthetique.to_csv(tampon, index=False)
+    verifier_parite(pd.read_csv(io.StringIO(tampon.getvalue())),
+                    TransformationsPolars.lire_csv(io.BytesIO(tampon.getvalue().encode('utf-8'))),
+                    "Cas limites relus")
+    verifier_fichiers()
+
+    print(f"\nBenchmark sur {nb_lignes:,} lignes")
+    gros = jeu_synthetique(nb_lignes, graine=1)
+    etapes_pandas = [e for e in _etapes_cacao() if not e.nom.startswith("Stockage")]
+    etapes_polars = [e for e in _etapes_cacao_polars() if not e.nom.startswith("Stockage")]
+    durees_pandas = chronometrer_etapes(etapes_pandas, gros)
+    durees_polars = chronometrer_etapes(etapes_polars, pl.from_pandas(gros))
+
+    print(f"{'Étape':<32}{'pandas (s)':>12}{'polars (s)':>12}{'gain':>8}")
+    for nom in durees_pandas:
+        a, b = durees_pandas[nom], durees_polars[nom]
+        print(f"{nom:<32}{a:>12.3f}{b:>12.3f}{a / b if b else float('inf'):>7.1f}x")
+    total_pandas, total_polars = sum(durees_pandas.values()), sum(durees_polars.values())
+    print(f"{'Total':<32}{total_pandas:>12.3f}{total_polars:>12.3f}{total_pandas / total_polars:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
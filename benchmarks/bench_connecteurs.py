@@ -0,0 +1,69 @@
+"""
+Benchmark des connecteurs de fichiers locaux (ConnecteurFichiers)
+Écrit le CSV brut décliné en N lignes réparties dans plusieurs exports
+(en-têtes anglais du dataset d'origine, colonne supplémentaire), puis
+compare la lecture pandas fichier par fichier et la lecture du motif glob
+par le connecteur (pyarrow multithreadé, fichiers lus en parallèle).
+
+Usage : python -m benchmarks.bench_connecteurs [nb_lignes] [nb_fichiers]
+"""
+
+import os
+import sys
+import time
+import glob
+import tempfile
+import contextlib
+import io
+
+import pandas as pd
+
+from extraction.connecteurs import ConnecteurFichiers
+
+CSV_BRUT = 'data/raw/cacao_raw.csv'
+
+ENTETES_ANGLAIS = {
+    "Company": "Company (Maker-if known)",
+    "Origine spécifique du harirot": "Specific Bean Origin or Bar Name",
+    "Date de la revue": "Review Date",
+    "Pourcentage de cacao": "Cocoa Percent",
+    "Localisation de l'entreprise": "Company Location",
+    "Note": "Rating",
+    "Type de fève": "Bean Type",
+}
+
+
+def ecrire_exports(dossier, nb_lignes, nb_fichiers):
+    """Exports partenaires : CSV brut répété, en-têtes anglais, colonne en trop"""
+    brut = pd.read_csv(CSV_BRUT)
+    df = brut.sample(nb_lignes, replace=True, random_state=0).reset_index(drop=True)
+    df = df.rename(columns=ENTETES_ANGLAIS)
+    df["Commentaire"] = "export partenaire"
+    taille = -(-nb_lignes // nb_fichiers)
+    for i in range(nb_fichiers):
+        df.iloc[i * taille:(i + 1) * taille].to_csv(os.path.join(dossier, f"export_{i:03d}.csv"), index=False)
+
+
+def main(nb_lignes=2_000_000, nb_fichiers=16):
+    with tempfile.TemporaryDirectory() as dossier:
+        ecrire_exports(dossier, nb_lignes, nb_fichiers)
+        motif = os.path.join(dossier, "*.csv")
+
+        debut = time.perf_counter()
+        reference = pd.concat([pd.read_csv(f) for f in sorted(glob.glob(motif))], ignore_index=True)
+        duree_pandas = time.perf_counter() - debut
+
+        debut = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            df = ConnecteurFichiers.lire_motif(motif)
+        duree_connecteur = time.perf_counter() - debut
+
+    assert len(df) == len(reference) and list(df.columns) == ConnecteurFichiers.normaliser(reference.head()).columns.tolist()
+    print(f"Lecture de {nb_lignes:,} lignes réparties dans {nb_fichiers} fichiers")
+    print(f"  pandas.read_csv séquentiel : {duree_pandas:.2f} s")
+    print(f"  ConnecteurFichiers         : {duree_connecteur:.2f} s ({duree_pandas / duree_connecteur:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 16)
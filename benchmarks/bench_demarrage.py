@@ -0,0 +1,67 @@
+"""
+Benchmark du temps de démarrage à froid
+Mesure, dans un interpréteur neuf, la latence d'import de l'application
+Flask et de chaque package ETL
+
+Usage : python -m benchmarks.bench_demarrage [nb_repetitions]
+"""
+
+import os
+import subprocess
+import statistics
+import sys
+
+MODULES = [
+    "app",
+    "extraction.scraper",
+    "transformation.remplacer_valeur",
+    "transformation.nettoyage_format",
+    "transformation.uniformiser_pays",
+    "imputation.imputation_mod",
+    "package_exploration_data.profilage",
+    "data.load.save_processed_data",
+]
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def mesurer_import(module):
+    """Durée (ms) de l'import du module dans un nouveau processus"""
+    code = (
+        "import time; debut = time.perf_counter(); "
+        f"import {module}; "
+        "print((time.perf_counter() - debut) * 1000)"
+    )
+    sortie = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=RACINE, capture_output=True, text=True, check=True
+    )
+    return float(sortie.stdout.strip().splitlines()[-1])
+
+
+def modules_lourds(module):
+    """Modules lourds chargés par l'import du module"""
+    code = (
+        f"import sys, {module}; "
+        "print(','.join(m for m in ('pandas', 'numpy', 'requests', 'bs4') if m in sys.modules))"
+    )
+    sortie = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=RACINE, capture_output=True, text=True, check=True
+    )
+    return sortie.stdout.strip().splitlines()[-1] if sortie.stdout.strip() else ""
+
+
+def main(nb_repetitions=5):
+    print(f"Latence d'import à froid (médiane sur {nb_repetitions} processus)")
+    for module in MODULES:
+        try:
+            durees = [mesurer_import(module) for _ in range(nb_repetitions)]
+        except subprocess.CalledProcessError as e:
+            print(f"  {module:<40} erreur : {e.stderr.strip().splitlines()[-1]}")
+            continue
+        print(f"  {module:<40} {statistics.median(durees):>8.1f} ms   [{modules_lourds(module) or '-'}]")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
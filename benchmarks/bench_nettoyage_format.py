@@ -0,0 +1,66 @@
+"""
+Benchmark du nettoyage des dates et pourcentages
+Compare l'ancienne implémentation de NettoyeurFormat aux chemins rapides
+
+Usage : python -m benchmarks.bench_nettoyage_format [nb_lignes]
+"""
+
+import sys
+import time
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+
+from transformation.nettoyage_format import NettoyeurFormat
+
+
+def ancien_pourcentages(df, colonne):
+    """Comportement d'origine : astype(str) + replace + astype(float) sur chaque ligne"""
+    df_clean = df.copy()
+    df_clean[colonne] = df_clean[colonne].astype(str).str.replace('%', '').astype(float)
+    return df_clean
+
+
+def ancien_dates(df, colonne):
+    """Comportement d'origine : inférence du format puis retour en chaînes"""
+    df_clean = df.copy()
+    df_clean[colonne] = pd.to_datetime(df_clean[colonne], errors='coerce')
+    df_clean[colonne] = df_clean[colonne].dt.strftime('%Y-%m-%d')
+    return df_clean
+
+
+def chronometrer(fonction, *args, **kwargs):
+    """Renvoie la durée (s) de l'appel, sorties console masquées"""
+    debut = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fonction(*args, **kwargs)
+    return time.perf_counter() - debut
+
+
+def main(nb_lignes=1_000_000):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'Pourcentage de cacao': pd.Series(rng.integers(50, 100, nb_lignes)).astype(str) + '%',
+        'Date de la revue': rng.integers(2006, 2018, nb_lignes).astype(str),
+        'Date complete': pd.Series(pd.date_range('2006-01-01', periods=4000, freq='D').strftime('%d/%m/%Y'))
+                           .sample(nb_lignes, replace=True, random_state=0).to_numpy(),
+    })
+
+    mesures = [
+        ("Pourcentages - ancien", chronometrer(ancien_pourcentages, df, 'Pourcentage de cacao')),
+        ("Pourcentages - valeurs distinctes", chronometrer(NettoyeurFormat.nettoyer_pourcentages, df, 'Pourcentage de cacao')),
+        ("Années - ancien (to_datetime + strftime)", chronometrer(ancien_dates, df, 'Date de la revue')),
+        ("Années - chemin rapide 'annee'", chronometrer(NettoyeurFormat.nettoyer_dates, df, 'Date de la revue', format='annee')),
+        ("Dates - ancien (format inféré)", chronometrer(ancien_dates, df, 'Date complete')),
+        ("Dates - format explicite + cache", chronometrer(NettoyeurFormat.nettoyer_dates, df, 'Date complete', format='%d/%m/%Y')),
+    ]
+
+    print(f"Benchmark NettoyeurFormat sur {nb_lignes:,} lignes")
+    for nom, duree in mesures:
+        print(f"  {nom:<45} {duree * 1000:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,70 @@
+"""
+Benchmark de l'index de recherche (IndexRecherche)
+Construit l'index d'un jeu synthétique de N lignes (entreprises et origines
+du CSV final déclinées en variantes), puis mesure la latence des
+recherches approximatives et des autocomplétions sur l'index mappé.
+
+Usage : python -m benchmarks.bench_recherche [nb_lignes]
+"""
+
+import os
+import sys
+import time
+import tempfile
+import contextlib
+import io
+
+import numpy as np
+import pandas as pd
+
+from data.load.index_recherche import IndexRecherche
+
+CSV_FINAL = 'data/processed/cacao_clean.csv'
+REQUETES = ["bonat", "valrhona", "madagascar", "sambirano", "peru", "domincan republic", "cote ivoire"]
+PREFIXES = ["v", "ven", "mad", "ch", "sao t", "bo"]
+
+
+def jeu_synthetique(nb_lignes, graine=0):
+    """Valeurs du CSV final suffixées d'un numéro de lot : beaucoup de termes distincts"""
+    rng = np.random.default_rng(graine)
+    final = pd.read_csv(CSV_FINAL)
+    df = final.sample(nb_lignes, replace=True, random_state=graine).reset_index(drop=True)
+    lots = rng.integers(0, max(nb_lignes // 20, 1), nb_lignes).astype(str)
+    for col in ("Company", "Origine spécifique du harirot"):
+        df[col] = df[col].astype(str) + " " + lots
+    return df
+
+
+def chronometrer(fonction, arguments, repetitions=20):
+    """Latence médiane (ms) de chaque appel"""
+    durees = []
+    for args in arguments:
+        for _ in range(repetitions):
+            debut = time.perf_counter()
+            fonction(*args)
+            durees.append((time.perf_counter() - debut) * 1000)
+    return float(np.median(durees)), float(np.percentile(durees, 99))
+
+
+def main(nb_lignes=1_000_000):
+    df = jeu_synthetique(nb_lignes)
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, "cacao_clean.csv")
+        debut = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            IndexRecherche.construire(df, chemin)
+        construction = time.perf_counter() - debut
+        taille = os.path.getsize(IndexRecherche.chemin(chemin)) / (1024 * 1024)
+
+        index = IndexRecherche.ouvrir(chemin)
+        recherche = chronometrer(index.rechercher, [(q,) for q in REQUETES])
+        completion = chronometrer(index.completer, [(p,) for p in PREFIXES])
+
+    print(f"Index de recherche sur {nb_lignes:,} lignes ({len(index.tableaux['termes_effectif']):,} termes)")
+    print(f"  Construction : {construction:.1f} s, fichier {taille:.1f} Mo")
+    print(f"  /api/search       : médiane {recherche[0]:.2f} ms, p99 {recherche[1]:.2f} ms")
+    print(f"  /api/autocomplete : médiane {completion[0]:.2f} ms, p99 {completion[1]:.2f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Construction des fichiers statiques du dashboard
+Minification des CSS, empreinte du contenu dans le nom, variantes
+gzip/brotli précompressées et manifeste utilisé par les templates (asset_url).
+Le JavaScript est publié tel quel : sans analyse complète de la syntaxe
+(chaînes, gabarits `...`, expressions régulières), retirer commentaires ou
+indentation peut modifier le code ; la compression gzip/brotli absorbe
+l'essentiel des blancs.
+
+Usage :
+    python construction_assets.py            # static/css, static/js
+    python construction_assets.py --vendor   # + Font Awesome et Google Fonts en local
+"""
+
+import os
+import re
+import sys
+import json
+import gzip
+import hashlib
+import shutil
+from urllib.error import URLError
+from urllib.parse import urljoin
+from urllib.request import urlopen, Request
+
+STATIC_DIR = 'static'
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+
+# Feuilles de style chargées depuis des CDN par les templates
+CDN_ASSETS = {
+    'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css': 'vendor/fontawesome/all.min.css',
+    'https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700;800;900&family=JetBrains+Mono:wght@400;500;600;700&display=swap': 'vendor/fonts/fonts.css',
+}
+
+# Extensions à compresser (les polices woff2 sont déjà compressées)
+COMPRESSIBLES = ('.css', '.js', '.svg', '.json', '.ttf', '.eot')
+
+# User-Agent récent : Google Fonts renvoie alors des polices woff2
+USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+
+
+def minifier_css(texte):
+    """Supprime commentaires et blancs superflus d'une feuille de style"""
+    texte = re.sub(r'/\*.*?\*/', '', texte, flags=re.S)
+    texte = re.sub(r'\s+', ' ', texte)
+    texte = re.sub(r'\s*([{};,>])\s*', r'\1', texte)
+    texte = re.sub(r':\s+', ':', texte)
+    return texte.replace(';}', '}').strip()
+
+
+def empreinte(contenu):
+    """8 premiers caractères du hachage du contenu"""
+    return hashlib.sha256(contenu).hexdigest()[:8]
+
+
+def ecrire_variantes(chemin, contenu):
+    """Écrit le fichier et ses variantes .gz / .br (brotli si installé)"""
+    os.makedirs(os.path.dirname(chemin), exist_ok=True)
+    with open(chemin, 'wb') as f:
+        f.write(contenu)
+
+    if not chemin.endswith(COMPRESSIBLES):
+        return
+
+    with open(chemin + '.gz', 'wb') as f:
+        # mtime=0 : même contenu → mêmes octets
+        f.write(gzip.compress(contenu, compresslevel=9, mtime=0))
+
+    try:
+        import brotli
+    except ImportError:
+        return
+    with open(chemin + '.br', 'wb') as f:
+        f.write(brotli.compress(contenu, quality=11))
+
+
+def publier(chemin_logique, contenu, manifeste):
+    """Publie un fichier sous un nom contenant son empreinte"""
+    racine, extension = os.path.splitext(chemin_logique)
+    nom_final = f"{racine}.{empreinte(contenu)}{extension}"
+    ecrire_variantes(os.path.join(DIST_DIR, nom_final), contenu)
+    manifeste[chemin_logique] = nom_final
+    return nom_final
+
+
+def telecharger(url):
+    """Télécharge une ressource (utilisé seulement avec --vendor)"""
+    with urlopen(Request(url, headers={'User-Agent': USER_AGENT}), timeout=30) as reponse:
+        return reponse.read()
+
+
+def vendoriser_css(url, chemin_logique, manifeste):
+    """
+    Rapatrie une feuille de style de CDN et les fichiers qu'elle référence
+    (polices), puis réécrit ses url(...) vers les copies locales
+    """
+    css = telecharger(url).decode('utf-8')
+    dossier = os.path.dirname(chemin_logique)
+
+    def remplacer(correspondance):
+        cible = correspondance.group(1).strip('\'"')
+        if cible.startswith('data:'):
+            return correspondance.group(0)
+        cible, diese, fragment = cible.partition('#')
+        suffixe = diese + fragment
+        url_absolue = urljoin(url, cible)
+        nom = os.path.basename(url_absolue.split('?')[0])
+        if nom not in manifeste.get('_telecharges', {}):
+            contenu = telecharger(url_absolue)
+            nom_final = publier(f"{dossier}/files/{nom}", contenu, manifeste)
+            manifeste.setdefault('_telecharges', {})[nom] = nom_final
+        return f"url(files/{os.path.basename(manifeste['_telecharges'][nom])}{suffixe})"
+
+    css = re.sub(r'url\(([^)]+)\)', remplacer, css)
+    # Les polices sont publiées dans files/ à côté de la feuille de style
+    manifeste[url] = publier(chemin_logique, minifier_css(css).encode('utf-8'), manifeste)
+
+
+def construire(vendor=False):
+    """
+    Construit static/dist et son manifeste
+
+    Arguments
+    ---------------
+        vendor : bool, rapatrier aussi les feuilles de style des CDN
+
+    Return
+    ---------------
+        manifeste : dict, chemin logique → chemin publié dans static/dist
+    """
+    if os.path.isdir(DIST_DIR):
+        shutil.rmtree(DIST_DIR)
+
+    manifeste = {}
+
+    for dossier, _, fichiers in os.walk(STATIC_DIR):
+        if os.path.abspath(dossier).startswith(os.path.abspath(DIST_DIR)):
+            continue
+        for fichier in sorted(fichiers):
+            chemin = os.path.join(dossier, fichier)
+            chemin_logique = os.path.relpath(chemin, STATIC_DIR).replace(os.sep, '/')
+            with open(chemin, 'rb') as f:
+                contenu = f.read()
+
+            if fichier.endswith('.css'):
+                contenu = minifier_css(contenu.decode('utf-8')).encode('utf-8')
+
+            publier(chemin_logique, contenu, manifeste)
+
+    if vendor:
+        for url, chemin_logique in CDN_ASSETS.items():
+            try:
+                vendoriser_css(url, chemin_logique, manifeste)
+            except (URLError, OSError) as e:
+                # Le template gardera l'URL du CDN pour cette ressource
+                print(f"Impossible de rapatrier {url} : {e}")
+
+    manifeste.pop('_telecharges', None)
+    with open(MANIFEST_PATH, 'w', encoding='utf-8') as f:
+        json.dump(manifeste, f, indent=2, ensure_ascii=False)
+
+    print(f"{len(manifeste)} fichier(s) publié(s) dans {DIST_DIR}")
+    for chemin_logique, nom_final in manifeste.items():
+        print(f"  {chemin_logique} → {nom_final}")
+
+    return manifeste
+
+
+if __name__ == '__main__':
+    construire(vendor='--vendor' in sys.argv)
@@ -0,0 +1,309 @@
+# etl/index_recherche.py
+
+import os
+import json
+import struct
+import threading
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# Champs indexés et leur nom dans l'API
+CHAMPS = {
+    "Company": "company",
+    "Origine spécifique du harirot": "origin",
+    "Broad Bean Origin": "bean_origin",
+}
+
+# Longueur maximale des clés de préfixe (au-delà, la clé est tronquée)
+LONGUEUR_PREFIXE = 16
+_ALIGNEMENT = 64
+
+
+def plier(texte):
+    """Minuscules sans accents, ponctuation remplacée par des espaces"""
+    texte = unicodedata.normalize("NFKD", str(texte))
+    texte = "".join(c if c.isalnum() else " " for c in texte if not unicodedata.combining(c)).lower()
+    return " ".join(texte.split())
+
+
+def _points_de_code(textes):
+    """Textes concaténés en points de code (uint32), avec le début et la longueur de chacun"""
+    longueurs = np.fromiter((len(t) for t in textes), dtype=np.int64, count=len(textes))
+    points = np.frombuffer("".join(textes).encode("utf-32-le"), dtype=np.uint32)
+    return points, np.r_[0, np.cumsum(longueurs)[:-1]].astype(np.int64), longueurs
+
+
+def _trigrammes(cle):
+    """Codes 63 bits des trigrammes d'une clé pliée (bornes de mot incluses)"""
+    cle = f"  {cle} "
+    return {(ord(cle[i]) << 42) | (ord(cle[i + 1]) << 21) | ord(cle[i + 2]) for i in range(len(cle) - 2)}
+
+
+class IndexRecherche:
+    """
+    Classe pour construire et interroger l'index de recherche du dataset
+    final (entreprises et origines), enregistré à côté du CSV dans un seul
+    fichier <nom>.search.idx ouvert en mémoire mappée :
+    - termes : valeurs distinctes de chaque champ, avec leurs lignes
+    - trigrammes des termes pliés (sans accents) -> termes, pour la
+      recherche approximative
+    - clés de préfixe triées (début de chaque mot d'un terme) pour
+      l'autocomplétion par recherche dichotomique
+    Les tableaux sont lus page par page à la demande et partagés entre les
+    workers par le cache du système.
+    """
+
+    _index = {}
+    _verrou = threading.Lock()
+
+    def __init__(self, tableaux, entete):
+        self.tableaux = tableaux
+        self.champs = entete['champs']
+        self.nb_lignes = entete['nb_lignes']
+
+    @staticmethod
+    def chemin(chemin_csv):
+        """Renvoie le chemin de l'index associé au CSV"""
+        return os.path.splitext(chemin_csv)[0] + ".search.idx"
+
+    @staticmethod
+    def construire(df: pd.DataFrame, chemin_csv):
+        """
+        Construit l'index de recherche du DataFrame et l'écrit à côté du CSV
+
+        Arguments
+        ---------------
+        df : pd.DataFrame
+            Le dataset final (les numéros de ligne sont les positions dans le CSV).
+        chemin_csv : str
+            Chemin du CSV indexé.
+
+        Return
+        ---------------
+        chemin : str
+            Chemin du fichier d'index.
+        """
+        champs = [c for c in CHAMPS if c in df.columns]
+        termes_champ, libelles, effectifs, lignes = [], [], [], []
+
+        # Termes : valeurs distinctes de chaque champ, lignes regroupées par terme
+        for numero, champ in enumerate(champs):
+            codes, distincts = pd.factorize(df[champ])
+            ordre = np.argsort(codes, kind="stable")
+            lignes.append(ordre[codes[ordre] >= 0])
+            effectifs.append(np.bincount(codes[codes >= 0], minlength=len(distincts)))
+            termes_champ.append(np.full(len(distincts), numero, dtype=np.int8))
+            libelles += [str(v) for v in distincts]
+
+        effectifs = np.concatenate(effectifs).astype(np.int64) if effectifs else np.empty(0, dtype=np.int64)
+        cles = [plier(libelle) for libelle in libelles]
+        encodes = [libelle.encode("utf-8") for libelle in libelles]
+
+        # Trigrammes -> termes : couples (trigramme, terme) distincts triés
+        points, debuts, longueurs = _points_de_code([f"  {cle} " for cle in cles])
+        nb = np.maximum(longueurs - 2, 0)
+        termes = np.repeat(np.arange(len(cles)), nb)
+        positions = np.repeat(debuts, nb) + np.arange(nb.sum()) - np.repeat(np.cumsum(nb) - nb, nb)
+        codes = ((points[positions].astype(np.int64) << 42) | (points[positions + 1].astype(np.int64) << 21)
+                 | points[positions + 2].astype(np.int64))
+        ordre = np.lexsort((termes, codes))
+        codes, termes = codes[ordre], termes[ordre]
+        distincts = np.r_[True, (codes[1:] != codes[:-1]) | (termes[1:] != termes[:-1])] if len(codes) else np.empty(0, bool)
+        codes, termes = codes[distincts], termes[distincts]
+        codes_trigrammes, debuts_trigrammes = np.unique(codes, return_index=True)
+
+        # Clés de préfixe : texte plié à partir de chaque début de mot (tronqué)
+        points, debuts, longueurs = _points_de_code(cles)
+        proprietaires = np.repeat(np.arange(len(cles)), longueurs)
+        locales = np.arange(len(points)) - np.repeat(debuts, longueurs)
+        precedents = np.r_[np.uint32(0), points[:-1]] if len(points) else points
+        departs = np.flatnonzero((locales == 0) | (precedents == ord(" ")))
+        proprietaires = proprietaires[departs]
+        indices = departs[:, None] + np.arange(LONGUEUR_PREFIXE)
+        valides = indices < (debuts + longueurs)[proprietaires][:, None]
+        matrice = np.where(valides, points[np.minimum(indices, max(len(points) - 1, 0))] if len(points) else 0, 0)
+        prefixes = np.ascontiguousarray(matrice, dtype=np.uint32).view(f"<U{LONGUEUR_PREFIXE}").ravel()
+        ordre = np.argsort(prefixes, kind="stable")
+
+        tableaux = {
+            'termes_champ': np.concatenate(termes_champ) if termes_champ else np.empty(0, dtype=np.int8),
+            'termes_libelle': np.frombuffer(b"".join(encodes), dtype=np.uint8),
+            'termes_debut_libelle': np.r_[0, np.cumsum([len(e) for e in encodes], dtype=np.int64)].astype(np.int64),
+            'termes_effectif': effectifs,
+            'termes_nb_trigrammes': np.bincount(termes, minlength=len(cles)).astype(np.int32),
+            'termes_debut_lignes': np.r_[0, np.cumsum(effectifs)].astype(np.int64),
+            'lignes': (np.concatenate(lignes) if lignes else np.empty(0)).astype(np.int64),
+            'trigrammes': codes_trigrammes.astype(np.int64),
+            'trigrammes_debut': np.r_[debuts_trigrammes, len(codes)].astype(np.int64),
+            'trigrammes_termes': termes.astype(np.int32),
+            'prefixes': prefixes[ordre],
+            'prefixes_termes': proprietaires[ordre].astype(np.int32),
+        }
+
+        chemin = IndexRecherche.chemin(chemin_csv)
+        IndexRecherche._ecrire(chemin, tableaux, {'champs': champs, 'nb_lignes': len(df)})
+        print(f"Index de recherche créé : {chemin} ({len(cles)} termes, {len(codes_trigrammes)} trigrammes)")
+        return chemin
+
+    @staticmethod
+    def _ecrire(chemin, tableaux, entete):
+        """Écrit les tableaux bout à bout (alignés) derrière un en-tête JSON"""
+        descriptions, position = {}, 0
+        for nom, tableau in tableaux.items():
+            descriptions[nom] = {'dtype': tableau.dtype.str, 'shape': list(tableau.shape), 'offset': position}
+            position += -(-tableau.nbytes // _ALIGNEMENT) * _ALIGNEMENT
+
+        corps = json.dumps({**entete, 'tableaux': descriptions}, ensure_ascii=False).encode("utf-8")
+        debut = -(-(8 + len(corps)) // _ALIGNEMENT) * _ALIGNEMENT
+
+        temporaire = f"{chemin}.{os.getpid()}.tmp"
+        with open(temporaire, "wb") as f:
+            f.write(struct.pack("<Q", debut))
+            f.write(corps)
+            for nom, tableau in tableaux.items():
+                f.seek(debut + descriptions[nom]['offset'])
+                f.write(np.ascontiguousarray(tableau).tobytes())
+            f.truncate(debut + position)
+        os.replace(temporaire, chemin)
+
+    @staticmethod
+    def ouvrir(chemin_csv):
+        """
+        Renvoie l'index du CSV, ouvert en mémoire mappée et gardé en cache
+        par processus tant que le fichier n'a pas changé
+
+        Return
+        ---------------
+        index : IndexRecherche
+        """
+        chemin = IndexRecherche.chemin(chemin_csv)
+        if not os.path.exists(chemin):
+            raise FileNotFoundError(f"Index de recherche introuvable : {chemin}")
+        version = os.path.getmtime(chemin)
+
+        with IndexRecherche._verrou:
+            en_cache = IndexRecherche._index.get(chemin)
+            if en_cache is not None and en_cache[0] == version:
+                return en_cache[1]
+
+            with open(chemin, "rb") as f:
+                debut = struct.unpack("<Q", f.read(8))[0]
+                entete = json.loads(f.read(debut - 8).rstrip(b"\0").decode("utf-8"))
+            tableaux = {
+                nom: np.memmap(chemin, dtype=np.dtype(d['dtype']), mode="r", offset=debut + d['offset'],
+                               shape=tuple(d['shape'])) if np.prod(d['shape']) else np.empty(d['shape'], d['dtype'])
+                for nom, d in entete['tableaux'].items()
+            }
+            index = IndexRecherche(tableaux, entete)
+            IndexRecherche._index[chemin] = (version, index)
+            return index
+
+    def _champ(self, champ):
+        """Numéro du champ à partir de son nom de colonne ou de son nom d'API (None : tous)"""
+        if champ is None:
+            return None
+        noms = {CHAMPS.get(c, c): i for i, c in enumerate(self.champs)}
+        noms.update({c: i for i, c in enumerate(self.champs)})
+        if champ not in noms:
+            raise ValueError(f"Champ '{champ}' inconnu (attendu : {', '.join(CHAMPS[c] for c in self.champs)})")
+        return noms[champ]
+
+    def _terme(self, terme, score=None, nb_lignes=0):
+        t = self.tableaux
+        resultat = {
+            'field': CHAMPS.get(self.champs[int(t['termes_champ'][terme])]),
+            'value': bytes(t['termes_libelle'][t['termes_debut_libelle'][terme]:
+                                               t['termes_debut_libelle'][terme + 1]]).decode("utf-8"),
+            'rows': int(t['termes_effectif'][terme]),
+        }
+        if score is not None:
+            resultat['score'] = round(float(score), 3)
+        if nb_lignes:
+            debut = int(t['termes_debut_lignes'][terme])
+            resultat['row_ids'] = t['lignes'][debut:debut + min(nb_lignes, resultat['rows'])].tolist()
+        return resultat
+
+    def rechercher(self, requete, champ=None, limite=10, seuil=0.3, nb_lignes=20):
+        """
+        Recherche approximative (similarité des trigrammes, sans accents)
+
+        Arguments
+        ---------------
+        requete : str
+            Texte recherché (ex: 'cote d ivoire', 'bonat').
+        champ : str
+            'company', 'origin', 'bean_origin' (ou nom de colonne) ; None : tous.
+        limite : int
+            Nombre maximal de termes renvoyés.
+        seuil : float
+            Similarité minimale (Jaccard des trigrammes, 1 pour un terme
+            contenant exactement la requête).
+        nb_lignes : int
+            Nombre de numéros de ligne renvoyés par terme.
+
+        Return
+        ---------------
+        resultats : list de dict (field, value, rows, score, row_ids)
+        """
+        t = self.tableaux
+        numero = self._champ(champ)
+        cle = plier(requete)
+        if not cle:
+            return []
+
+        codes = np.array(sorted(_trigrammes(cle)), dtype=np.int64)
+        positions = np.searchsorted(t['trigrammes'], codes)
+        presents = positions < len(t['trigrammes'])
+        presents[presents] = t['trigrammes'][positions[presents]] == codes[presents]
+        if not presents.any():
+            return []
+
+        debuts = t['trigrammes_debut'][positions[presents]]
+        fins = t['trigrammes_debut'][positions[presents] + 1]
+        candidats = np.concatenate([t['trigrammes_termes'][d:f] for d, f in zip(debuts, fins)])
+        termes, communs = np.unique(candidats, return_counts=True)
+        if numero is not None:
+            garder = t['termes_champ'][termes] == numero
+            termes, communs = termes[garder], communs[garder]
+
+        scores = communs / (len(codes) + t['termes_nb_trigrammes'][termes] - communs)
+        # Tous les trigrammes de la requête présents : le terme la contient (ou presque)
+        scores = np.where(communs == len(codes), np.maximum(scores, 0.5 + scores / 2), scores)
+        garder = scores >= seuil
+        termes, scores = termes[garder], scores[garder]
+
+        ordre = np.lexsort((-t['termes_effectif'][termes], -scores))[:limite]
+        return [self._terme(int(termes[i]), scores[i], nb_lignes) for i in ordre]
+
+    def completer(self, prefixe, champ=None, limite=10):
+        """
+        Autocomplétion : termes dont un mot commence par le préfixe (sans
+        accents), les plus fréquents d'abord
+
+        Return
+        ---------------
+        resultats : list de dict (field, value, rows)
+        """
+        t = self.tableaux
+        numero = self._champ(champ)
+        cle = plier(prefixe)[:LONGUEUR_PREFIXE]
+        if not cle:
+            return []
+
+        debut = np.searchsorted(t['prefixes'], cle, side="left")
+        if len(cle) < LONGUEUR_PREFIXE:
+            fin = np.searchsorted(t['prefixes'], cle + "\U0010ffff", side="left")
+        else:
+            fin = np.searchsorted(t['prefixes'], cle, side="right")
+        termes = np.unique(t['prefixes_termes'][debut:fin])
+        if numero is not None:
+            termes = termes[t['termes_champ'][termes] == numero]
+
+        effectifs = t['termes_effectif'][termes]
+        if len(termes) > limite:
+            meilleurs = np.argpartition(-effectifs, limite)[:limite]
+            termes, effectifs = termes[meilleurs], effectifs[meilleurs]
+        ordre = np.lexsort((termes, -effectifs))
+        return [self._terme(int(termes[i])) for i in ordre]
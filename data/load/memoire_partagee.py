@@ -0,0 +1,124 @@
+# etl/memoire_partagee.py
+
+import os
+import threading
+
+
+class DatasetsPartages:
+    """
+    Classe pour partager les datasets entre les workers gunicorn sans copie.
+
+    Chaque CSV est converti une fois en fichier Arrow IPC (non compressé)
+    à côté de l'original, puis ouvert en mémoire mappée : tous les workers
+    (et le master avec --preload) lisent les mêmes pages physiques du cache
+    du système, et les aperçus / statistiques découpent la table sans copie.
+    Nécessite pyarrow (dépendance optionnelle).
+    """
+
+    _tables = {}
+    _verrou = threading.Lock()
+
+    @staticmethod
+    def disponible():
+        """Indique si pyarrow est installé"""
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    @staticmethod
+    def chemin_arrow(chemin_csv):
+        """Renvoie le chemin du fichier Arrow associé au CSV"""
+        return os.path.splitext(chemin_csv)[0] + ".arrow"
+
+    @staticmethod
+    def convertir(chemin_csv):
+        """
+        Convertit le CSV en fichier Arrow IPC s'il est absent ou périmé.
+
+        Arguments
+        ---------------
+        chemin_csv : str
+            Chemin du fichier CSV source.
+
+        Return
+        ---------------
+        chemin : str
+            Chemin du fichier Arrow.
+        """
+        import pyarrow as pa
+        import pyarrow.csv as pv
+
+        chemin = DatasetsPartages.chemin_arrow(chemin_csv)
+        if os.path.exists(chemin) and os.path.getmtime(chemin) >= os.path.getmtime(chemin_csv):
+            return chemin
+
+        # Cellules vides → null, comme pandas.read_csv
+        table = pv.read_csv(chemin_csv, convert_options=pv.ConvertOptions(strings_can_be_null=True))
+
+        # Écriture dans un fichier temporaire puis renommage atomique
+        temporaire = f"{chemin}.{os.getpid()}.tmp"
+        with pa.OSFile(temporaire, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(temporaire, chemin)
+
+        print(f"Dataset Arrow créé : {chemin}")
+        return chemin
+
+    @staticmethod
+    def ouvrir(chemin_csv):
+        """
+        Renvoie la table Arrow du dataset, mappée en mémoire (sans copie).
+        La table est gardée en cache par processus tant que le fichier
+        n'a pas changé.
+
+        Arguments
+        ---------------
+        chemin_csv : str
+            Chemin du fichier CSV du dataset.
+
+        Return
+        ---------------
+        table : pyarrow.Table
+        """
+        import pyarrow as pa
+
+        chemin = DatasetsPartages.convertir(chemin_csv)
+        version = os.path.getmtime(chemin)
+
+        with DatasetsPartages._verrou:
+            en_cache = DatasetsPartages._tables.get(chemin)
+            if en_cache is not None and en_cache[0] == version:
+                return en_cache[1]
+
+            table = pa.ipc.open_file(pa.memory_map(chemin, "r")).read_all()
+            DatasetsPartages._tables[chemin] = (version, table)
+
+        return table
+
+    @staticmethod
+    def precharger(chemins_csv):
+        """
+        Ouvre tous les datasets existants, à appeler dans le master gunicorn
+        (--preload) avant le fork des workers.
+
+        Arguments
+        ---------------
+        chemins_csv : list
+            Chemins des fichiers CSV à précharger.
+        """
+        for chemin_csv in chemins_csv:
+            if os.path.exists(chemin_csv):
+                DatasetsPartages.ouvrir(chemin_csv)
+
+    @staticmethod
+    def apercu(table, nb_lignes=10):
+        """Renvoie les premières lignes de la table (tranche sans copie)"""
+        return table.slice(0, nb_lignes).to_pylist()
+
+    @staticmethod
+    def types(table):
+        """Renvoie le type Arrow de chaque colonne"""
+        return {champ.name: str(champ.type) for champ in table.schema}
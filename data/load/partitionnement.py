@@ -0,0 +1,248 @@
+# etl/partitionnement.py
+
+import os
+import json
+import hashlib
+import operator
+from urllib.parse import quote, unquote
+
+import pandas as pd
+
+# Nom des clés de partition dans les chemins (style Hive : year=2016/...)
+NOMS_PARTITIONS = {
+    "Date de la revue": "year",
+    "Localisation de l'entreprise": "company_location",
+}
+
+VALEUR_NULLE = "__HIVE_DEFAULT_PARTITION__"
+OPERATEURS = {"==": operator.eq, "!=": operator.ne, ">": operator.gt,
+              ">=": operator.ge, "<": operator.lt, "<=": operator.le}
+MANIFESTE = "_partitions.json"
+
+
+class StockagePartitionne:
+    """
+    Classe pour écrire et relire un dataset partitionné à la manière de Hive :
+    dossier/year=2016/company_location=France/part-0.parquet
+
+    - à l'écriture, seules les partitions dont le contenu a changé sont
+      réécrites (empreintes gardées dans _partitions.json), les partitions
+      disparues sont supprimées
+    - à la lecture, les filtres sur les colonnes de partition éliminent les
+      dossiers sans ouvrir leurs fichiers
+    Nécessite pyarrow (écriture Parquet).
+    """
+
+    @staticmethod
+    def colonnes(partitions):
+        """Normalise la liste des partitions (noms de colonnes ou alias 'year', 'company_location')"""
+        if isinstance(partitions, str):
+            partitions = [p.strip() for p in partitions.split(",") if p.strip()]
+        alias = {v: k for k, v in NOMS_PARTITIONS.items()}
+        return [alias.get(p, p) for p in partitions]
+
+    @staticmethod
+    def _segment(colonne, valeur):
+        cle = NOMS_PARTITIONS.get(colonne, quote(colonne, safe=""))
+        if pd.isna(valeur):
+            return f"{cle}={VALEUR_NULLE}"
+        return f"{cle}={quote(str(valeur), safe='')}"
+
+    @staticmethod
+    def _empreinte(df):
+        h = hashlib.blake2b(digest_size=16)
+        h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+        h.update("|".join(f"{c}:{t}" for c, t in df.dtypes.astype(str).items()).encode("utf-8"))
+        return h.hexdigest()
+
+    @staticmethod
+    def _charger_manifeste(dossier):
+        chemin = os.path.join(dossier, MANIFESTE)
+        if not os.path.exists(chemin):
+            return {'colonnes': [], 'partitions': {}}
+        with open(chemin, encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def ecrire(df: pd.DataFrame, dossier, partitions):
+        """
+        Écrit le DataFrame en partitions Parquet
+
+        Arguments
+        ---------------
+        df : pd.DataFrame
+            Le DataFrame complet.
+        dossier : str
+            Dossier racine du dataset partitionné.
+        partitions : list ou str
+            Colonnes de partition, dans l'ordre (ex: ['Date de la revue']).
+
+        Return
+        ---------------
+        bilan : dict
+            Nombre de partitions écrites, inchangées et supprimées.
+        """
+        colonnes = StockagePartitionne.colonnes(partitions)
+        for col in colonnes:
+            if col not in df.columns:
+                raise ValueError(f"La colonne de partition '{col}' n'existe pas dans le DataFrame.")
+
+        os.makedirs(dossier, exist_ok=True)
+        ancien = StockagePartitionne._charger_manifeste(dossier)
+        if ancien['colonnes'] != colonnes:
+            ancien = {'colonnes': colonnes, 'partitions': {}}
+
+        nouveau = {'colonnes': colonnes, 'partitions': {}}
+        bilan = {'ecrites': 0, 'inchangees': 0, 'supprimees': 0}
+
+        for valeurs, groupe in df.groupby(colonnes, dropna=False, sort=True):
+            if not isinstance(valeurs, tuple):
+                valeurs = (valeurs,)
+            relatif = "/".join(StockagePartitionne._segment(c, v) for c, v in zip(colonnes, valeurs))
+            fichier = os.path.join(dossier, relatif, "part-0.parquet")
+            empreinte = StockagePartitionne._empreinte(groupe)
+
+            precedent = ancien['partitions'].get(relatif)
+            if precedent is not None and precedent['empreinte'] == empreinte and os.path.exists(fichier):
+                bilan['inchangees'] += 1
+            else:
+                os.makedirs(os.path.dirname(fichier), exist_ok=True)
+                temporaire = f"{fichier}.{os.getpid()}.tmp"
+                groupe.to_parquet(temporaire, index=False)
+                os.replace(temporaire, fichier)
+                bilan['ecrites'] += 1
+
+            nouveau['partitions'][relatif] = {'empreinte': empreinte, 'lignes': len(groupe)}
+
+        # Partitions disparues (et anciens découpages)
+        for racine, _, fichiers in os.walk(dossier, topdown=False):
+            relatif = os.path.relpath(racine, dossier).replace(os.sep, "/")
+            for nom in fichiers:
+                if nom.endswith(".parquet") and relatif not in nouveau['partitions']:
+                    os.remove(os.path.join(racine, nom))
+                    bilan['supprimees'] += 1
+            if racine != dossier and not os.listdir(racine):
+                os.rmdir(racine)
+
+        temporaire = os.path.join(dossier, f"{MANIFESTE}.{os.getpid()}.tmp")
+        with open(temporaire, "w", encoding="utf-8") as f:
+            json.dump(nouveau, f, ensure_ascii=False, indent=2)
+        os.replace(temporaire, os.path.join(dossier, MANIFESTE))
+
+        return bilan
+
+    @staticmethod
+    def _correspond(valeur, filtre):
+        """
+        Vrai si une valeur de partition (texte ou None) satisfait le filtre :
+        valeur exacte, liste de valeurs (ou), (opérateur, valeur) ou
+        {opérateur: valeur} (et, ex: {'>=': 2010, '<=': 2015})
+        """
+        if isinstance(filtre, dict):
+            return all(StockagePartitionne._correspond(valeur, (op, v)) for op, v in filtre.items())
+        if isinstance(filtre, tuple) and len(filtre) == 2 and filtre[0] in OPERATEURS:
+            operateur, attendu = filtre
+            if valeur is None:
+                return False
+            if operateur in ("==", "!="):
+                return (str(valeur) == str(attendu)) == (operateur == "==")
+            try:
+                gauche, droite = float(valeur), float(attendu)
+            except ValueError:
+                gauche, droite = str(valeur), str(attendu)
+            return OPERATEURS[operateur](gauche, droite)
+        if isinstance(filtre, (list, set, tuple)):
+            return any(StockagePartitionne._correspond(valeur, f) for f in filtre)
+        if valeur is None or filtre is None:
+            return valeur is None and filtre is None
+        try:
+            return float(valeur) == float(filtre)
+        except (TypeError, ValueError):
+            return str(valeur) == str(filtre)
+
+    @staticmethod
+    def masque(serie, filtre):
+        """Masque booléen des lignes d'une colonne satisfaisant le filtre (même syntaxe que lire)"""
+        if isinstance(filtre, dict):
+            resultat = pd.Series(True, index=serie.index)
+            for op, v in filtre.items():
+                resultat &= StockagePartitionne.masque(serie, (op, v))
+            return resultat
+        if isinstance(filtre, tuple) and len(filtre) == 2 and filtre[0] in OPERATEURS:
+            operateur, attendu = filtre
+            return OPERATEURS[operateur](serie, attendu)
+        if isinstance(filtre, (list, set, tuple)):
+            resultat = pd.Series(False, index=serie.index)
+            for f in filtre:
+                resultat |= StockagePartitionne.masque(serie, f)
+            return resultat
+        if filtre is None:
+            return serie.isna()
+        return serie == filtre
+
+    @staticmethod
+    def partitions(dossier, filtres=None):
+        """
+        Liste les partitions retenues par les filtres (élagage sur les chemins)
+
+        Return
+        ---------------
+        retenues : list de (chemin relatif, nombre de lignes)
+        total : int, nombre total de partitions
+        """
+        manifeste = StockagePartitionne._charger_manifeste(dossier)
+        filtres = filtres or {}
+        retenues = []
+
+        for relatif, infos in manifeste['partitions'].items():
+            valeurs = {}
+            for col, segment in zip(manifeste['colonnes'], relatif.split("/")):
+                brut = segment.split("=", 1)[1]
+                valeurs[col] = None if brut == VALEUR_NULLE else unquote(brut)
+            if all(StockagePartitionne._correspond(valeurs[c], f) for c, f in filtres.items() if c in valeurs):
+                retenues.append((relatif, infos['lignes']))
+
+        return retenues, len(manifeste['partitions'])
+
+    @staticmethod
+    def lire(dossier, filtres=None, colonnes=None):
+        """
+        Lit le dataset partitionné en n'ouvrant que les partitions utiles
+
+        Arguments
+        ---------------
+        dossier : str
+            Dossier racine du dataset partitionné.
+        filtres : dict
+            {colonne: valeur | [valeurs] | (opérateur, valeur) | {opérateur: valeur}} ; les filtres
+            sur les colonnes de partition élaguent les dossiers, les autres
+            sont appliqués aux lignes lues.
+        colonnes : list
+            Colonnes à lire (toutes par défaut).
+
+        Return
+        ---------------
+        df : pd.DataFrame
+            Les lignes retenues, partition par partition.
+        """
+        if not os.path.exists(os.path.join(dossier, MANIFESTE)):
+            raise FileNotFoundError(f"Dataset partitionné introuvable : {dossier}")
+
+        filtres = filtres or {}
+        retenues, _ = StockagePartitionne.partitions(dossier, filtres)
+        a_lire = None if colonnes is None else list(dict.fromkeys(list(colonnes) + list(filtres)))
+
+        morceaux = [
+            pd.read_parquet(os.path.join(dossier, relatif, "part-0.parquet"), columns=a_lire)
+            for relatif, _ in retenues
+        ]
+        if not morceaux:
+            return pd.DataFrame(columns=colonnes or [])
+
+        df = pd.concat(morceaux, ignore_index=True)
+        for col, filtre in filtres.items():
+            if col in df.columns:
+                df = df[StockagePartitionne.masque(df[col], filtre)]
+
+        df = df.reset_index(drop=True)
+        return df if colonnes is None else df[list(colonnes)]
@@ -10,7 +10,7 @@ class SaveInterimData:
     """
 
     @staticmethod
-    def save(df: pd.DataFrame, filename="cacao_interim.csv"):
+    def save(df: pd.DataFrame, filename="cacao_interim.csv", partitions=None):
         """
         Sauvegarde le DataFrame dans le dossier data/interim.
 
@@ -20,6 +20,11 @@ class SaveInterimData:
             Le DataFrame à sauvegarder.
         filename : str
             Nom du fichier CSV à créer.
+        partitions : list ou str
+            Colonnes de partition (ex: ['Date de la revue'] ou 'year,company_location') :
+            le dataset est alors écrit en Parquet partitionné style Hive dans
+            data/interim/<nom du fichier>/ au lieu du CSV, en ne réécrivant que
+            les partitions modifiées.
         """
         if df is None or df.empty:
             print("Erreur : DataFrame vide ou None")
@@ -29,6 +34,15 @@ class SaveInterimData:
         interim_dir = "data/interim"
         os.makedirs(interim_dir, exist_ok=True)
 
+        if partitions:
+            from data.load.partitionnement import StockagePartitionne
+            dossier = os.path.join(interim_dir, os.path.splitext(filename)[0])
+            bilan = StockagePartitionne.ecrire(df, dossier, partitions)
+            print(f"Dataset partitionné sauvegardé dans : {dossier} "
+                  f"({bilan['ecrites']} partition(s) écrite(s), {bilan['inchangees']} inchangée(s), "
+                  f"{bilan['supprimees']} supprimée(s))")
+            return
+
         # Chemin du fichier CSV
         interim_file = os.path.join(interim_dir, filename)
 
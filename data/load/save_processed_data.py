@@ -10,7 +10,7 @@ class SaveProcessedData:
     """
 
     @staticmethod
-    def save(df: pd.DataFrame, filename="cacao_clean.csv"):
+    def save(df: pd.DataFrame, filename="cacao_clean.csv", partitions=None):
         """
         Sauvegarde le DataFrame dans le dossier data/processed.
 
@@ -20,6 +20,11 @@ class SaveProcessedData:
             Le DataFrame à sauvegarder.
         filename : str
             Nom du fichier CSV à créer.
+        partitions : list ou str
+            Colonnes de partition (ex: ['Date de la revue'] ou 'year,company_location') :
+            le dataset est alors écrit en Parquet partitionné style Hive dans
+            data/processed/<nom du fichier>/ au lieu du CSV, en ne réécrivant que
+            les partitions modifiées.
         """
         if df is None or df.empty:
             print("Erreur : DataFrame vide ou None")
@@ -29,9 +34,30 @@ class SaveProcessedData:
         processed_dir = "data/processed"
         os.makedirs(processed_dir, exist_ok=True)
 
+        if partitions:
+            from data.load.partitionnement import StockagePartitionne
+            dossier = os.path.join(processed_dir, os.path.splitext(filename)[0])
+            bilan = StockagePartitionne.ecrire(df, dossier, partitions)
+            print(f"Dataset partitionné sauvegardé dans : {dossier} "
+                  f"({bilan['ecrites']} partition(s) écrite(s), {bilan['inchangees']} inchangée(s), "
+                  f"{bilan['supprimees']} supprimée(s))")
+            return
+
         # Chemin du fichier CSV
         processed_file = os.path.join(processed_dir, filename)
 
         # Sauvegarde du DataFrame
         df.to_csv(processed_file, index=False)
         print(f"Dataset intermédiaire sauvegardé dans : {processed_file}")
+
+        # Esquisses (distincts, quantiles, top-k) servies par le dashboard sans relire le CSV :
+        # seules les lignes ajoutées depuis la sauvegarde précédente sont calculées et fusionnées
+        from package_exploration_data.esquisses import EsquissesDataset
+        from data.load.save_sql_data import SaveSqlData
+        _, ajoutees = EsquissesDataset.mettre_a_jour(processed_file, df, SaveSqlData.cles_lignes(df))
+        if ajoutees is not None:
+            print(f"Esquisses mises à jour : {ajoutees} ligne(s) ajoutée(s)")
+
+        # Index de recherche des entreprises et origines (/api/search, /api/autocomplete)
+        from data.load.index_recherche import IndexRecherche
+        IndexRecherche.construire(df.reset_index(drop=True), processed_file)
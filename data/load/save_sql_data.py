@@ -0,0 +1,306 @@
+# etl/save_sql_data.py
+
+import os
+import time
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+
+class RequeteInterdite(ValueError):
+    """Levée quand une requête tente autre chose qu'une lecture"""
+
+
+class DelaiDepasse(TimeoutError):
+    """Levée quand une requête dépasse son délai d'exécution"""
+
+
+class SaveSqlData:
+    """
+    Classe pour charger le DataFrame final de cacao dans une base SQLite
+    embarquée (data/processed/cacao.sqlite), à côté du CSV de SaveProcessedData :
+    - table 'cacao' chargée par lots, index sur REF, Company et Broad Bean Origin
+    - mise à jour incrémentale (upsert) : le rowid de chaque ligne est
+      l'empreinte de son contenu, seules les lignes changées sont écrites
+    - statistiques précalculées par colonne, par origine et par année
+    - requêtes en lecture seule avec délai maximal et nombre de lignes borné
+    """
+
+    TABLE = "cacao"
+    INDEX = ["REF", "Company", "Broad Bean Origin"]
+
+    @staticmethod
+    def chemin(filename="cacao.sqlite"):
+        """Renvoie le chemin de la base dans data/processed"""
+        return os.path.join("data/processed", filename)
+
+    @staticmethod
+    def _type_sql(serie):
+        if pd.api.types.is_bool_dtype(serie) or pd.api.types.is_integer_dtype(serie):
+            return "INTEGER"
+        if pd.api.types.is_float_dtype(serie):
+            return "REAL"
+        return "TEXT"
+
+    @staticmethod
+    def _nom(identifiant):
+        """Identifiant SQL entre guillemets (noms avec espaces et accents)"""
+        return '"' + str(identifiant).replace('"', '""') + '"'
+
+    @staticmethod
+    def cles_lignes(df):
+        """
+        Clé de chaque ligne (rowid) : empreinte 64 bits de son contenu,
+        numérotée parmi les lignes identiques pour rester unique
+        """
+        empreintes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+        occurrences = pd.Series(empreintes).groupby(empreintes).cumcount().to_numpy()
+        cles = pd.util.hash_pandas_object(
+            pd.DataFrame({'empreinte': empreintes, 'occurrence': occurrences}), index=False
+        ).to_numpy()
+        return cles.view(np.int64)
+
+    @staticmethod
+    def _inserer(connexion, df, cles, taille_lot, remplacer=False):
+        """Insertion groupée des lignes avec leur rowid"""
+        table = SaveSqlData._nom(SaveSqlData.TABLE)
+        colonnes = ", ".join(["rowid"] + [SaveSqlData._nom(c) for c in df.columns])
+        marqueurs = ", ".join("?" * (len(df.columns) + 1))
+        instruction = "INSERT OR REPLACE" if remplacer else "INSERT"
+
+        for debut in range(0, len(df), taille_lot):
+            lot = df.iloc[debut:debut + taille_lot]
+            lot = lot.astype(object).where(lot.notna(), None)
+            lot.insert(0, "rowid", cles[debut:debut + taille_lot].tolist())
+            connexion.executemany(f"{instruction} INTO {table} ({colonnes}) VALUES ({marqueurs})",
+                                  lot.itertuples(index=False, name=None))
+
+    @staticmethod
+    def save(df: pd.DataFrame, filename="cacao.sqlite", taille_lot=10000):
+        """
+        Charge le DataFrame dans la base SQLite (reconstruite entièrement).
+
+        La base est écrite dans un fichier temporaire puis renommée : les
+        lecteurs en cours gardent l'ancienne version jusqu'à leur fin.
+
+        Arguments
+        ---------------
+        df : pd.DataFrame
+            Le DataFrame à charger.
+        filename : str
+            Nom du fichier SQLite à créer.
+        taille_lot : int
+            Nombre de lignes par insertion groupée.
+        """
+        if df is None or df.empty:
+            print("Erreur : DataFrame vide ou None")
+            return
+
+        processed_dir = "data/processed"
+        os.makedirs(processed_dir, exist_ok=True)
+        sql_file = SaveSqlData.chemin(filename)
+        temporaire = f"{sql_file}.{os.getpid()}.tmp"
+        if os.path.exists(temporaire):
+            os.remove(temporaire)
+
+        table = SaveSqlData._nom(SaveSqlData.TABLE)
+        colonnes = ", ".join(f"{SaveSqlData._nom(c)} {SaveSqlData._type_sql(df[c])}" for c in df.columns)
+
+        connexion = sqlite3.connect(temporaire)
+        try:
+            # Fichier temporaire : ni journal ni synchronisation pendant le chargement
+            connexion.execute("PRAGMA journal_mode=OFF")
+            connexion.execute("PRAGMA synchronous=OFF")
+            connexion.execute(f"CREATE TABLE {table} ({colonnes})")
+
+            with connexion:
+                SaveSqlData._inserer(connexion, df, SaveSqlData.cles_lignes(df), taille_lot)
+
+            # Index créés après le chargement (plus rapide qu'une mise à jour ligne à ligne)
+            for col in SaveSqlData.INDEX:
+                if col in df.columns:
+                    nom_index = SaveSqlData._nom(f"idx_{SaveSqlData.TABLE}_{col}")
+                    connexion.execute(f"CREATE INDEX {nom_index} ON {table} ({SaveSqlData._nom(col)})")
+
+            SaveSqlData._precalculer(connexion, df)
+            connexion.execute("ANALYZE")
+            connexion.commit()
+        finally:
+            connexion.close()
+
+        os.replace(temporaire, sql_file)
+        print(f"Base SQL sauvegardée dans : {sql_file} ({len(df)} lignes)")
+
+    @staticmethod
+    def upsert(df: pd.DataFrame, filename="cacao.sqlite", taille_lot=10000):
+        """
+        Met la base à jour pour qu'elle contienne exactement les lignes de df,
+        en n'écrivant que la différence : les lignes disparues (ou modifiées)
+        sont supprimées, les nouvelles insérées, les statistiques recalculées.
+        La base est reconstruite si elle n'existe pas ou si son schéma diffère.
+
+        Arguments
+        ---------------
+        df : pd.DataFrame
+            Le DataFrame final complet.
+        filename : str
+            Nom du fichier SQLite.
+        taille_lot : int
+            Nombre de lignes par insertion groupée.
+
+        Return
+        ---------------
+        bilan : dict
+            Nombre de lignes insérées et supprimées.
+        """
+        sql_file = SaveSqlData.chemin(filename)
+        if df is None or df.empty or not os.path.exists(sql_file):
+            SaveSqlData.save(df, filename, taille_lot)
+            return {'inserees': 0 if df is None else len(df), 'supprimees': 0, 'reconstruite': True}
+
+        table = SaveSqlData._nom(SaveSqlData.TABLE)
+        cles = SaveSqlData.cles_lignes(df)
+
+        connexion = sqlite3.connect(sql_file, timeout=30)
+        try:
+            schema = [ligne[1] for ligne in connexion.execute(f"PRAGMA table_info({table})")]
+            if schema != list(df.columns):
+                connexion.close()
+                SaveSqlData.save(df, filename, taille_lot)
+                return {'inserees': len(df), 'supprimees': 0, 'reconstruite': True}
+
+            existantes = np.fromiter((ligne[0] for ligne in connexion.execute(f"SELECT rowid FROM {table}")),
+                                     dtype=np.int64)
+            a_supprimer = np.setdiff1d(existantes, cles)
+            a_inserer = ~np.isin(cles, existantes)
+
+            with connexion:
+                connexion.executemany(f"DELETE FROM {table} WHERE rowid = ?", ((int(c),) for c in a_supprimer))
+                SaveSqlData._inserer(connexion, df[a_inserer], cles[a_inserer], taille_lot, remplacer=True)
+
+                if len(a_supprimer) or a_inserer.any():
+                    for nom_table in ("statistiques_colonnes", "agregats_origine", "agregats_annee", "agregats_entreprise"):
+                        connexion.execute(f"DROP TABLE IF EXISTS {nom_table}")
+                    SaveSqlData._precalculer(connexion, df)
+            if len(a_supprimer) or a_inserer.any():
+                connexion.execute("ANALYZE")
+        finally:
+            connexion.close()
+
+        bilan = {'inserees': int(a_inserer.sum()), 'supprimees': int(len(a_supprimer)), 'reconstruite': False}
+        print(f"Base SQL mise à jour : {sql_file} (+{bilan['inserees']} / -{bilan['supprimees']} lignes)")
+        return bilan
+
+    @staticmethod
+    def _precalculer(connexion, df):
+        """Tables de statistiques calculées au chargement (et après chaque upsert)"""
+        table = SaveSqlData._nom(SaveSqlData.TABLE)
+
+        connexion.execute("""
+            CREATE TABLE statistiques_colonnes (
+                colonne TEXT PRIMARY KEY, type TEXT, non_nuls INTEGER,
+                distincts INTEGER, minimum, maximum, moyenne REAL
+            )
+        """)
+        for col in df.columns:
+            nom, type_sql = SaveSqlData._nom(col), SaveSqlData._type_sql(df[col])
+            moyenne = f"AVG({nom})" if type_sql != "TEXT" else "NULL"
+            connexion.execute(
+                f"INSERT INTO statistiques_colonnes SELECT ?, ?, COUNT({nom}), COUNT(DISTINCT {nom}), "
+                f"MIN({nom}), MAX({nom}), {moyenne} FROM {table}",
+                (col, type_sql)
+            )
+
+        agregats = {
+            "agregats_origine": "Broad Bean Origin",
+            "agregats_annee": "Date de la revue",
+            "agregats_entreprise": "Company",
+        }
+        for nom_table, col in agregats.items():
+            if col not in df.columns:
+                continue
+            mesures = ["COUNT(*) AS nb_avis"]
+            if "Note" in df.columns:
+                mesures.append('AVG("Note") AS note_moyenne')
+            if "Pourcentage de cacao" in df.columns and SaveSqlData._type_sql(df["Pourcentage de cacao"]) != "TEXT":
+                mesures.append('AVG("Pourcentage de cacao") AS pourcentage_moyen')
+            connexion.execute(
+                f"CREATE TABLE {nom_table} AS SELECT {SaveSqlData._nom(col)} AS valeur, {', '.join(mesures)} "
+                f"FROM {table} GROUP BY {SaveSqlData._nom(col)}"
+            )
+
+    @staticmethod
+    def requeter(sql, parametres=(), filename="cacao.sqlite", limite=1000, delai_ms=2000):
+        """
+        Exécute une requête en lecture seule sur la base.
+
+        Seules les lectures sont autorisées (SELECT, WITH ... SELECT) : la base
+        est ouverte en lecture seule et toute autre opération (écriture,
+        PRAGMA, ATTACH) est refusée par l'autorisateur SQLite.
+
+        Arguments
+        ---------------
+        sql : str
+            Une seule instruction SQL.
+        parametres : tuple ou dict
+            Paramètres liés de la requête.
+        filename : str
+            Nom du fichier SQLite dans data/processed.
+        limite : int
+            Nombre maximal de lignes renvoyées.
+        delai_ms : int
+            Durée maximale d'exécution en millisecondes.
+
+        Return
+        ---------------
+        resultat : dict
+            colonnes, lignes, nb_lignes, tronque (plus de lignes que la limite), duree_ms.
+        """
+        sql_file = SaveSqlData.chemin(filename)
+        if not os.path.exists(sql_file):
+            raise FileNotFoundError(f"Base SQL introuvable : {sql_file}")
+
+        autorisees = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION,
+                      getattr(sqlite3, "SQLITE_RECURSIVE", 33)}
+        refus = []
+
+        def autoriser(action, *_):
+            if action in autorisees:
+                return sqlite3.SQLITE_OK
+            refus.append(action)
+            return sqlite3.SQLITE_DENY
+
+        debut = time.perf_counter()
+        fin = debut + delai_ms / 1000
+
+        def surveiller():
+            # Une valeur non nulle interrompt la requête en cours
+            return 1 if time.perf_counter() > fin else 0
+
+        connexion = sqlite3.connect(f"file:{sql_file}?mode=ro", uri=True)
+        try:
+            connexion.set_authorizer(autoriser)
+            connexion.set_progress_handler(surveiller, 1000)
+            try:
+                curseur = connexion.execute(sql, parametres)
+                lignes = curseur.fetchmany(limite + 1) if curseur.description else []
+            except sqlite3.DatabaseError as e:
+                if refus:
+                    raise RequeteInterdite("Seules les requêtes en lecture (SELECT) sont autorisées") from e
+                if "interrupted" in str(e):
+                    raise DelaiDepasse(f"Requête interrompue après {delai_ms} ms") from e
+                raise
+            colonnes = [d[0] for d in curseur.description or []]
+        finally:
+            connexion.close()
+
+        tronque = len(lignes) > limite
+        lignes = lignes[:limite]
+        return {
+            'colonnes': colonnes,
+            'lignes': [list(ligne) for ligne in lignes],
+            'nb_lignes': len(lignes),
+            'tronque': tronque,
+            'duree_ms': round((time.perf_counter() - debut) * 1000, 2),
+        }
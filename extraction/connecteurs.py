@@ -0,0 +1,270 @@
+"""
+Module des connecteurs de fichiers locaux
+Lecture hors ligne d'exports partenaires (CSV/TSV, JSON Lines, Excel, page
+HTML enregistrée) ramenés aux neuf colonnes du scraper, pour les passer
+dans le même pipeline que l'extraction web.
+"""
+
+import os
+import glob
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from extraction.encodage import DecodeurOctets
+
+# Les neuf colonnes produites par ScraperCacao.extract_data, dans l'ordre
+COLONNES = [
+    "Company",
+    "Origine spécifique du harirot",
+    "REF",
+    "Date de la revue",
+    "Pourcentage de cacao",
+    "Localisation de l'entreprise",
+    "Note",
+    "Type de fève",
+    "Broad Bean Origin",
+]
+
+# Autres en-têtes rencontrés (dataset Kaggle d'origine, classes HTML, noms de l'API)
+ALIAS = {
+    "Company": ["Company (Maker-if known)", "Maker", "company"],
+    "Origine spécifique du harirot": ["Specific Bean Origin or Bar Name", "Specific Bean Origin", "Origin",
+                                      "origin"],
+    "REF": ["ref", "Reference"],
+    "Date de la revue": ["Review Date", "ReviewDate", "review_date", "year"],
+    "Pourcentage de cacao": ["Cocoa Percent", "CocoaPercent", "cocoa_percent"],
+    "Localisation de l'entreprise": ["Company Location", "CompanyLocation", "company_location"],
+    "Note": ["Rating", "rating"],
+    "Type de fève": ["Bean Type", "BeanType", "bean_type"],
+    "Broad Bean Origin": ["BroadBeanOrigin", "broad_bean_origin", "bean_origin"],
+}
+
+# Types imposés à la lecture (les autres colonnes sont inférées) : le texte
+# reste du texte ('70%', '0011'), la note est un réel comme dans le scraper
+TYPES = {col: "string" for col in COLONNES if col not in ("REF", "Date de la revue", "Note")}
+TYPES["Note"] = "float64"
+
+EXTENSIONS = {
+    ".csv": "csv",
+    ".tsv": "tsv",
+    ".txt": "tsv",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl",
+    ".xlsx": "excel",
+    ".xls": "excel",
+    ".html": "html",
+    ".htm": "html",
+}
+
+# Dossier des exports déposés pour /api/pipeline/run ({"source": "files"})
+DOSSIER_IMPORTS = "data/imports"
+
+
+def _cle(nom):
+    """En-tête plié : sans accents ni ponctuation, en minuscules"""
+    nom = unicodedata.normalize("NFKD", str(nom))
+    return "".join(c for c in nom if c.isalnum()).lower()
+
+
+_CORRESPONDANCES = {_cle(alias): col for col, alias_col in ALIAS.items() for alias in [col] + alias_col}
+
+
+class ConnecteurFichiers:
+    """
+    Cette classe permet de lire des fichiers locaux au format des données
+    extraites du web (mêmes neuf colonnes, mêmes types que le CSV brut)
+    - CSV/TSV : lecteur colonnaire multithreadé de pyarrow (colonnes
+      sélectionnées et typées dès la lecture), pandas sinon
+    - JSON Lines, Excel (openpyxl) et page HTML enregistrée
+    - formats texte décodés avec l'encodage détecté (DecodeurOctets), le
+      rapport d'encodage est joint au résultat (df.attrs['encodage'])
+    - motif glob : fichiers lus en parallèle puis concaténés
+    """
+
+    @staticmethod
+    def format(chemin):
+        """Format d'un fichier d'après son extension"""
+        extension = os.path.splitext(chemin)[1].lower()
+        if extension not in EXTENSIONS:
+            raise ValueError(f"Format non pris en charge : '{extension}' (attendu : {', '.join(EXTENSIONS)})")
+        return EXTENSIONS[extension]
+
+    @staticmethod
+    def correspondances(entetes):
+        """
+        Associe les en-têtes d'un fichier aux colonnes du schéma
+
+        Arguments
+        ---------------
+            entetes : list de str, en-têtes lus dans le fichier
+
+        Return
+        ----------------
+            correspondances : dict, en-tête du fichier -> colonne du schéma
+        """
+        correspondances = {}
+        for entete in entetes:
+            colonne = _CORRESPONDANCES.get(_cle(entete))
+            if colonne is not None and colonne not in correspondances.values():
+                correspondances[entete] = colonne
+        return correspondances
+
+    @staticmethod
+    def normaliser(df, source=""):
+        """
+        Renomme les colonnes vers le schéma, écarte les autres et ajoute les
+        colonnes absentes (vides)
+
+        Return
+        ----------------
+            df : pd.DataFrame, les neuf colonnes dans l'ordre du scraper
+        """
+        correspondances = ConnecteurFichiers.correspondances(df.columns)
+        if not correspondances:
+            raise ValueError(f"Aucune colonne du schéma cacao reconnue dans {source or 'le fichier'}")
+        df = df[list(correspondances)].rename(columns=correspondances)
+
+        manquantes = [c for c in COLONNES if c not in df.columns]
+        if manquantes:
+            print(f"⚠️ Colonnes absentes de {source or 'la source'} (laissées vides) : {manquantes}")
+            for col in manquantes:
+                df[col] = pd.Series(None, index=df.index, dtype=object)
+        return df[COLONNES]
+
+    @staticmethod
+    def _entetes_csv(chemin, separateur):
+        import csv
+        with open(chemin, newline="", encoding="utf-8-sig") as f:
+            return next(csv.reader(f, delimiter=separateur), [])
+
+    @staticmethod
+    def lire_csv(chemin, separateur=","):
+        """
+        Lit un CSV/TSV : seules les colonnes du schéma sont analysées, avec
+        leurs types, par le lecteur multithreadé de pyarrow (pandas si
+        pyarrow n'est pas installé)
+
+        Arguments
+        ---------------
+            chemin : str, fichier à lire
+            separateur : str, ',' pour un CSV, '\\t' pour un TSV
+
+        Return
+        ----------------
+            df : pd.DataFrame
+        """
+        correspondances = ConnecteurFichiers.correspondances(ConnecteurFichiers._entetes_csv(chemin, separateur))
+        types = {entete: TYPES[col] for entete, col in correspondances.items() if col in TYPES}
+
+        try:
+            import pyarrow as pa
+            from pyarrow import csv as pa_csv
+        except ImportError:
+            df = pd.read_csv(chemin, sep=separateur, usecols=list(correspondances),
+                             dtype={e: (object if t == "string" else t) for e, t in types.items()})
+        else:
+            table = pa_csv.read_csv(
+                chemin,
+                read_options=pa_csv.ReadOptions(use_threads=True),
+                parse_options=pa_csv.ParseOptions(delimiter=separateur),
+                convert_options=pa_csv.ConvertOptions(
+                    include_columns=list(correspondances),
+                    column_types={e: pa.string() if t == "string" else pa.float64() for e, t in types.items()},
+                    strings_can_be_null=True,
+                ),
+            )
+            df = table.to_pandas()
+        return ConnecteurFichiers.normaliser(df, chemin)
+
+    @staticmethod
+    def lire_jsonl(chemin):
+        """Lit un fichier JSON Lines (un avis par ligne)"""
+        df = pd.read_json(chemin, lines=True, dtype=False)
+        return ConnecteurFichiers.normaliser(df, chemin)
+
+    @staticmethod
+    def lire_excel(chemin, feuille=0):
+        """Lit une feuille Excel (openpyxl nécessaire)"""
+        try:
+            import openpyxl  # noqa: F401
+        except ImportError:
+            raise ValueError("La lecture des fichiers Excel nécessite openpyxl (pip install openpyxl)")
+        df = ConnecteurFichiers.normaliser(pd.read_excel(chemin, sheet_name=feuille), chemin)
+        df["Note"] = pd.to_numeric(df["Note"], errors="coerce")
+        return df
+
+    @staticmethod
+    def lire_html(chemin):
+        """Lit une page cacao déjà enregistrée (même analyse que le scraper)"""
+        try:
+            import bs4  # noqa: F401
+        except ImportError:
+            raise ValueError("La lecture des pages HTML nécessite beautifulsoup4 (pip install beautifulsoup4)")
+        from extraction.scraper import ScraperCacao
+        with open(chemin, encoding="utf-8") as f:
+            df = ScraperCacao.analyser_html(f.read())
+        return ConnecteurFichiers.normaliser(df, chemin)
+
+    @staticmethod
+    def lire(chemin):
+        """
+        Lit un fichier local selon son extension
+
+        Arguments
+        ---------------
+            chemin : str, fichier .csv, .tsv, .jsonl, .xlsx ou .html
+
+        Return
+        ----------------
+            df : pd.DataFrame, les neuf colonnes du schéma
+        """
+        if not os.path.isfile(chemin):
+            raise ValueError(f"Fichier introuvable : {chemin}")
+        format_fichier = ConnecteurFichiers.format(chemin)
+        if format_fichier == "excel":
+            return ConnecteurFichiers.lire_excel(chemin)
+
+        # Formats texte : octets décodés avec l'encodage détecté, régions réparées
+        with DecodeurOctets.preparer(chemin) as (lisible, rapport):
+            if format_fichier in ("csv", "tsv"):
+                df = ConnecteurFichiers.lire_csv(lisible, "," if format_fichier == "csv" else "\t")
+            elif format_fichier == "jsonl":
+                df = ConnecteurFichiers.lire_jsonl(lisible)
+            else:
+                df = ConnecteurFichiers.lire_html(lisible)
+        df.attrs['encodage'] = rapport
+        return df
+
+    @staticmethod
+    def lire_motif(motif, n_jobs=None):
+        """
+        Lit tous les fichiers correspondant à un motif glob en parallèle
+        (threads : pyarrow et les lecteurs C libèrent le GIL) et les
+        concatène dans l'ordre des noms de fichier
+
+        Arguments
+        ---------------
+            motif : str, chemin ou motif glob (ex: 'data/imports/*.csv')
+            n_jobs : int, nombre de lectures simultanées (par défaut : nombre de CPU)
+
+        Return
+        ----------------
+            df : pd.DataFrame
+        """
+        fichiers = sorted(f for f in glob.glob(motif, recursive=True) if os.path.isfile(f))
+        if not fichiers:
+            raise ValueError(f"Aucun fichier ne correspond à '{motif}'")
+        if len(fichiers) == 1:
+            return ConnecteurFichiers.lire(fichiers[0])
+
+        n_jobs = min(n_jobs or os.cpu_count() or 1, len(fichiers))
+        with ThreadPoolExecutor(max_workers=n_jobs) as executeur:
+            morceaux = list(executeur.map(ConnecteurFichiers.lire, fichiers))
+        print(f"✅ {len(fichiers)} fichier(s) lu(s) : {sum(len(m) for m in morceaux)} lignes")
+        df = pd.concat(morceaux, ignore_index=True)
+        rapports = [m.attrs.get('encodage') for m in morceaux]
+        if all(r is not None for r in rapports):
+            df.attrs['encodage'] = DecodeurOctets.fusionner(rapports)
+        return df
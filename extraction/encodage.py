@@ -0,0 +1,343 @@
+"""
+Module de détection d'encodage à l'ingestion
+Détecte l'encodage sur un échantillon d'octets (BOM, UTF-8 strict, UTF-8
+encodé deux fois, chardet sinon), vérifié sur tout le fichier, puis décode
+les fichiers par blocs avec le bon codec en réparant l'UTF-8 doublement
+encodé ('CafÃ©' -> 'Café') si l'échantillon en contient.
+Le rapport indique les régions (ligne, colonne) réparées ou non
+réparables ; s'il est propre, l'étape DetecteurProblemesEncodage est
+inutile et le pipeline la saute.
+"""
+
+import os
+import re
+import io
+import json
+import codecs
+import tempfile
+import contextlib
+
+# BOM reconnus (UTF-32 avant UTF-16 : FF FE 00 00 commence par FF FE)
+BOMS = [
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+TAILLE_ECHANTILLON = 64 * 1024
+TAILLE_BLOC = 1024 * 1024
+MAX_REGIONS = 100
+
+# Rapport de la dernière extraction
+RAPPORT_PATH = "data/raw/cacao_encodage.json"
+
+# Octets de continuation UTF-8 (0x80-0xBF) relus en cp1252 ou en latin-1
+_SUITE = "[\x80-\xbf€‚ƒ„…†‡ˆ‰Š‹ŒŽ‘’“”•–—˜™š›œžŸ]"
+# UTF-8 relu octet par octet : octet de tête (Â..ô) suivi de ses octets de continuation
+DOUBLE_ENCODAGE = re.compile(f"(?:[\xc2-\xdf]{_SUITE}|[\xe0-\xef]{_SUITE}{{2}}|[\xf0-\xf4]{_SUITE}{{3}})+")
+# Filtre rapide (un seul couple tête / continuation) avant l'expression complète, bien plus lente
+_INDICE = re.compile(f"[\xc2-\xf4]{_SUITE}")
+# Une séquence réparée doit redonner des lettres accentuées latines ou de la
+# ponctuation typographique ('É\xa0' -> 'ɠ' est du texte légitime, pas une réparation)
+_PLAUSIBLE = re.compile("[\u00a0-\u017f\u2013\u2014\u2018-\u201e\u2020-\u2022\u2026\u2030\u20ac\u2122]+")
+
+
+def _reparation(texte):
+    """
+    Texte d'origine d'une séquence UTF-8 relue en cp1252 ou latin-1
+
+    Return
+    ----------------
+        repare : str, ou "" si la séquence redonne de l'UTF-8 implausible
+                 (texte légitime), ou None si elle n'est pas réparable
+    """
+    for encodage in ("cp1252", "latin-1"):
+        try:
+            repare = texte.encode(encodage).decode("utf-8")
+        except (UnicodeEncodeError, UnicodeDecodeError):
+            continue
+        return repare if _PLAUSIBLE.fullmatch(repare) else ""
+    return None
+
+
+def _double_encodage(texte):
+    """Vrai si le texte contient au moins une séquence UTF-8 doublement encodée plausible"""
+    return bool(_INDICE.search(texte)) and any(
+        _reparation(correspondance.group(0)) for correspondance in DOUBLE_ENCODAGE.finditer(texte)
+    )
+
+
+class DecodeurOctets:
+    """
+    Cette classe permet de décoder les octets d'une source avec le bon
+    encodage avant toute analyse par pandas ou BeautifulSoup
+    - detecter : encodage d'un échantillon d'octets
+    - decoder_flux : décodage par blocs de lignes avec réparation
+    - preparer : fichier UTF-8 lisible par les connecteurs, et son rapport
+    """
+
+    @staticmethod
+    def detecter(echantillon):
+        """
+        Détecte l'encodage d'un échantillon d'octets
+
+        Arguments
+        ---------------
+            echantillon : bytes, début de la source
+
+        Return
+        ----------------
+            detection : dict, encodage, bom (bool) et double_encodage (bool,
+                        UTF-8 valide contenant de l'UTF-8 relu en cp1252)
+        """
+        for bom, encodage in BOMS:
+            if echantillon.startswith(bom):
+                return {'encodage': encodage, 'bom': True, 'double_encodage': False}
+
+        try:
+            # final=False : un caractère coupé en fin d'échantillon n'est pas une erreur
+            texte = codecs.getincrementaldecoder("utf-8")().decode(echantillon, final=False)
+        except UnicodeDecodeError:
+            pass
+        else:
+            return {'encodage': "utf-8", 'bom': False, 'double_encodage': _double_encodage(texte)}
+
+        encodage = "cp1252"
+        try:
+            import chardet
+            detection = chardet.detect(echantillon)
+            if detection.get('encoding') and detection.get('confidence', 0) >= 0.5:
+                encodage = codecs.lookup(detection['encoding']).name
+        except (ImportError, LookupError):
+            pass
+        # latin-1 ne décode pas les guillemets et tirets de Windows (0x80-0x9F)
+        if encodage in ("iso8859-1", "latin-1", "ascii"):
+            encodage = "cp1252"
+        return {'encodage': encodage, 'bom': False, 'double_encodage': False}
+
+    @staticmethod
+    def _reparer(bloc, ligne, rapport):
+        """
+        Note les caractères de remplacement d'un bloc de lignes et répare
+        l'UTF-8 doublement encodé si la détection en a trouvé
+        """
+        def position(indice):
+            # Calculée seulement pour les régions conservées dans le rapport
+            return ligne + bloc.count("\n", 0, indice), indice - bloc.rfind("\n", 0, indice)
+
+        def noter(type_region, indice, avant, apres=None):
+            cle = 'regions_reparees' if apres is not None else 'regions_non_reparees'
+            rapport[cle] += 1
+            if len(rapport['regions']) < MAX_REGIONS:
+                numero, colonne = position(indice)
+                region = {'ligne': numero, 'colonne': colonne, 'type': type_region, 'avant': avant}
+                if apres is not None:
+                    region['apres'] = apres
+                rapport['regions'].append(region)
+
+        def remplacer(correspondance):
+            texte = correspondance.group(0)
+            repare = _reparation(texte)
+            if repare:
+                noter('double_encodage', correspondance.start(), texte, repare)
+                return repare
+            if repare is None:
+                noter('double_encodage', correspondance.start(), texte)
+            return texte
+
+        if rapport['double_encodage'] and _INDICE.search(bloc):
+            bloc = DOUBLE_ENCODAGE.sub(remplacer, bloc)
+        indice = bloc.find("\uFFFD")
+        while indice != -1:
+            noter('remplacement', indice, "\uFFFD")
+            indice = bloc.find("\uFFFD", indice + 1)
+        return bloc
+
+    @staticmethod
+    def decoder_flux(flux, encodage, rapport, taille_bloc=TAILLE_BLOC, erreurs="replace"):
+        """
+        Décode un flux binaire par blocs de lignes complètes et répare
+        chaque bloc (une région n'est jamais coupée entre deux blocs)
+
+        Arguments
+        ---------------
+            flux : fichier binaire ouvert
+            encodage : str, codec détecté
+            rapport : dict, complété au fil du décodage (voir nouveau_rapport)
+            taille_bloc : int, octets lus à chaque itération
+            erreurs : str, "replace" (U+FFFD) ou "strict" (UnicodeDecodeError)
+
+        Return
+        ----------------
+            generateur de str, le texte décodé et réparé
+        """
+        decodeur = codecs.getincrementaldecoder(encodage)(errors=erreurs)
+        reste, ligne, fin_de_ligne = "", 1, True
+        while True:
+            octets = flux.read(taille_bloc)
+            rapport['octets'] += len(octets)
+            texte = reste + decodeur.decode(octets, final=not octets)
+            if octets:
+                coupure = texte.rfind("\n") + 1
+                texte, reste = texte[:coupure], texte[coupure:]
+            if texte:
+                # Chemin rapide : un bloc ASCII n'a rien à réparer
+                if not texte.isascii():
+                    texte = DecodeurOctets._reparer(texte, ligne, rapport)
+                ligne += texte.count("\n")
+                fin_de_ligne = texte.endswith("\n")
+                yield texte
+            if not octets:
+                break
+        rapport['lignes'] = ligne - 1 if fin_de_ligne else ligne
+
+    @staticmethod
+    def nouveau_rapport(source, detection):
+        """Rapport vide d'une source, complété par decoder_flux"""
+        return {
+            'source': source,
+            **detection,
+            'octets': 0,
+            'lignes': 0,
+            'regions_reparees': 0,
+            'regions_non_reparees': 0,
+            'regions': [],
+        }
+
+    @staticmethod
+    def terminer(rapport):
+        """Conclut le rapport : propre s'il ne reste rien à réparer cellule par cellule"""
+        rapport['propre'] = rapport['regions_non_reparees'] == 0
+        if rapport['regions_reparees'] or rapport['regions_non_reparees']:
+            print(f"🔤 {rapport['source']} ({rapport['encodage']}) : {rapport['regions_reparees']} région(s) "
+                  f"réparée(s), {rapport['regions_non_reparees']} non réparable(s)")
+        return rapport
+
+    @staticmethod
+    def _decoder(flux, source, morceaux=None):
+        """
+        Détecte l'encodage sur l'échantillon puis décode tout le flux. Un
+        échantillon UTF-8 est vérifié jusqu'au bout : si la suite ne l'est
+        pas (export cp1252 dont le début est ASCII), l'encodage est
+        redétecté sur le bloc invalide et le flux décodé à nouveau
+
+        Arguments
+        ---------------
+            flux : fichier binaire ouvert (seek possible)
+            source : str, nom de la source dans le rapport
+            morceaux : list, reçoit le texte décodé (None : parcours seul)
+
+        Return
+        ----------------
+            rapport : dict, terminé
+        """
+        rapport = DecodeurOctets.nouveau_rapport(source, DecodeurOctets.detecter(flux.read(TAILLE_ECHANTILLON)))
+        flux.seek(0)
+        erreurs = "strict" if rapport['encodage'] == "utf-8" else "replace"
+        try:
+            for texte in DecodeurOctets.decoder_flux(flux, rapport['encodage'], rapport, erreurs=erreurs):
+                if morceaux is not None:
+                    morceaux.append(texte)
+        except UnicodeDecodeError:
+            # Le bloc invalide est le dernier lu
+            flux.seek(max(rapport['octets'] - TAILLE_BLOC, 0))
+            detection = DecodeurOctets.detecter(flux.read(TAILLE_BLOC))
+            if detection['encodage'] == "utf-8":
+                detection['encodage'] = "cp1252"
+            print(f"🔤 {source} : UTF-8 invalide après l'échantillon, relu en {detection['encodage']}")
+            rapport = DecodeurOctets.nouveau_rapport(source, detection)
+            flux.seek(0)
+            if morceaux is not None:
+                morceaux.clear()
+            for texte in DecodeurOctets.decoder_flux(flux, rapport['encodage'], rapport):
+                if morceaux is not None:
+                    morceaux.append(texte)
+        return DecodeurOctets.terminer(rapport)
+
+    @staticmethod
+    def decoder_octets(contenu, source="web"):
+        """
+        Décode un contenu déjà en mémoire (page web)
+
+        Return
+        ----------------
+            texte : str, le contenu décodé et réparé
+            rapport : dict
+        """
+        morceaux = []
+        rapport = DecodeurOctets._decoder(io.BytesIO(contenu), source, morceaux)
+        return "".join(morceaux), rapport
+
+    @staticmethod
+    def analyser(chemin):
+        """
+        Détecte l'encodage d'un fichier puis le parcourt par blocs sans le
+        réécrire
+
+        Return
+        ----------------
+            rapport : dict, encodage, régions réparées / non réparables
+                      (les 100 premières) et propre (bool)
+        """
+        with open(chemin, "rb") as f:
+            return DecodeurOctets._decoder(f, chemin)
+
+    @staticmethod
+    @contextlib.contextmanager
+    def preparer(chemin):
+        """
+        Gestionnaire de contexte : renvoie un fichier UTF-8 sans BOM lisible
+        tel quel par les lecteurs (le fichier d'origine s'il est de l'UTF-8
+        valide sur toute sa longueur sans rien à réparer, sinon une copie
+        temporaire décodée et réparée par blocs) et son rapport
+
+        Exemple
+        ---------------
+            with DecodeurOctets.preparer(chemin) as (lisible, rapport):
+                df = pd.read_csv(lisible)
+        """
+        rapport = DecodeurOctets.analyser(chemin)
+        # encodage "utf-8" : vérifié strictement sur tout le fichier par analyser
+        if (rapport['encodage'] == "utf-8" and not rapport['bom']
+                and not rapport['regions_reparees'] and not rapport['regions_non_reparees']):
+            yield chemin, rapport
+            return
+
+        descripteur, copie = tempfile.mkstemp(suffix=os.path.splitext(chemin)[1])
+        try:
+            copie_rapport = DecodeurOctets.nouveau_rapport(chemin, {k: rapport[k] for k in ('encodage', 'bom',
+                                                                                          'double_encodage')})
+            with open(chemin, "rb") as source, os.fdopen(descripteur, "w", encoding="utf-8", newline="") as sortie:
+                for texte in DecodeurOctets.decoder_flux(source, rapport['encodage'], copie_rapport):
+                    sortie.write(texte)
+            yield copie, rapport
+        finally:
+            os.remove(copie)
+
+    @staticmethod
+    def sauvegarder(rapport, chemin=RAPPORT_PATH):
+        """Enregistre le rapport d'encodage de la dernière extraction"""
+        os.makedirs(os.path.dirname(chemin), exist_ok=True)
+        with open(chemin, "w", encoding="utf-8") as f:
+            json.dump(rapport, f, ensure_ascii=False, indent=2)
+
+    @staticmethod
+    def charger_rapport(chemin=RAPPORT_PATH):
+        """Rapport d'encodage de la dernière extraction (None s'il n'existe pas)"""
+        if not os.path.exists(chemin):
+            return None
+        with open(chemin, encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def fusionner(rapports):
+        """Rapport global de plusieurs fichiers (propre si tous le sont)"""
+        return {
+            'source': "fichiers",
+            'propre': all(r['propre'] for r in rapports),
+            'regions_reparees': sum(r['regions_reparees'] for r in rapports),
+            'regions_non_reparees': sum(r['regions_non_reparees'] for r in rapports),
+            'fichiers': rapports,
+        }
@@ -2,6 +2,8 @@
 
 import pandas as pd
 
+from transformation.schema import SchemaColonnes
+
 class DecisionImputation:
     """
     Classe pour analyser plusieurs colonnes catégorielles et proposer une stratégie d'imputation,
@@ -16,13 +18,14 @@ class DecisionImputation:
         Arguments
         ---------------
         df : pd.DataFrame
-        colonnes : list, colonnes à analyser (par défaut toutes les catégorielles)
+        colonnes : list, colonnes à analyser (par défaut les colonnes texte du schéma et les catégorielles)
         seuil_mode : float, proportion max de missing pour utiliser le mode
         seuil_max : float, proportion au-dessus de laquelle on choisit 'Unknown'
         """
 
         if colonnes is None:
-            colonnes = df.select_dtypes(include=["object", "category"]).columns.tolist()
+            texte = SchemaColonnes.colonnes(df)
+            colonnes = [c for c in df.columns if c in texte or isinstance(df[c].dtype, pd.CategoricalDtype)]
 
         print("\n===== Rapport d'Analyse d'Imputation =====")
 
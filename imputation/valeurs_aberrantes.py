@@ -0,0 +1,482 @@
+# imputation/valeurs_aberrantes.py
+
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+from transformation.schema import NUMERIQUE, SchemaColonnes
+
+# Colonnes contrôlées et groupes de comparaison (None : tout le dataset)
+COLONNES = ["Note", "Pourcentage de cacao"]
+GROUPES = {
+    "global": None,
+    "company": "Company",
+    "year": "Date de la revue",
+}
+
+# Seuil de chaque méthode : k x IQR, |z| et |z modifié| (MAD)
+METHODES = {
+    "iqr": 1.5,
+    "zscore": 3.0,
+    "mad": 3.5,
+}
+# Facteur de cohérence du MAD avec l'écart-type d'une loi normale
+FACTEUR_MAD = 1.4826
+# En dessous, les statistiques d'un groupe sont trop instables pour signaler
+EFFECTIF_MIN = 8
+# Taille maximale (groupes x valeurs distinctes) du calcul par histogramme
+TAILLE_HISTOGRAMME = 2_000_000
+
+TABLE_PATH = "data/processed/cacao_aberrants.csv"
+RESUME_PATH = "data/processed/cacao_aberrants.json"
+
+
+def _quantiles(valeurs, codes, nb_groupes, quantiles):
+    """
+    Quantiles (interpolation linéaire, comme pandas) de chaque groupe en un
+    seul tri (groupe, valeur)
+
+    Return
+    ---------------
+    resultats : list de np.ndarray (un tableau de nb_groupes par quantile)
+    effectifs : np.ndarray
+    """
+    ordre = np.lexsort((valeurs, codes))
+    tries = valeurs[ordre]
+    effectifs = np.bincount(codes, minlength=nb_groupes)
+    debuts = np.r_[0, np.cumsum(effectifs)[:-1]]
+    presents = effectifs > 0
+
+    resultats = []
+    for q in quantiles:
+        position = debuts + q * np.maximum(effectifs - 1, 0)
+        bas = np.minimum(np.floor(position).astype(np.int64), max(len(tries) - 1, 0))
+        haut = np.minimum(bas + 1, debuts + effectifs - 1).clip(min=0)
+        if len(tries):
+            resultat = tries[bas] + (position - bas) * (tries[haut] - tries[bas])
+        else:
+            resultat = np.zeros(nb_groupes)
+        resultats.append(np.where(presents, resultat, np.nan))
+    return resultats, effectifs
+
+
+def _quantiles_histogramme(valeurs, comptes, quantiles):
+    """
+    Mêmes quantiles à partir d'un histogramme groupes x valeurs distinctes
+    triées (comptes[g, j] : nombre de valeurs[g, j] dans le groupe g), sans
+    tri des lignes : rang cherché par comparaison aux effectifs cumulés
+    """
+    valeurs = np.broadcast_to(valeurs, comptes.shape)
+    cumul = np.cumsum(comptes, axis=1)
+    effectifs = cumul[:, -1] if comptes.shape[1] else np.zeros(len(comptes), dtype=np.int64)
+    presents = effectifs > 0
+
+    def au_rang(rang):
+        # Case contenant la valeur de rang donné (0 = plus petite du groupe)
+        case = np.minimum((cumul <= rang[:, None]).sum(axis=1), max(comptes.shape[1] - 1, 0))
+        return np.take_along_axis(valeurs, case[:, None], axis=1)[:, 0]
+
+    resultats = []
+    for q in quantiles:
+        position = q * np.maximum(effectifs - 1, 0)
+        bas = np.floor(position).astype(np.int64)
+        haut = np.minimum(bas + 1, np.maximum(effectifs - 1, 0))
+        if comptes.shape[1]:
+            v_bas, v_haut = au_rang(bas), au_rang(haut)
+            resultat = v_bas + (position - bas) * (v_haut - v_bas)
+        else:
+            resultat = np.zeros(len(comptes))
+        resultats.append(np.where(presents, resultat, np.nan))
+    return resultats, effectifs
+
+
+def _resume_histogramme(distincts, comptes):
+    """
+    Quartiles, médiane et MAD de chaque groupe à partir de son histogramme
+    (comptes[g, j] : nombre de distincts[j], triés, dans le groupe g)
+
+    Return
+    ---------------
+    q1, mediane, q3, mad, effectifs : np.ndarray
+    """
+    (q1, mediane, q3), effectifs = _quantiles_histogramme(distincts, comptes, (0.25, 0.5, 0.75))
+    ecarts = np.abs(distincts[None, :] - mediane[:, None])
+    ordre = np.argsort(ecarts, axis=1, kind="stable")
+    (mad,), _ = _quantiles_histogramme(np.take_along_axis(ecarts, ordre, axis=1),
+                                       np.take_along_axis(comptes, ordre, axis=1), (0.5,))
+    return q1, mediane, q3, mad, effectifs
+
+
+class DetecteurAberrants:
+    """
+    Classe pour repérer les valeurs aberrantes de la note et du pourcentage
+    de cacao, sur tout le dataset et au sein de groupes (entreprise, année).
+
+    Les statistiques de tous les groupes sont calculées ensemble (un tri
+    par colonne et par groupement, sommes par bincount) puis chaque méthode
+    devient deux bornes par groupe, comparées aux valeurs par un masque
+    vectorisé. Les signalements forment une table annexe (une ligne par
+    valeur, groupement et méthode) : le dataset n'est pas modifié.
+    """
+
+    @staticmethod
+    def _numeriques(serie):
+        return pd.to_numeric(serie, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+    @staticmethod
+    def statistiques(df: pd.DataFrame, colonne: str, groupe=None):
+        """
+        Statistiques d'une colonne numérique par groupe
+
+        Arguments
+        ---------------
+        df : pd.DataFrame
+        colonne : str
+            Colonne numérique analysée.
+        groupe : str
+            Colonne de regroupement (None : tout le dataset, clé 'global').
+
+        Return
+        ---------------
+        stats : pd.DataFrame
+            Indexé par la clé de groupe : n, moyenne, ecart_type, q1,
+            mediane, q3, mad.
+        """
+        codes, cles = DetecteurAberrants._codes(df, groupe)
+        return DetecteurAberrants._statistiques(DetecteurAberrants._numeriques(df[colonne]), codes, cles)
+
+    @staticmethod
+    def _codes(df, groupe):
+        """Numéro de groupe de chaque ligne (-1 : clé manquante) et clés des groupes"""
+        if groupe is None:
+            return np.zeros(len(df), dtype=np.int64), pd.Index(["global"])
+        codes, cles = pd.factorize(df[groupe])
+        return codes, pd.Index(cles)
+
+    @staticmethod
+    def _statistiques(valeurs, codes, cles):
+        garder = (codes >= 0) & ~np.isnan(valeurs)
+        valeurs, codes = valeurs[garder], codes[garder]
+        nb = len(cles)
+
+        distincts, rangs = np.unique(valeurs, return_inverse=True)
+        if nb * len(distincts) <= TAILLE_HISTOGRAMME:
+            # Peu de valeurs distinctes (notes, pourcentages) : histogramme par groupe, sans tri des lignes
+            comptes = np.bincount(codes * len(distincts) + rangs.ravel(),
+                                  minlength=nb * len(distincts)).reshape(nb, len(distincts))
+            q1, mediane, q3, mad, effectifs = _resume_histogramme(distincts, comptes)
+        else:
+            (q1, mediane, q3), effectifs = _quantiles(valeurs, codes, nb, (0.25, 0.5, 0.75))
+            (mad,), _ = _quantiles(np.abs(valeurs - mediane[codes]), codes, nb, (0.5,))
+
+        somme = np.bincount(codes, weights=valeurs, minlength=nb)
+        carres = np.bincount(codes, weights=valeurs ** 2, minlength=nb)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            moyenne = somme / effectifs
+            variance = (carres - effectifs * moyenne ** 2) / (effectifs - 1)
+
+        return pd.DataFrame({
+            'n': effectifs,
+            'moyenne': moyenne,
+            'ecart_type': np.sqrt(np.clip(variance, 0, None)),
+            'q1': q1,
+            'mediane': mediane,
+            'q3': q3,
+            'mad': mad,
+        }, index=cles)
+
+    @staticmethod
+    def bornes(stats: pd.DataFrame, methode: str, seuil=None):
+        """
+        Bornes basse et haute de chaque groupe pour une méthode ; un groupe
+        trop petit ou sans dispersion (IQR, écart-type ou MAD nul) n'a pas
+        de borne
+
+        Return
+        ---------------
+        bas, haut : np.ndarray
+        """
+        if methode not in METHODES:
+            raise ValueError(f"Méthode '{methode}' inconnue (attendu : {', '.join(METHODES)})")
+        seuil = METHODES[methode] if seuil is None else seuil
+
+        if methode == "iqr":
+            echelle = stats['q3'].to_numpy() - stats['q1'].to_numpy()
+            bas, haut = stats['q1'].to_numpy() - seuil * echelle, stats['q3'].to_numpy() + seuil * echelle
+        elif methode == "zscore":
+            echelle = stats['ecart_type'].to_numpy()
+            bas, haut = stats['moyenne'].to_numpy() - seuil * echelle, stats['moyenne'].to_numpy() + seuil * echelle
+        else:
+            echelle = FACTEUR_MAD * stats['mad'].to_numpy()
+            bas, haut = stats['mediane'].to_numpy() - seuil * echelle, stats['mediane'].to_numpy() + seuil * echelle
+
+        inactif = (stats['n'].to_numpy() < EFFECTIF_MIN) | ~(echelle > 0)
+        return np.where(inactif, -np.inf, bas), np.where(inactif, np.inf, haut)
+
+    @staticmethod
+    def _signaler(valeurs, position, stats, colonne, nom_groupe, methodes, lignes):
+        """Table des valeurs hors bornes d'une colonne pour un groupement (position : ligne de stats, -1 sinon)"""
+        connues = (position >= 0) & ~np.isnan(valeurs)
+        if not connues.any():
+            # Aucun groupe connu (ex: colonne de groupement entièrement vide)
+            return []
+        libelles = stats.index.astype(str).to_numpy()
+
+        morceaux = []
+        for methode in methodes:
+            bas, haut = DetecteurAberrants.bornes(stats, methode)
+            bas = np.where(connues, bas[position], -np.inf)
+            haut = np.where(connues, haut[position], np.inf)
+            masque = (valeurs < bas) | (valeurs > haut)
+            if not masque.any():
+                continue
+            morceaux.append(pd.DataFrame({
+                'ligne': lignes[masque],
+                'colonne': colonne,
+                'groupe': nom_groupe,
+                'cle_groupe': libelles[position[masque]],
+                'methode': methode,
+                'valeur': valeurs[masque],
+                'borne_basse': bas[masque],
+                'borne_haute': haut[masque],
+            }))
+        return morceaux
+
+    @staticmethod
+    def _table(morceaux):
+        if not morceaux:
+            return pd.DataFrame(columns=['ligne', 'colonne', 'groupe', 'cle_groupe', 'methode', 'valeur',
+                                         'borne_basse', 'borne_haute'])
+        return pd.concat(morceaux, ignore_index=True)
+
+    @staticmethod
+    def detecter(df: pd.DataFrame, colonnes=None, groupes=None, methodes=None):
+        """
+        Repère les valeurs aberrantes de chaque colonne, pour chaque
+        groupement et chaque méthode.
+
+        Arguments
+        ---------------
+        df : pd.DataFrame
+        colonnes : list
+            Colonnes contrôlées (par défaut COLONNES) ; seules celles de genre
+            numérique (SchemaColonnes) sont analysées.
+        groupes : dict
+            Nom du groupement -> colonne de regroupement ou None (par défaut GROUPES).
+        methodes : list
+            Parmi 'iqr', 'zscore', 'mad' (par défaut toutes).
+
+        Return
+        ---------------
+        table : pd.DataFrame
+            Une ligne par signalement : ligne (position dans df), colonne,
+            groupe, cle_groupe, methode, valeur, borne_basse, borne_haute.
+        """
+        numeriques = SchemaColonnes.colonnes(df, NUMERIQUE)
+        colonnes = [c for c in (colonnes or COLONNES) if c in numeriques]
+        groupes = GROUPES if groupes is None else groupes
+        methodes = list(methodes or METHODES)
+        lignes = np.arange(len(df))
+
+        # Un seul factorize par groupement, partagé par les colonnes
+        regroupements = {nom: DetecteurAberrants._codes(df, groupe) for nom, groupe in groupes.items()
+                         if groupe is None or groupe in df.columns}
+
+        morceaux = []
+        for colonne in colonnes:
+            valeurs = DetecteurAberrants._numeriques(df[colonne])
+            for nom_groupe, (codes, cles) in regroupements.items():
+                stats = DetecteurAberrants._statistiques(valeurs, codes, cles)
+                morceaux += DetecteurAberrants._signaler(valeurs, codes, stats, colonne, nom_groupe, methodes, lignes)
+        return DetecteurAberrants._table(morceaux)
+
+    @staticmethod
+    def detecter_fichier(chemin, chunksize=100_000, colonnes=None, groupes=None, methodes=None, compression=200):
+        """
+        Version en flux de detecter pour un CSV plus grand que la mémoire :
+        une première lecture par morceaux cumule, par groupe, les moments
+        (effectif, somme, somme des carrés) et l'histogramme (clé, valeur) ->
+        effectif, qui s'additionnent d'un morceau à l'autre ; la seconde
+        compare chaque morceau aux bornes obtenues. Les quartiles et le MAD
+        sont exacts, comme avec detecter. Seul un groupement dont
+        l'histogramme dépasse TAILLE_HISTOGRAMME paires (colonne à forte
+        cardinalité) passe à des t-digests par groupe : quantiles approchés,
+        MAD estimé sur les centroïdes pondérés.
+
+        Return
+        ---------------
+        table : pd.DataFrame (même format que detecter)
+        """
+        from package_exploration_data.esquisses import TDigest
+
+        colonnes = colonnes or COLONNES
+        groupes = GROUPES if groupes is None else groupes
+        methodes = list(methodes or METHODES)
+        lecture = [c for c in set(colonnes) | {g for g in groupes.values() if g is not None}]
+
+        def ajouter_digests(esquisses, paires):
+            for cle, sous_groupe in paires.groupby('cle')['valeur']:
+                esquisses[cle] = (esquisses.get(cle) or TDigest(compression)).ajouter(sous_groupe.to_numpy())
+
+        # 1. Moments et histogrammes (ou t-digests) par (colonne, groupement)
+        moments, histogrammes, digests = {}, {}, {}
+        for morceau in pd.read_csv(chemin, usecols=lambda c: c in lecture, chunksize=chunksize):
+            for colonne in colonnes:
+                valeurs = DetecteurAberrants._numeriques(morceau[colonne])
+                for nom_groupe, groupe in groupes.items():
+                    cle_stats = (colonne, nom_groupe)
+                    paires = pd.DataFrame({
+                        'cle': "global" if groupe is None else morceau[groupe].to_numpy(),
+                        'valeur': valeurs,
+                    }).dropna()
+
+                    agregats = (paires.assign(carre=paires['valeur'] ** 2).groupby('cle')
+                                .agg(n=('valeur', 'size'), somme=('valeur', 'sum'), carres=('carre', 'sum')))
+                    courant = moments.get(cle_stats)
+                    moments[cle_stats] = agregats if courant is None else courant.add(agregats, fill_value=0)
+
+                    if cle_stats in digests:
+                        ajouter_digests(digests[cle_stats], paires)
+                        continue
+                    histogramme = paires.value_counts()
+                    if cle_stats in histogrammes:
+                        histogramme = histogrammes[cle_stats].add(histogramme, fill_value=0)
+                    if len(histogramme) <= TAILLE_HISTOGRAMME:
+                        histogrammes[cle_stats] = histogramme
+                        continue
+                    # Trop de paires (clé, valeur) distinctes : t-digests par groupe
+                    histogrammes.pop(cle_stats, None)
+                    digests[cle_stats] = {}
+                    ajouter_digests(digests[cle_stats], pd.DataFrame({
+                        'cle': np.repeat(histogramme.index.get_level_values('cle'), histogramme.to_numpy(dtype=np.int64)),
+                        'valeur': np.repeat(histogramme.index.get_level_values('valeur'), histogramme.to_numpy(dtype=np.int64)),
+                    }))
+
+        # 2. Statistiques de chaque groupe
+        statistiques = {}
+        for cle_stats, agregats in moments.items():
+            if cle_stats in histogrammes:
+                histogramme = histogrammes[cle_stats]
+                codes, cles = pd.factorize(histogramme.index.get_level_values('cle'))
+                rangs, distincts = pd.factorize(histogramme.index.get_level_values('valeur'), sort=True)
+                comptes = np.zeros((len(cles), len(distincts)), dtype=np.int64)
+                comptes[codes, rangs] = histogramme.to_numpy(dtype=np.int64)
+                q1, mediane, q3, mad, _ = _resume_histogramme(np.asarray(distincts, dtype=np.float64), comptes)
+                stats = pd.DataFrame({'q1': q1, 'mediane': mediane, 'q3': q3, 'mad': mad},
+                                     index=pd.Index(cles)).reindex(agregats.index)
+            else:
+                esquisses = digests[cle_stats]
+                lignes = []
+                for cle in agregats.index:
+                    esquisse = esquisses[cle]
+                    mediane = esquisse.quantile(0.5)
+                    mad = None
+                    if mediane is not None:
+                        ecarts = np.abs(esquisse.moyennes - mediane)
+                        ordre = np.argsort(ecarts)
+                        cumul = np.cumsum(esquisse.poids[ordre])
+                        mad = float(ecarts[ordre][np.searchsorted(cumul, cumul[-1] / 2)])
+                    lignes.append((esquisse.quantile(0.25), mediane, esquisse.quantile(0.75), mad))
+                stats = pd.DataFrame(lignes, index=agregats.index, columns=['q1', 'mediane', 'q3', 'mad'], dtype=float)
+            n = agregats['n'].to_numpy()
+            with np.errstate(invalid="ignore", divide="ignore"):
+                moyenne = agregats['somme'].to_numpy() / n
+                variance = (agregats['carres'].to_numpy() - n * moyenne ** 2) / (n - 1)
+            stats.insert(0, 'n', n)
+            stats.insert(1, 'moyenne', moyenne)
+            stats.insert(2, 'ecart_type', np.sqrt(np.clip(variance, 0, None)))
+            statistiques[cle_stats] = stats
+
+        # 3. Signalements, morceau par morceau
+        morceaux, debut = [], 0
+        for morceau in pd.read_csv(chemin, usecols=lambda c: c in lecture, chunksize=chunksize):
+            lignes = np.arange(debut, debut + len(morceau))
+            debut += len(morceau)
+            for (colonne, nom_groupe), stats in statistiques.items():
+                groupe = groupes[nom_groupe]
+                if groupe is None:
+                    position = np.zeros(len(morceau), dtype=np.int64)
+                else:
+                    position = stats.index.get_indexer(morceau[groupe])
+                morceaux += DetecteurAberrants._signaler(DetecteurAberrants._numeriques(morceau[colonne]), position,
+                                                         stats, colonne, nom_groupe, methodes, lignes)
+        return DetecteurAberrants._table(morceaux)
+
+    @staticmethod
+    def resumer(table: pd.DataFrame, nb_lignes: int):
+        """
+        Comptes des signalements par colonne, groupement et méthode
+
+        Return
+        ---------------
+        resume : dict
+        """
+        comptes = {}
+        for (colonne, groupe, methode), n in table.groupby(['colonne', 'groupe', 'methode']).size().items():
+            comptes.setdefault(colonne, {}).setdefault(groupe, {})[methode] = int(n)
+        return {
+            'lignes': int(nb_lignes),
+            'signalements': int(len(table)),
+            'lignes_signalees': int(table['ligne'].nunique()),
+            'comptes': comptes,
+            'methodes': METHODES,
+            'effectif_min': EFFECTIF_MIN,
+        }
+
+    @staticmethod
+    def marquer(df: pd.DataFrame, table: pd.DataFrame = None):
+        """
+        Ajoute une colonne booléenne 'aberrant_<colonne>' par colonne
+        contrôlée (vraie si au moins une méthode signale la valeur)
+
+        Return
+        ---------------
+        df_marque : pd.DataFrame
+        """
+        table = DetecteurAberrants.detecter(df) if table is None else table
+        df_marque = df.copy()
+        for colonne in COLONNES:
+            if colonne in df.columns:
+                drapeau = np.zeros(len(df), dtype=bool)
+                drapeau[table.loc[table['colonne'] == colonne, 'ligne'].to_numpy(dtype=np.int64)] = True
+                df_marque[f"aberrant_{colonne}"] = drapeau
+        return df_marque
+
+    @staticmethod
+    def signaler(df: pd.DataFrame):
+        """
+        Étape du pipeline : enregistre la table des signalements et leur
+        résumé à côté du dataset final ; le DataFrame est renvoyé tel quel.
+        """
+        table = DetecteurAberrants.detecter(df)
+        resume = DetecteurAberrants.resumer(table, len(df))
+
+        os.makedirs(os.path.dirname(TABLE_PATH), exist_ok=True)
+        table.to_csv(TABLE_PATH, index=False)
+        with open(RESUME_PATH, "w", encoding="utf-8") as f:
+            json.dump(resume, f, ensure_ascii=False, indent=2)
+
+        print(f"Valeurs aberrantes : {resume['signalements']} signalement(s) sur "
+              f"{resume['lignes_signalees']} ligne(s), voir {TABLE_PATH}")
+        return df
+
+    @staticmethod
+    def charger_resume():
+        """Résumé des derniers signalements (None s'il n'existe pas)"""
+        if not os.path.exists(RESUME_PATH):
+            return None
+        with open(RESUME_PATH, encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def charger_table(colonne=None, groupe=None, methode=None):
+        """Signalements enregistrés, filtrés (None s'il n'existe pas)"""
+        if not os.path.exists(TABLE_PATH):
+            return None
+        table = pd.read_csv(TABLE_PATH, dtype={'cle_groupe': str})
+        for nom, valeur in (('colonne', colonne), ('groupe', groupe), ('methode', methode)):
+            if valeur is not None:
+                table = table[table[nom] == valeur]
+        return table
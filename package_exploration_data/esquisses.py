@@ -0,0 +1,420 @@
+"""
+Module des esquisses statistiques (statistiques approchées fusionnables)
+- HyperLogLog : nombre de valeurs distinctes (entreprises, origines)
+- t-digest : quantiles approchés des colonnes numériques (Note, Pourcentage
+  de cacao) ; l'erreur croît vers les extrémités (voir NOTE_QUANTILES)
+- count-min + top-k : valeurs les plus fréquentes (origines)
+Chaque esquisse se calcule par morceau puis se fusionne (morceaux, workers) ;
+le tout est enregistré à côté du dataset avec un résumé prêt à servir, et
+mis à jour à chaque sauvegarde avec les seules lignes ajoutées
+"""
+
+import os
+import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+COLONNES_DISTINCTES = ["Company", "Origine spécifique du harirot", "Broad Bean Origin"]
+COLONNES_QUANTILES = ["Note", "Pourcentage de cacao"]
+COLONNES_FREQUENTES = ["Broad Bean Origin", "Company"]
+QUANTILES = (0.01, 0.25, 0.5, 0.75, 0.99)
+# Erreur mesurée (compression 200, 10^6 valeurs en 10 morceaux) : < 1 % jusqu'à
+# 0.01 / 0.99, mais 12 % à 0.999 sur une loi lognormale (jusqu'à ~40 % selon
+# le découpage) : les quantiles plus extrêmes ne sont pas exposés
+NOTE_QUANTILES = ("Quantiles approchés (t-digest, compression 200) : erreur relative de l'ordre de 1 % "
+                  "jusqu'à 0.01 et 0.99, plus forte au-delà sur les distributions asymétriques")
+
+# Clés de hachage (16 caractères) des lignes du count-min
+_CLES_HACHAGE = ["esquisse-cmin-00", "esquisse-cmin-01", "esquisse-cmin-02", "esquisse-cmin-03",
+                 "esquisse-cmin-04", "esquisse-cmin-05", "esquisse-cmin-06", "esquisse-cmin-07"]
+
+
+def _hacher(valeurs, cle="0123456789123456"):
+    """Hachage 64 bits des valeurs (texte) non manquantes"""
+    valeurs = pd.Series(valeurs).dropna().astype(str).to_numpy(dtype=object)
+    return pd.util.hash_array(valeurs, hash_key=cle)
+
+
+def _longueur_bits(x):
+    """Nombre de bits significatifs de chaque uint64 (exact, sans arrondi flottant)"""
+    haut = (x >> np.uint64(32)).astype(np.float64)
+    bas = (x & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(haut > 0, 32 + np.frexp(haut)[1], np.frexp(bas)[1])
+
+
+class HyperLogLog:
+    """Nombre approché de valeurs distinctes (erreur relative ~ 1.04 / sqrt(2^p))"""
+
+    def __init__(self, p=14, registres=None):
+        self.p = p
+        self.registres = np.zeros(1 << p, dtype=np.uint8) if registres is None else registres
+
+    def ajouter(self, valeurs):
+        h = _hacher(valeurs)
+        if not len(h):
+            return self
+        reste_bits = 64 - self.p
+        indices = (h >> np.uint64(reste_bits)).astype(np.int64)
+        reste = h & np.uint64((1 << reste_bits) - 1)
+        # Rang du premier bit à 1 dans les bits restants
+        rangs = (reste_bits - _longueur_bits(reste) + 1).astype(np.uint8)
+        np.maximum.at(self.registres, indices, rangs)
+        return self
+
+    def fusionner(self, autre):
+        if self.p != autre.p:
+            raise ValueError("Les HyperLogLog à fusionner doivent avoir la même précision")
+        return HyperLogLog(self.p, np.maximum(self.registres, autre.registres))
+
+    def estimer(self):
+        m = len(self.registres)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimation = alpha * m * m / np.sum(np.ldexp(1.0, -self.registres.astype(np.int64)))
+        vides = int(np.count_nonzero(self.registres == 0))
+        # Petites cardinalités : comptage linéaire
+        if estimation <= 2.5 * m and vides:
+            estimation = m * np.log(m / vides)
+        return int(round(estimation))
+
+
+class TDigest:
+    """
+    Quantiles approchés : centroïdes (moyenne, poids) dont la taille est
+    bornée par la fonction d'échelle k1, plus fins aux extrémités.
+    La compression est vectorisée (regroupement par tranche de k).
+    """
+
+    def __init__(self, compression=200, moyennes=None, poids=None, minimum=np.inf, maximum=-np.inf):
+        self.compression = compression
+        self.moyennes = np.empty(0) if moyennes is None else moyennes
+        self.poids = np.empty(0) if poids is None else poids
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def _compresser(self, moyennes, poids):
+        ordre = np.argsort(moyennes, kind="stable")
+        moyennes, poids = moyennes[ordre], poids[ordre]
+        total = poids.sum()
+        q = (np.cumsum(poids) - poids / 2) / total
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q - 1)
+        tranches = np.floor(k - k[0]).astype(np.int64)
+        debuts = np.flatnonzero(np.r_[True, tranches[1:] != tranches[:-1]])
+        somme_poids = np.add.reduceat(poids, debuts)
+        self.moyennes = np.add.reduceat(moyennes * poids, debuts) / somme_poids
+        self.poids = somme_poids
+
+    def ajouter(self, valeurs):
+        valeurs = pd.to_numeric(pd.Series(valeurs), errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        valeurs = valeurs[~np.isnan(valeurs)]
+        if not len(valeurs):
+            return self
+        self.minimum = min(self.minimum, float(valeurs.min()))
+        self.maximum = max(self.maximum, float(valeurs.max()))
+        self._compresser(np.concatenate([self.moyennes, valeurs]),
+                         np.concatenate([self.poids, np.ones(len(valeurs))]))
+        return self
+
+    def fusionner(self, autre):
+        resultat = TDigest(self.compression, minimum=min(self.minimum, autre.minimum),
+                           maximum=max(self.maximum, autre.maximum))
+        if len(self.poids) + len(autre.poids):
+            resultat._compresser(np.concatenate([self.moyennes, autre.moyennes]),
+                                 np.concatenate([self.poids, autre.poids]))
+        return resultat
+
+    @property
+    def nombre(self):
+        return float(self.poids.sum())
+
+    def quantile(self, q):
+        if not len(self.poids):
+            return None
+        if len(self.poids) == 1:
+            return float(self.moyennes[0])
+        centres = (np.cumsum(self.poids) - self.poids / 2) / self.poids.sum()
+        # Interpolation entre centroïdes, bornée par le min et le max exacts
+        positions = np.r_[0.0, centres, 1.0]
+        valeurs = np.r_[self.minimum, self.moyennes, self.maximum]
+        return float(np.interp(q, positions, valeurs))
+
+    def moyenne(self):
+        if not len(self.poids):
+            return None
+        return float(np.dot(self.moyennes, self.poids) / self.poids.sum())
+
+
+class CountMinTopK:
+    """
+    Fréquences approchées (count-min, jamais sous-estimées) et les k valeurs
+    les plus fréquentes, candidates gardées d'un morceau à l'autre
+    """
+
+    def __init__(self, largeur=4096, profondeur=4, k=10, table=None, candidates=None):
+        self.largeur = largeur
+        self.profondeur = profondeur
+        self.k = k
+        self.table = np.zeros((profondeur, largeur), dtype=np.int64) if table is None else table
+        self.candidates = set() if candidates is None else set(candidates)
+
+    def _colonnes(self, valeurs):
+        return np.stack([(_hacher(valeurs, cle) % np.uint64(self.largeur)).astype(np.int64)
+                         for cle in _CLES_HACHAGE[:self.profondeur]])
+
+    def ajouter(self, valeurs):
+        effectifs = pd.Series(valeurs).dropna().astype(str).value_counts()
+        if effectifs.empty:
+            return self
+        colonnes = self._colonnes(effectifs.index)
+        for ligne in range(self.profondeur):
+            np.add.at(self.table[ligne], colonnes[ligne], effectifs.to_numpy())
+        self.candidates |= set(effectifs.index[:self.k])
+        self._elaguer()
+        return self
+
+    def estimer(self, valeurs):
+        valeurs = list(valeurs)
+        if not valeurs:
+            return np.empty(0, dtype=np.int64)
+        colonnes = self._colonnes(valeurs)
+        return self.table[np.arange(self.profondeur)[:, None], colonnes].min(axis=0)
+
+    def _elaguer(self):
+        candidates = sorted(self.candidates)
+        estimations = self.estimer(candidates)
+        ordre = np.argsort(-estimations, kind="stable")[:self.k]
+        self.candidates = {candidates[i] for i in ordre}
+
+    def fusionner(self, autre):
+        if (self.largeur, self.profondeur) != (autre.largeur, autre.profondeur):
+            raise ValueError("Les count-min à fusionner doivent avoir les mêmes dimensions")
+        resultat = CountMinTopK(self.largeur, self.profondeur, self.k, self.table + autre.table,
+                                self.candidates | autre.candidates)
+        resultat._elaguer()
+        return resultat
+
+    def top(self):
+        candidates = sorted(self.candidates)
+        estimations = self.estimer(candidates)
+        return sorted(({'valeur': v, 'effectif': int(n)} for v, n in zip(candidates, estimations)),
+                      key=lambda item: (-item['effectif'], item['valeur']))
+
+
+class EsquissesDataset:
+    """
+    Cette classe regroupe les esquisses d'un dataset cacao ; elles se
+    calculent morceau par morceau et se fusionnent, puis sont enregistrées
+    à côté du dataset (<nom>.sketches.npz) avec leur résumé JSON
+    """
+
+    def __init__(self):
+        self.nb_lignes = 0
+        # Clés des lignes décrites (SaveSqlData.cles_lignes), pour les mises à jour
+        self.cles = None
+        self.distinctes = {}
+        self.quantiles = {}
+        self.frequentes = {}
+
+    @staticmethod
+    def depuis_dataframe(df: pd.DataFrame):
+        """
+        Cette fonction calcule les esquisses d'un morceau
+
+        Arguments
+        ---------------
+            df: pd.DataFrame , le morceau de données
+
+        Return
+        ----------------
+            esquisses : EsquissesDataset
+        """
+        esquisses = EsquissesDataset()
+        esquisses.nb_lignes = len(df)
+        for col in COLONNES_DISTINCTES:
+            if col in df.columns:
+                esquisses.distinctes[col] = HyperLogLog().ajouter(df[col])
+        for col in COLONNES_QUANTILES:
+            if col in df.columns:
+                esquisses.quantiles[col] = TDigest().ajouter(df[col])
+        for col in COLONNES_FREQUENTES:
+            if col in df.columns:
+                esquisses.frequentes[col] = CountMinTopK().ajouter(df[col])
+        return esquisses
+
+    def fusionner(self, autre):
+        """Fusionne deux ensembles d'esquisses (nouvel objet)"""
+        resultat = EsquissesDataset()
+        resultat.nb_lignes = self.nb_lignes + autre.nb_lignes
+        for attribut in ('distinctes', 'quantiles', 'frequentes'):
+            gauche, droite = getattr(self, attribut), getattr(autre, attribut)
+            getattr(resultat, attribut).update({
+                col: gauche[col].fusionner(droite[col]) if col in gauche and col in droite
+                else gauche.get(col) or droite.get(col)
+                for col in list(gauche) + [c for c in droite if c not in gauche]
+            })
+        return resultat
+
+    def resume(self):
+        """Statistiques approchées prêtes à servir (dict sérialisable en JSON)"""
+        return {
+            'rows': self.nb_lignes,
+            'distinct': {col: hll.estimer() for col, hll in self.distinctes.items()},
+            'quantiles_note': NOTE_QUANTILES,
+            'quantiles': {
+                col: {
+                    'count': int(td.nombre),
+                    'min': None if not td.nombre else td.minimum,
+                    'max': None if not td.nombre else td.maximum,
+                    'mean': td.moyenne(),
+                    **{str(q): td.quantile(q) for q in QUANTILES},
+                }
+                for col, td in self.quantiles.items()
+            },
+            'top': {col: cm.top() for col, cm in self.frequentes.items()},
+        }
+
+    @staticmethod
+    def chemin(chemin_dataset):
+        """Chemin des esquisses enregistrées à côté du dataset"""
+        return os.path.splitext(chemin_dataset)[0] + ".sketches.npz"
+
+    def sauvegarder(self, chemin_dataset):
+        """
+        Cette fonction enregistre les esquisses et leur résumé à côté du dataset
+
+        Return
+        ----------------
+            resume : dict , le résumé enregistré
+        """
+        tableaux = {}
+        for col, hll in self.distinctes.items():
+            tableaux[f"hll|{col}"] = hll.registres
+        for col, td in self.quantiles.items():
+            tableaux[f"td|{col}"] = np.stack([td.moyennes, td.poids])
+            tableaux[f"tdb|{col}"] = np.array([td.minimum, td.maximum])
+        for col, cm in self.frequentes.items():
+            tableaux[f"cm|{col}"] = cm.table
+            tableaux[f"cmk|{col}"] = np.array(sorted(cm.candidates), dtype=np.str_)
+
+        resume = self.resume()
+        tableaux['resume'] = np.array(json.dumps(resume, ensure_ascii=False))
+        tableaux['nb_lignes'] = np.array(self.nb_lignes)
+        if self.cles is not None:
+            tableaux['cles'] = np.sort(self.cles)
+
+        chemin = EsquissesDataset.chemin(chemin_dataset)
+        temporaire = f"{chemin}.{os.getpid()}.tmp.npz"
+        np.savez_compressed(temporaire, **tableaux)
+        os.replace(temporaire, chemin)
+        return resume
+
+    @staticmethod
+    def charger(chemin_dataset):
+        """Relit les esquisses enregistrées (pour les fusionner avec un nouveau lot)"""
+        esquisses = EsquissesDataset()
+        with np.load(EsquissesDataset.chemin(chemin_dataset)) as fichier:
+            esquisses.nb_lignes = int(fichier['nb_lignes'])
+            if 'cles' in fichier.files:
+                esquisses.cles = fichier['cles']
+            for nom in fichier.files:
+                genre, _, col = nom.partition("|")
+                if genre == "hll":
+                    esquisses.distinctes[col] = HyperLogLog(int(np.log2(len(fichier[nom]))), fichier[nom].copy())
+                elif genre == "td":
+                    minimum, maximum = fichier[f"tdb|{col}"]
+                    esquisses.quantiles[col] = TDigest(moyennes=fichier[nom][0].copy(), poids=fichier[nom][1].copy(),
+                                                       minimum=float(minimum), maximum=float(maximum))
+                elif genre == "cm":
+                    table = fichier[nom].copy()
+                    esquisses.frequentes[col] = CountMinTopK(table.shape[1], table.shape[0], table=table,
+                                                             candidates=fichier[f"cmk|{col}"].tolist())
+        return esquisses
+
+    @staticmethod
+    def mettre_a_jour(chemin_dataset, df: pd.DataFrame, cles):
+        """
+        Cette fonction met à jour les esquisses enregistrées pour qu'elles
+        décrivent df : seules les lignes dont la clé est absente des esquisses
+        précédentes sont calculées puis fusionnées. Une esquisse ne sait pas
+        retirer une valeur : si des lignes ont disparu (ou changé), ou sans
+        esquisses précédentes, elles sont recalculées sur tout df.
+
+        Arguments
+        ---------------
+            chemin_dataset : str , chemin du dataset sauvegardé
+            df: pd.DataFrame , le dataset complet sauvegardé
+            cles : np.ndarray , clé de chaque ligne de df (SaveSqlData.cles_lignes)
+
+        Return
+        ----------------
+            resume : dict , le résumé enregistré
+            ajoutees : int ou None , lignes fusionnées (None : esquisses recalculées)
+        """
+        precedentes = None
+        if os.path.exists(EsquissesDataset.chemin(chemin_dataset)):
+            precedentes = EsquissesDataset.charger(chemin_dataset)
+
+        if precedentes is not None and precedentes.cles is not None and len(precedentes.cles) <= len(cles):
+            # cles des esquisses enregistrées triées : recherche dichotomique
+            position = np.searchsorted(precedentes.cles, cles).clip(max=len(precedentes.cles) - 1)
+            connues = (precedentes.cles[position] == cles) if len(precedentes.cles) else np.zeros(len(cles), bool)
+            if connues.sum() == len(precedentes.cles):
+                esquisses = precedentes.fusionner(EsquissesDataset.depuis_dataframe(df[~connues]))
+                esquisses.cles = cles
+                return esquisses.sauvegarder(chemin_dataset), int((~connues).sum())
+
+        esquisses = EsquissesDataset.depuis_dataframe(df)
+        esquisses.cles = cles
+        return esquisses.sauvegarder(chemin_dataset), None
+
+    @staticmethod
+    def depuis_fichier(chemin, chunksize=100_000, n_jobs=1):
+        """
+        Cette fonction calcule les esquisses d'un fichier CSV par morceaux,
+        éventuellement en parallèle. Au plus 2 x n_jobs morceaux sont lus
+        et pas encore fusionnés à la fois : la mémoire ne dépend pas de la
+        taille du fichier.
+
+        Return
+        ----------------
+            esquisses : EsquissesDataset
+        """
+        colonnes = set(COLONNES_DISTINCTES + COLONNES_QUANTILES + COLONNES_FREQUENTES)
+        morceaux = pd.read_csv(chemin, chunksize=chunksize, usecols=lambda c: c in colonnes)
+        esquisses = EsquissesDataset()
+        if n_jobs > 1:
+            # Fusion dans l'ordre de lecture : même résultat qu'en séquentiel
+            en_cours = deque()
+            with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+                for morceau in morceaux:
+                    if len(en_cours) >= 2 * n_jobs:
+                        esquisses = esquisses.fusionner(en_cours.popleft().result())
+                    en_cours.append(executor.submit(EsquissesDataset.depuis_dataframe, morceau))
+                for futur in en_cours:
+                    esquisses = esquisses.fusionner(futur.result())
+        else:
+            for morceau in morceaux:
+                esquisses = esquisses.fusionner(EsquissesDataset.depuis_dataframe(morceau))
+        return esquisses
+
+    @staticmethod
+    def charger_resume(chemin_dataset, recalculer=True):
+        """
+        Renvoie le résumé enregistré s'il est à jour, sans relire les données
+        (recalculé depuis le fichier sinon, si recalculer)
+
+        Return
+        ----------------
+            resume : dict ou None
+        """
+        if not os.path.exists(chemin_dataset):
+            return None
+        chemin = EsquissesDataset.chemin(chemin_dataset)
+        if os.path.exists(chemin) and os.path.getmtime(chemin) >= os.path.getmtime(chemin_dataset):
+            with np.load(chemin) as fichier:
+                return json.loads(str(fichier['resume']))
+        if not recalculer:
+            return None
+        return EsquissesDataset.depuis_fichier(chemin_dataset).sauvegarder(chemin_dataset)
@@ -7,20 +7,26 @@ class NbreDoublons:
     """
 
     @staticmethod
-    def calcul_nbre_doublons(df: pd.DataFrame):
+    def calcul_nbre_doublons(df: pd.DataFrame, rapport=None):
         """
-        Cette fonction calcule les doublons
+        Cette fonction calcule les doublons (lus dans le profil de
+        ProfileurDonnees)
 
         Arguments
         ---------------
             df: pd.DataFrame , la base de données de l'étude
+            rapport: dict , profil déjà calculé de df (sinon df est profilé)
 
         Return
         ----------------
           res : (int) , le nombre total de  doublons.
         """
 
-        doublon= df.duplicated().sum()
+        if rapport is None:
+            from package_exploration_data.profilage import ProfileurDonnees
+            rapport = ProfileurDonnees.profiler(df)
+
+        doublon = rapport['duplicates']
         
 
         return doublon
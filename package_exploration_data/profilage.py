@@ -0,0 +1,339 @@
+"""
+Module de profilage des données
+Calcule en une seule passe les statistiques de chaque colonne d'un DataFrame
+"""
+
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from transformation.schema import NUMERIQUE, SchemaColonnes
+
+
+def _hachages_lignes(df: pd.DataFrame):
+    """
+    Hachage de chaque ligne indépendant des types déduits morceau par
+    morceau : les colonnes numériques (genre du type réel, voir
+    SchemaColonnes) sont hachées en float64 (3 et 3.0 identiques, colonne
+    entière dans un morceau et flottante dans un autre à cause d'un NaN),
+    les valeurs manquantes ont le même hachage quel que soit le type
+    """
+    hachages = {}
+    for col in df.columns:
+        colonne = df[col]
+        if SchemaColonnes.genre(colonne.dtype) == NUMERIQUE:
+            colonne = colonne.astype("float64")
+        hachage = pd.util.hash_pandas_object(colonne, index=False).to_numpy()
+        hachages[col] = np.where(colonne.isna().to_numpy(), np.uint64(0), hachage)
+    return pd.util.hash_pandas_object(pd.DataFrame(hachages), index=False).to_numpy()
+
+
+class ProfilPartiel:
+    """
+    Cette classe représente le profil (partiel ou complet) d'un DataFrame.
+
+    Un profil partiel est calculé sur un morceau (chunk) des données et peut
+    être fusionné avec d'autres profils partiels : le résultat est identique
+    au profil calculé sur le DataFrame entier. Les effectifs sont cumulés
+    sur place et les hachages des lignes dédoublonnés une seule fois, au
+    rapport final.
+    """
+
+    def __init__(self):
+        self.nb_lignes = 0
+        self.colonnes = {}
+        # Hachages distincts de chaque morceau, dédoublonnés entre morceaux par to_dict
+        self.hachages = []
+
+    @staticmethod
+    def depuis_dataframe(df: pd.DataFrame):
+        """
+        Cette fonction calcule le profil partiel d'un DataFrame
+
+        Arguments
+        ---------------
+            df: pd.DataFrame , le morceau de données à profiler
+
+        Return
+        ----------------
+            profil : ProfilPartiel , le profil du morceau
+        """
+
+        if not isinstance(df, pd.DataFrame):
+            raise ValueError("df doit être un DataFrame")
+
+        profil = ProfilPartiel()
+        profil.nb_lignes = len(df)
+
+        if df.empty:
+            return profil
+
+        # Un hachage par ligne suffit pour compter les doublons entre morceaux
+        profil.hachages = [np.unique(_hachages_lignes(df))]
+
+        for col in df.columns:
+            colonne = df[col]
+
+            # Les effectifs par valeur donnent nulls, cardinalité, top, quantiles et longueurs
+            effectifs = colonne.value_counts(dropna=True)
+            profil.colonnes[col] = {
+                'dtype': str(colonne.dtype),
+                'nb_nulls': int(len(colonne) - effectifs.sum()),
+                'effectifs': dict(zip(effectifs.index.tolist(), effectifs.tolist())),
+            }
+
+        return profil
+
+    def ajouter(self, autre):
+        """
+        Cette fonction cumule un profil partiel dans celui-ci (sur place) :
+        le coût ne dépend que de la taille de l'autre profil
+
+        Arguments
+        ---------------
+            autre: ProfilPartiel , le profil à ajouter (non modifié)
+
+        Return
+        ----------------
+            profil : ProfilPartiel , ce profil, mis à jour
+        """
+
+        self.nb_lignes += autre.nb_lignes
+        self.hachages.extend(autre.hachages)
+
+        for col, droite in autre.colonnes.items():
+            gauche = self.colonnes.get(col)
+            if gauche is None:
+                self.colonnes[col] = {**droite, 'effectifs': dict(droite['effectifs'])}
+                continue
+
+            effectifs = gauche['effectifs']
+            for valeur, nb in droite['effectifs'].items():
+                effectifs[valeur] = effectifs.get(valeur, 0) + nb
+
+            if gauche['dtype'] != droite['dtype']:
+                gauche['dtype'] = 'object'
+            gauche['nb_nulls'] += droite['nb_nulls']
+
+        return self
+
+    def fusionner(self, autre):
+        """
+        Cette fonction fusionne deux profils partiels
+
+        Arguments
+        ---------------
+            autre: ProfilPartiel , le profil à fusionner avec celui-ci
+
+        Return
+        ----------------
+            profil : ProfilPartiel , le profil fusionné (nouvel objet)
+        """
+
+        return ProfilPartiel().ajouter(self).ajouter(autre)
+
+    def to_dict(self, nb_top=5, quantiles=(0.25, 0.5, 0.75)):
+        """
+        Cette fonction construit le rapport final du profil
+
+        Arguments
+        ---------------
+            nb_top: int , nombre de valeurs les plus fréquentes à retenir
+            quantiles: tuple , quantiles à calculer pour les colonnes numériques
+
+        Return
+        ----------------
+            rapport : dict , le rapport sérialisable en JSON
+        """
+
+        if len(self.hachages) > 1:
+            self.hachages = [np.unique(np.concatenate(self.hachages))]
+        distinctes = len(self.hachages[0]) if self.hachages else 0
+
+        rapport = {
+            'rows': self.nb_lignes,
+            'columns': len(self.colonnes),
+            'duplicates': int(self.nb_lignes - distinctes),
+            'colonnes': {},
+        }
+
+        for col, infos in self.colonnes.items():
+            effectifs = infos['effectifs']
+            top = sorted(effectifs.items(), key=lambda item: item[1], reverse=True)[:nb_top]
+            stats = {
+                'dtype': infos['dtype'],
+                'nb_nulls': infos['nb_nulls'],
+                'cardinalite': len(effectifs),
+                'top': [{'valeur': _valeur_json(v), 'effectif': int(n)} for v, n in top],
+            }
+
+            valeurs = np.array(list(effectifs.keys()), dtype=object)
+            poids = np.array(list(effectifs.values()), dtype=np.int64)
+
+            if len(valeurs) and all(isinstance(v, (int, float, np.number)) and not isinstance(v, bool) for v in valeurs):
+                valeurs = valeurs.astype(float)
+                ordre = np.argsort(valeurs)
+                valeurs, poids = valeurs[ordre], poids[ordre]
+                cumul = np.cumsum(poids)
+                stats.update({
+                    'min': float(valeurs[0]),
+                    'max': float(valeurs[-1]),
+                    'mean': float(np.dot(valeurs, poids) / cumul[-1]),
+                    'quantiles': {
+                        str(q): float(valeurs[np.searchsorted(cumul, q * cumul[-1], side='left')])
+                        for q in quantiles
+                    },
+                })
+            elif len(valeurs):
+                longueurs = np.array([len(str(v)) for v in valeurs])
+                stats['longueur'] = {
+                    'min': int(longueurs.min()),
+                    'max': int(longueurs.max()),
+                    'mean': float(np.dot(longueurs, poids) / poids.sum()),
+                }
+
+            rapport['colonnes'][col] = stats
+
+        return rapport
+
+
+def _valeur_json(valeur):
+    """Convertit une valeur NumPy en type Python natif"""
+    return valeur.item() if isinstance(valeur, np.generic) else valeur
+
+
+class ProfileurDonnees:
+    """
+    Cette classe permet de profiler un dataset en une seule passe,
+    sur un DataFrame ou sur un fichier CSV lu par morceaux
+    """
+
+    @staticmethod
+    def profiler(df: pd.DataFrame):
+        """
+        Cette fonction calcule le profil complet d'un DataFrame
+
+        Arguments
+        ---------------
+            df: pd.DataFrame , la base de données de l'étude
+
+        Return
+        ----------------
+            rapport : dict , nulls, doublons, cardinalité, top valeurs,
+                      min/max/moyenne/quantiles et longueurs des chaînes
+        """
+
+        return ProfilPartiel.depuis_dataframe(df).to_dict()
+
+    @staticmethod
+    def profiler_fichier(chemin, chunksize=100_000, n_jobs=1):
+        """
+        Cette fonction profile un fichier CSV par morceaux, éventuellement en parallèle
+
+        Arguments
+        ---------------
+            chemin: str , chemin du fichier CSV
+            chunksize: int , nombre de lignes par morceau
+            n_jobs: int , nombre de morceaux profilés en parallèle
+
+        Return
+        ----------------
+            rapport : dict , le profil du fichier complet
+        """
+
+        if not os.path.exists(chemin):
+            raise ValueError(f"Fichier {chemin} non trouvé")
+
+        morceaux = pd.read_csv(chemin, chunksize=chunksize)
+
+        profil = ProfilPartiel()
+        if n_jobs > 1:
+            with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+                for partiel in executor.map(ProfilPartiel.depuis_dataframe, morceaux):
+                    profil.ajouter(partiel)
+        else:
+            for morceau in morceaux:
+                profil.ajouter(ProfilPartiel.depuis_dataframe(morceau))
+
+        return profil.to_dict()
+
+    @staticmethod
+    def profiler_table(table, chunksize=100_000):
+        """
+        Cette fonction profile une table Arrow (ex: mappée en mémoire) par
+        lots : seul le lot en cours est converti en DataFrame
+
+        Arguments
+        ---------------
+            table: pyarrow.Table , la table à profiler
+            chunksize: int , nombre de lignes par lot
+
+        Return
+        ----------------
+            rapport : dict , le profil de la table complète
+        """
+
+        profil = ProfilPartiel()
+        for lot in table.to_batches(max_chunksize=chunksize):
+            profil.ajouter(ProfilPartiel.depuis_dataframe(lot.to_pandas()))
+
+        return profil.to_dict()
+
+    @staticmethod
+    def chemin_profil(chemin):
+        """Renvoie le chemin du profil mis en cache à côté du dataset"""
+        return os.path.splitext(chemin)[0] + ".profile.json"
+
+    @staticmethod
+    def sauvegarder_profil(chemin, rapport=None):
+        """
+        Cette fonction enregistre le profil d'un dataset à côté du fichier
+
+        Arguments
+        ---------------
+            chemin: str , chemin du fichier CSV profilé
+            rapport: dict , profil déjà calculé (sinon le fichier est profilé)
+
+        Return
+        ----------------
+            rapport : dict , le profil enregistré
+        """
+
+        if rapport is None:
+            rapport = ProfileurDonnees.profiler_fichier(chemin)
+
+        with open(ProfileurDonnees.chemin_profil(chemin), "w", encoding="utf-8") as f:
+            json.dump(rapport, f, ensure_ascii=False, indent=2)
+
+        return rapport
+
+    @staticmethod
+    def charger_profil(chemin, recalculer=True):
+        """
+        Cette fonction renvoie le profil en cache d'un dataset s'il est à jour
+
+        Arguments
+        ---------------
+            chemin: str , chemin du fichier CSV
+            recalculer: bool , recalculer et enregistrer le profil s'il est absent ou périmé
+
+        Return
+        ----------------
+            rapport : dict ou None , le profil du dataset
+        """
+
+        if not os.path.exists(chemin):
+            return None
+
+        chemin_profil = ProfileurDonnees.chemin_profil(chemin)
+        if os.path.exists(chemin_profil) and os.path.getmtime(chemin_profil) >= os.path.getmtime(chemin):
+            with open(chemin_profil, encoding="utf-8") as f:
+                return json.load(f)
+
+        if not recalculer:
+            return None
+
+        return ProfileurDonnees.sauvegarder_profil(chemin)
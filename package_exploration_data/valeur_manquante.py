@@ -7,13 +7,15 @@ class ValeurManquante:
     """
 
     @staticmethod
-    def calcul_valeur_manquante(df: pd.DataFrame):
+    def calcul_valeur_manquante(df: pd.DataFrame, rapport=None):
         """
-        Cette fonction calcule les valeurs manquantes
+        Cette fonction calcule les valeurs manquantes (lues dans le profil
+        de ProfileurDonnees)
 
         Arguments
         ---------------
             df: pd.DataFrame , la base de données de l'étude
+            rapport: dict , profil déjà calculé de df (sinon df est profilé)
 
         Return
         ----------------
@@ -26,7 +28,11 @@ class ValeurManquante:
         if df.empty:  
             return pd.DataFrame()
         
-        res = df.isnull().sum()
+        if rapport is None:
+            from package_exploration_data.profilage import ProfileurDonnees
+            rapport = ProfileurDonnees.profiler(df)
+
+        res = pd.Series({col: infos['nb_nulls'] for col, infos in rapport['colonnes'].items()}, dtype="int64")
 
         return res 
 
@@ -0,0 +1,27 @@
+"""
+Module des étapes du pipeline
+Chaque étape déclare les colonnes qu'elle lit et écrit : le journal de
+lignage ne photographie que les colonnes écrites avant l'étape.
+"""
+
+
+class Etape:
+    """
+    Une étape du pipeline et ses colonnes lues / écrites.
+    lectures=None ou ecritures=None signifie « toutes les colonnes »
+    (ex: sauvegarde, nettoyage global, étape qui supprime des lignes).
+    """
+
+    def __init__(self, nom, fonction, lectures=None, ecritures=None):
+        self.nom = nom
+        self.fonction = fonction
+        self.lectures = set(lectures) if lectures is not None else None
+        self.ecritures = set(ecritures) if ecritures is not None else None
+
+    @staticmethod
+    def depuis(etape):
+        """Accepte une Etape ou un couple (nom, fonction) (étape globale)"""
+        if isinstance(etape, Etape):
+            return etape
+        nom, fonction = etape
+        return Etape(nom, fonction)
@@ -0,0 +1,254 @@
+"""
+Module du bus d'événements du pipeline
+Les étapes publient leurs débuts / fins (lignes, durée) dans une base
+SQLite partagée ; un seul diffuseur par processus relit la base et
+réveille tous les abonnés (flux SSE du dashboard)
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import deque
+from datetime import datetime
+
+
+class BusEvenements:
+    """
+    Cette classe permet de publier et relire les événements d'exécution
+    du pipeline dans une base SQLite (utilisable entre processus : notebook,
+    worker de fond, workers gunicorn). Seuls les événements des
+    `conservation` dernières exécutions sont gardés.
+    """
+
+    def __init__(self, chemin="data/pipeline_evenements.sqlite", conservation=50):
+        self.chemin = chemin
+        self.conservation = conservation
+        dossier = os.path.dirname(chemin)
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+        with self._connexion() as connexion:
+            connexion.execute("""
+                CREATE TABLE IF NOT EXISTS evenements (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    run_id TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    etape TEXT,
+                    lignes INTEGER,
+                    duree REAL,
+                    horodatage TEXT NOT NULL,
+                    donnees TEXT
+                )
+            """)
+
+    def _connexion(self):
+        connexion = sqlite3.connect(self.chemin, timeout=10)
+        connexion.execute("PRAGMA journal_mode=WAL")
+        return connexion
+
+    def publier(self, run_id, type_evenement, etape=None, lignes=None, duree=None, **donnees):
+        """
+        Publie un événement
+
+        Arguments
+        ---------------
+            run_id : str, identifiant de l'exécution
+            type_evenement : str, ex: 'run_start', 'step_start', 'step_end', 'run_end', 'run_error'
+            etape : str, nom de l'étape concernée
+            lignes : int, nombre de lignes en sortie d'étape
+            duree : float, durée de l'étape en secondes
+            donnees : informations supplémentaires (sérialisées en JSON)
+
+        Return
+        ---------------
+            evenement : dict, l'événement enregistré (avec son id)
+        """
+        evenement = {
+            'run_id': run_id,
+            'type': type_evenement,
+            'etape': etape,
+            'lignes': lignes,
+            'duree': duree,
+            'horodatage': datetime.now().isoformat(),
+            'donnees': donnees or {},
+        }
+        with self._connexion() as connexion:
+            curseur = connexion.execute(
+                "INSERT INTO evenements (run_id, type, etape, lignes, duree, horodatage, donnees) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (run_id, type_evenement, etape, lignes, duree, evenement['horodatage'],
+                 json.dumps(evenement['donnees'], ensure_ascii=False, default=str))
+            )
+            evenement['id'] = curseur.lastrowid
+            if type_evenement == 'run_start':
+                self._purger(connexion)
+
+        # Réveil immédiat des abonnés du même processus
+        DiffuseurEvenements.notifier_local(self.chemin)
+        return evenement
+
+    def lire(self, depuis_id=0, run_id=None, limite=1000):
+        """
+        Relit les événements d'id strictement supérieur à depuis_id
+
+        Arguments
+        ---------------
+            depuis_id : int, dernier id déjà reçu
+            run_id : str, filtrer sur une exécution
+            limite : int, nombre maximal d'événements
+
+        Return
+        ---------------
+            evenements : list de dict, dans l'ordre de publication
+        """
+        requete = "SELECT id, run_id, type, etape, lignes, duree, horodatage, donnees FROM evenements WHERE id > ?"
+        parametres = [depuis_id]
+        if run_id is not None:
+            requete += " AND run_id = ?"
+            parametres.append(run_id)
+        requete += " ORDER BY id LIMIT ?"
+        parametres.append(limite)
+
+        with self._connexion() as connexion:
+            lignes = connexion.execute(requete, parametres).fetchall()
+
+        return [
+            {
+                'id': ligne[0], 'run_id': ligne[1], 'type': ligne[2], 'etape': ligne[3],
+                'lignes': ligne[4], 'duree': ligne[5], 'horodatage': ligne[6],
+                'donnees': json.loads(ligne[7]) if ligne[7] else {},
+            }
+            for ligne in lignes
+        ]
+
+    def _purger(self, connexion):
+        """Oublie les événements antérieurs aux `conservation` dernières exécutions"""
+        connexion.execute("""
+            DELETE FROM evenements WHERE id < (
+                SELECT id FROM evenements WHERE type = 'run_start'
+                ORDER BY id DESC LIMIT 1 OFFSET ?
+            )
+        """, (self.conservation - 1,))
+
+    def dernier_run(self):
+        """Renvoie l'identifiant de la dernière exécution publiée (ou None)"""
+        with self._connexion() as connexion:
+            ligne = connexion.execute(
+                "SELECT run_id FROM evenements WHERE type = 'run_start' ORDER BY id DESC LIMIT 1"
+            ).fetchone()
+        return ligne[0] if ligne else None
+
+    def dernier_id(self):
+        """Renvoie l'id du dernier événement publié (0 si la base est vide)"""
+        with self._connexion() as connexion:
+            ligne = connexion.execute("SELECT MAX(id) FROM evenements").fetchone()
+        return ligne[0] or 0
+
+    def etape(self, run_id, nom):
+        """Contexte qui publie le début et la fin (ou l'erreur) d'une étape"""
+        return _ContexteEtape(self, run_id, nom)
+
+
+class _ContexteEtape:
+    """Publie step_start / step_end (durée, lignes) autour d'une étape"""
+
+    def __init__(self, bus, run_id, nom):
+        self.bus = bus
+        self.run_id = run_id
+        self.nom = nom
+        self.lignes = None
+        self.debut = None
+
+    def __enter__(self):
+        self.debut = time.perf_counter()
+        self.bus.publier(self.run_id, 'step_start', self.nom)
+        return self
+
+    def __exit__(self, type_exception, exception, trace):
+        duree = round(time.perf_counter() - self.debut, 4)
+        if exception is None:
+            self.bus.publier(self.run_id, 'step_end', self.nom, lignes=self.lignes, duree=duree)
+        else:
+            self.bus.publier(self.run_id, 'step_error', self.nom, duree=duree, erreur=str(exception))
+        return False
+
+
+class DiffuseurEvenements:
+    """
+    Un diffuseur par base et par processus : un seul thread relit la base
+    SQLite et garde les derniers événements en mémoire ; les abonnés (un
+    par client SSE) attendent sur une condition au lieu d'interroger la base.
+    """
+
+    _instances = {}
+    _verrou = threading.Lock()
+
+    def __init__(self, bus, intervalle=0.5, taille_tampon=1000):
+        self.bus = bus
+        self.intervalle = intervalle
+        self.tampon = deque(maxlen=taille_tampon)
+        # L'historique est relu par les abonnés eux-mêmes : le diffuseur ne
+        # suit que les événements publiés après son démarrage
+        try:
+            self.dernier_id = bus.dernier_id()
+        except sqlite3.Error:
+            self.dernier_id = 0
+        self.condition = threading.Condition()
+        self.reveil = threading.Event()
+        threading.Thread(target=self._boucle, name="diffuseur-evenements", daemon=True).start()
+
+    @staticmethod
+    def pour(bus):
+        """Renvoie (et démarre au besoin) le diffuseur associé à la base du bus"""
+        with DiffuseurEvenements._verrou:
+            diffuseur = DiffuseurEvenements._instances.get(bus.chemin)
+            if diffuseur is None:
+                diffuseur = DiffuseurEvenements(bus)
+                DiffuseurEvenements._instances[bus.chemin] = diffuseur
+            return diffuseur
+
+    @staticmethod
+    def notifier_local(chemin):
+        """Demande une relecture immédiate (publication dans ce processus)"""
+        diffuseur = DiffuseurEvenements._instances.get(chemin)
+        if diffuseur is not None:
+            diffuseur.reveil.set()
+
+    def _boucle(self):
+        while True:
+            self.reveil.wait(self.intervalle)
+            self.reveil.clear()
+            try:
+                nouveaux = self.bus.lire(self.dernier_id)
+            except sqlite3.Error:
+                continue
+            if nouveaux:
+                with self.condition:
+                    self.tampon.extend(nouveaux)
+                    self.dernier_id = nouveaux[-1]['id']
+                    self.condition.notify_all()
+
+    def attendre(self, depuis_id, timeout=15):
+        """
+        Attend les événements d'id supérieur à depuis_id
+
+        Arguments
+        ---------------
+            depuis_id : int, dernier id reçu par l'abonné
+            timeout : float, attente maximale en secondes
+
+        Return
+        ---------------
+            evenements : list de dict (vide si le délai a expiré)
+        """
+        with self.condition:
+            self.condition.wait_for(lambda: self.dernier_id > depuis_id, timeout=timeout)
+            dernier_id = self.dernier_id
+            evenements = [e for e in self.tampon if e['id'] > depuis_id]
+
+        # Abonné trop en retard pour le tampon (ou antérieur au démarrage du
+        # diffuseur) : complément depuis la base
+        if dernier_id > depuis_id and (not evenements or evenements[0]['id'] > depuis_id + 1):
+            return self.bus.lire(depuis_id)
+        return evenements
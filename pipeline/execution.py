@@ -0,0 +1,307 @@
+"""
+Module d'exécution du pipeline ETL
+Enchaîne les étapes du notebook my_pipe.ipynb et publie la progression
+de chaque étape (début, fin, lignes, durée) sur le bus d'événements
+"""
+
+import os
+import uuid
+
+import pandas as pd
+
+from pipeline.evenements import BusEvenements
+from pipeline.etapes import Etape
+
+# Étape sautée quand l'ingestion a déjà décodé et réparé toute la source
+ETAPE_ENCODAGE = "Problèmes d'encodage"
+
+
+def _etapes_cacao(partitions=None):
+    """
+    Liste ordonnée des étapes du pipeline cacao, avec les colonnes lues et
+    écrites par chacune (sans déclaration : toutes les colonnes).
+    Avec partitions, les datasets interim et processed sont aussi écrits en
+    Parquet partitionné (voir StockagePartitionne).
+    Les imports sont faits ici pour ne charger les modules qu'à l'exécution.
+    """
+    from data.load.save_raw_data import SaveRawData
+    from data.load.save_interim_data import SaveInterimData
+    from data.load.save_processed_data import SaveProcessedData
+    from data.load.save_sql_data import SaveSqlData
+    from transformation.remplacer_valeur import Nettoyeur
+    from transformation.detecteur_caracteres_controle import DetecteurCaracteresControle
+    from transformation.detecteur_caracteres_speciaux import DetecteurCaracteresSpeciaux
+    from transformation.detecteur_problemes_encodage import DetecteurProblemesEncodage
+    from transformation.pourcentage_cacao import TransformateurPourcentageCacao
+    from transformation.type_colonne import TypeColonne
+    from transformation.uniformiser_pays import UniformiserPays
+    from transformation.validation import ValidateurQualite
+    from transformation.deduplication import Dedoublonneur
+    from imputation.imputation_autre import ImputationAutre
+    from imputation.imputation_mod import ImputationMode
+    from imputation.valeurs_aberrantes import DetecteurAberrants, COLONNES, GROUPES
+
+    def sauvegarder(classe, partitionner=False):
+        def etape(df):
+            classe.save(df)
+            if partitionner and partitions:
+                classe.save(df, partitions=partitions)
+            return df
+        etape.classe = classe
+        return etape
+
+    pourcentage = ["Pourcentage de cacao"]
+    types = ["Date de la revue", "REF"]
+    pays = ["Localisation de l'entreprise", "Broad Bean Origin"]
+    aberrants = COLONNES + [g for g in GROUPES.values() if g is not None]
+
+    return [
+        Etape("Stockage data/raw", sauvegarder(SaveRawData)),
+        Etape("Cellules vides", Nettoyeur.clean_empty_cells),
+        Etape("Caractères de contrôle", DetecteurCaracteresControle.detecter_caracteres_controle),
+        Etape("Caractères spéciaux", DetecteurCaracteresSpeciaux.detecter_caracteres_speciaux),
+        Etape(ETAPE_ENCODAGE, DetecteurProblemesEncodage.detecter_problemes_encodage),
+        Etape("Pourcentage de cacao", TransformateurPourcentageCacao.transformer_pourcentage,
+              lectures=pourcentage, ecritures=pourcentage),
+        Etape("Validation", ValidateurQualite.valider),
+        Etape("Types REF / Date", lambda df: TypeColonne.convertir_colonnes(df, types, int),
+              lectures=types, ecritures=types),
+        Etape("Uniformisation des pays", lambda df: UniformiserPays.uniformiser(df, pays),
+              lectures=pays, ecritures=pays),
+        Etape("Stockage data/interim", sauvegarder(SaveInterimData, partitionner=True)),
+        Etape("Imputation Type de fève", lambda df: ImputationAutre.imputer_colonne(df, "Type de fève"),
+              lectures=["Type de fève"], ecritures=["Type de fève"]),
+        Etape("Imputation Broad Bean Origin", lambda df: ImputationMode.imputer_colonne(df, "Broad Bean Origin"),
+              lectures=["Broad Bean Origin"], ecritures=["Broad Bean Origin"]),
+        Etape("Valeurs aberrantes", DetecteurAberrants.signaler, lectures=aberrants, ecritures=[]),
+        Etape("Doublons", Dedoublonneur.signaler, ecritures=[]),
+        Etape("Stockage data/processed", sauvegarder(SaveProcessedData, partitionner=True)),
+        Etape("Stockage SQL", sauvegarder(SaveSqlData)),
+    ]
+
+
+def _etapes_cacao_polars(partitions=None):
+    """
+    Mêmes étapes que _etapes_cacao, exécutées par le backend Polars.
+    Les sauvegardes passent par les classes Save* (conversion pandas) pour
+    produire exactement les mêmes fichiers que le chemin pandas.
+    """
+    from data.load.save_raw_data import SaveRawData
+    from data.load.save_interim_data import SaveInterimData
+    from data.load.save_processed_data import SaveProcessedData
+    from data.load.save_sql_data import SaveSqlData
+    from transformation.backend_polars import TransformationsPolars as T
+    from transformation.validation import ValidateurQualite
+    from imputation.valeurs_aberrantes import DetecteurAberrants, COLONNES, GROUPES
+    from transformation.deduplication import Dedoublonneur
+
+    def sauvegarder(classe, partitionner=False):
+        def etape(df):
+            df_pandas = df.to_pandas()
+            classe.save(df_pandas)
+            if partitionner and partitions:
+                classe.save(df_pandas, partitions=partitions)
+            return df
+        etape.classe = classe
+        return etape
+
+    def valider(df):
+        # Règles évaluées sur une copie pandas ; seules les lignes conformes sont gardées
+        conformes = ValidateurQualite.valider(df.to_pandas())
+        return df if len(conformes) == len(df) else df[conformes.index.to_numpy()]
+
+    def signaler_aberrants(df):
+        # Table annexe calculée sur une copie pandas ; le DataFrame n'est pas modifié
+        DetecteurAberrants.signaler(df.select(aberrants).to_pandas())
+        return df
+
+    def signaler_doublons(df):
+        # Rapport calculé sur une copie pandas ; le DataFrame n'est pas modifié
+        Dedoublonneur.signaler(df.to_pandas())
+        return df
+
+    pourcentage = ["Pourcentage de cacao"]
+    types = ["Date de la revue", "REF"]
+    pays = ["Localisation de l'entreprise", "Broad Bean Origin"]
+    aberrants = COLONNES + [g for g in GROUPES.values() if g is not None]
+
+    return [
+        Etape("Stockage data/raw", sauvegarder(SaveRawData)),
+        Etape("Cellules vides", T.cellules_vides),
+        Etape("Caractères de contrôle", T.caracteres_controle),
+        Etape("Caractères spéciaux", T.caracteres_speciaux),
+        Etape(ETAPE_ENCODAGE, T.problemes_encodage),
+        Etape("Pourcentage de cacao", T.pourcentage, lectures=pourcentage, ecritures=pourcentage),
+        Etape("Validation", valider),
+        Etape("Types REF / Date", lambda df: T.convertir_colonnes(df, types),
+              lectures=types, ecritures=types),
+        Etape("Uniformisation des pays", lambda df: T.uniformiser_pays(df, pays),
+              lectures=pays, ecritures=pays),
+        Etape("Stockage data/interim", sauvegarder(SaveInterimData, partitionner=True)),
+        Etape("Imputation Type de fève", lambda df: T.imputer_autre(df, "Type de fève"),
+              lectures=["Type de fève"], ecritures=["Type de fève"]),
+        Etape("Imputation Broad Bean Origin", lambda df: T.imputer_mode(df, "Broad Bean Origin"),
+              lectures=["Broad Bean Origin"], ecritures=["Broad Bean Origin"]),
+        Etape("Valeurs aberrantes", signaler_aberrants, lectures=aberrants, ecritures=[]),
+        Etape("Doublons", signaler_doublons, ecritures=[]),
+        Etape("Stockage data/processed", sauvegarder(SaveProcessedData, partitionner=True)),
+        Etape("Stockage SQL", sauvegarder(SaveSqlData)),
+    ]
+
+
+BACKENDS = ("pandas", "polars")
+
+
+class ExecutionAnnulee(Exception):
+    """Levée entre deux étapes quand l'exécution a été annulée"""
+
+
+def _executer_etapes(df, etapes, bus, run_id, annulation=None, journal=None):
+    """
+    Exécute les étapes dans l'ordre en publiant leur progression ; avec un
+    JournalLignee, les cellules modifiées par chaque transformation (hors
+    sauvegardes) sont enregistrées
+    """
+    for etape in map(Etape.depuis, etapes):
+        if annulation is not None and annulation.is_set():
+            raise ExecutionAnnulee(f"Exécution annulée avant l'étape '{etape.nom}'")
+        suivre = journal is not None and getattr(etape.fonction, 'classe', None) is None
+        # Instantané avant l'étape : certaines transformations modifient le DataFrame en place
+        avant = journal.instantane(df, etape.ecritures) if suivre else None
+        with bus.etape(run_id, etape.nom) as suivi:
+            df = etape.fonction(df)
+            suivi.lignes = len(df)
+        if suivre:
+            journal.enregistrer(etape.nom, avant, df)
+    return df
+
+
+class PipelineCacao:
+    """
+    Cette classe permet d'exécuter tout le pipeline ETL cacao hors notebook
+    """
+
+    @staticmethod
+    def extraire(source=None, backend="pandas"):
+        """
+        Extraction des données brutes
+
+        Arguments
+        ---------------
+            source : str, fichier local ou motif glob à lire (CSV/TSV, JSON Lines,
+                     Excel, page HTML enregistrée, voir ConnecteurFichiers) ;
+                     par défaut : web scraping
+            backend : str, 'pandas' ou 'polars' (type du DataFrame renvoyé)
+
+        Return
+        ---------------
+            df : pd.DataFrame ou pl.DataFrame
+        """
+        if backend == "polars":
+            from transformation.backend_polars import TransformationsPolars
+            if source is not None and source.lower().endswith(".csv") and os.path.isfile(source):
+                return TransformationsPolars.lire_csv(source)
+            import polars as pl
+            return pl.from_pandas(PipelineCacao.extraire(source))
+
+        if source is not None:
+            from extraction.connecteurs import ConnecteurFichiers
+            return ConnecteurFichiers.lire_motif(source)
+
+        from extraction.scraper import ScraperCacao
+        df = ScraperCacao.extract_data()
+        if df is None:
+            raise ValueError("L'extraction n'a renvoyé aucune donnée")
+        return df
+
+    @staticmethod
+    def _appliquer_rapport_encodage(df, etapes, bus, run_id):
+        """
+        Enregistre le rapport d'encodage de l'extraction ; s'il est propre
+        (tout a été décodé ou réparé à l'ingestion), l'étape de réparation
+        cellule par cellule est remplacée par une étape sans effet
+        """
+        rapport = getattr(df, 'attrs', {}).get('encodage')
+        if rapport is None:
+            return etapes
+
+        from extraction.encodage import DecodeurOctets
+        DecodeurOctets.sauvegarder(rapport)
+        bus.publier(run_id, 'encoding', propre=rapport['propre'], reparees=rapport['regions_reparees'],
+                    non_reparees=rapport['regions_non_reparees'])
+        if not rapport['propre']:
+            return etapes
+
+        print(f"Encodage propre à l'ingestion : étape '{ETAPE_ENCODAGE}' sautée")
+        return [Etape(e.nom, lambda df: df, lectures=[], ecritures=[]) if e.nom == ETAPE_ENCODAGE else e
+                for e in map(Etape.depuis, etapes)]
+
+    @staticmethod
+    def executer(source=None, bus=None, run_id=None, etapes=None, annulation=None,
+                 backend="pandas", incremental=False, partitions=None, lignee=False):
+        """
+        Exécute le pipeline en publiant la progression de chaque étape
+
+        Arguments
+        ---------------
+            source : str, fichier local ou motif glob à utiliser au lieu du scraping
+            bus : BusEvenements, bus de publication (par défaut la base du projet)
+            run_id : str, identifiant de l'exécution (généré si absent)
+            etapes : list d'Etape ou de (nom, fonction), étapes à la place des étapes cacao
+            annulation : threading.Event, vérifié avant chaque étape
+            backend : str, 'pandas' (par défaut) ou 'polars' (expressions
+                      colonnaires multithreadées, même résultat)
+            incremental : bool, ne nettoyer que les lignes ajoutées ou modifiées
+                          depuis le dernier instantané brut (voir PipelineIncremental)
+            partitions : list ou str, colonnes de partition des datasets interim et
+                         processed écrits aussi en Parquet (ex: 'year' ou
+                         'year,company_location')
+            lignee : bool, journaliser les cellules modifiées par chaque étape dans
+                     data/lignee/<run_id>.parquet (backend pandas)
+
+        Return
+        ---------------
+            df : pd.DataFrame (pl.DataFrame avec le backend polars), le dataset final
+        """
+        bus = bus or BusEvenements()
+        run_id = run_id or uuid.uuid4().hex[:12]
+        if backend not in BACKENDS:
+            raise ValueError(f"Backend '{backend}' inconnu (attendu : {', '.join(BACKENDS)})")
+        if incremental and backend != "pandas":
+            raise ValueError("L'exécution incrémentale n'est disponible qu'avec le backend pandas")
+        if lignee and backend != "pandas":
+            raise ValueError("Le lignage n'est disponible qu'avec le backend pandas")
+        if etapes is None:
+            etapes = _etapes_cacao_polars(partitions) if backend == "polars" else _etapes_cacao(partitions)
+
+        journal = None
+        if lignee:
+            from pipeline.lignee import JournalLignee
+            journal = JournalLignee(run_id)
+
+        bus.publier(run_id, 'run_start', nb_etapes=len(etapes) + 1, source=source or 'web', backend=backend,
+                    incremental=incremental)
+        try:
+            with bus.etape(run_id, "Extraction") as suivi:
+                df = PipelineCacao.extraire(source, backend)
+                suivi.lignes = len(df)
+            etapes = PipelineCacao._appliquer_rapport_encodage(df, etapes, bus, run_id)
+
+            if incremental:
+                from pipeline.incremental import PipelineIncremental
+                df = PipelineIncremental.appliquer(df, etapes, bus, run_id, annulation, journal)
+            else:
+                df = _executer_etapes(df, etapes, bus, run_id, annulation, journal)
+        except ExecutionAnnulee as e:
+            bus.publier(run_id, 'run_cancelled', erreur=str(e))
+            raise
+        except Exception as e:
+            bus.publier(run_id, 'run_error', erreur=str(e))
+            raise
+
+        if journal is not None:
+            journal.sauvegarder(index_final=df.index)
+            bus.publier(run_id, 'lineage', cellules=journal.resume()['total'])
+
+        bus.publier(run_id, 'run_end', lignes=len(df))
+        return df
@@ -0,0 +1,273 @@
+"""
+Module d'exécution incrémentale du pipeline (capture des changements)
+Une nouvelle extraction est comparée au dernier instantané brut par clé
+(REF, entreprise, origine, pourcentage) et empreinte de ligne : seules les
+lignes ajoutées ou modifiées passent par le nettoyage, puis sont fusionnées
+avec les lignes inchangées du dataset intermédiaire précédent
+"""
+
+import io
+import os
+
+import numpy as np
+import pandas as pd
+
+# REF seule n'est pas unique (un REF regroupe les avis d'une même session)
+CLE_NATURELLE = ["REF", "Company", "Origine spécifique du harirot", "Pourcentage de cacao"]
+
+
+class Changements:
+    """
+    Résultat de la comparaison de deux instantanés bruts :
+    - position : pour chaque ligne nouvelle, sa position dans l'ancien
+      instantané (-1 si insérée)
+    - inseres / modifies / inchanges : masques sur les lignes nouvelles
+    - supprimes : positions des lignes anciennes disparues
+    """
+
+    def __init__(self, position, inseres, modifies, supprimes):
+        self.position = position
+        self.inseres = inseres
+        self.modifies = modifies
+        self.inchanges = ~(inseres | modifies)
+        self.supprimes = supprimes
+
+    def resume(self):
+        return {
+            'inseres': int(self.inseres.sum()),
+            'modifies': int(self.modifies.sum()),
+            'supprimes': int(len(self.supprimes)),
+            'inchanges': int(self.inchanges.sum()),
+        }
+
+
+class CaptureChangements:
+    """
+    Cette classe compare deux instantanés bruts ligne à ligne par clé
+    naturelle et empreinte de contenu
+    """
+
+    @staticmethod
+    def normaliser(df):
+        """
+        Relit le DataFrame comme le CSV brut sauvegardé : une extraction web
+        (chaînes) et un instantané relu (nombres) deviennent comparables
+        """
+        tampon = io.StringIO()
+        df.to_csv(tampon, index=False)
+        tampon.seek(0)
+        return pd.read_csv(tampon)
+
+    @staticmethod
+    def cles(df, colonnes=None):
+        """
+        Clé 64 bits par ligne : colonnes clés + rang parmi les lignes de
+        même clé (les doublons restent distincts)
+        """
+        colonnes = [c for c in (colonnes or CLE_NATURELLE) if c in df.columns]
+        base = pd.util.hash_pandas_object(df[colonnes].astype(str), index=False).to_numpy()
+        rang = pd.Series(base).groupby(base).cumcount().to_numpy()
+        return pd.util.hash_pandas_object(pd.DataFrame({'cle': base, 'rang': rang}), index=False).to_numpy()
+
+    @staticmethod
+    def empreintes(df):
+        """Empreinte 64 bits du contenu complet de chaque ligne"""
+        return pd.util.hash_pandas_object(df.astype(str), index=False).to_numpy()
+
+    @staticmethod
+    def comparer(ancien, nouveau, colonnes=None):
+        """
+        Calcule les lignes insérées, modifiées et supprimées
+
+        Arguments
+        ---------------
+            ancien : pd.DataFrame, instantané brut précédent
+            nouveau : pd.DataFrame, nouvelle extraction (normalisée)
+            colonnes : list, colonnes de la clé naturelle
+
+        Return
+        ---------------
+            changements : Changements
+        """
+        if list(ancien.columns) != list(nouveau.columns):
+            raise ValueError("Les deux instantanés n'ont pas les mêmes colonnes")
+
+        cles_anciennes = CaptureChangements.cles(ancien, colonnes)
+        cles_nouvelles = CaptureChangements.cles(nouveau, colonnes)
+
+        position = pd.Index(cles_anciennes).get_indexer(cles_nouvelles)
+        inseres = position < 0
+
+        modifies = np.zeros(len(nouveau), dtype=bool)
+        communs = ~inseres
+        modifies[communs] = (CaptureChangements.empreintes(ancien)[position[communs]]
+                             != CaptureChangements.empreintes(nouveau)[communs])
+
+        supprimes = np.flatnonzero(~np.isin(cles_anciennes, cles_nouvelles))
+        return Changements(position, inseres, modifies, supprimes)
+
+
+class PipelineIncremental:
+    """
+    Cette classe applique les étapes du pipeline aux seules lignes changées :
+    - le nettoyage (étapes entre les sauvegardes raw et interim, toutes
+      ligne à ligne) ne traite que les lignes insérées ou modifiées
+    - le dataset intermédiaire est reconstitué avec les lignes inchangées
+      du précédent, dans l'ordre de la nouvelle extraction ; les lignes
+      brutes et intermédiaires sont alignées par position dans l'instantané
+      brut (colonne _ligne de la quarantaine pour les lignes écartées)
+    - la validation porte sur toutes les lignes (inchangées, mises en
+      quarantaine précédemment et changées) : unicité, rapport et
+      quarantaine sont ceux d'une exécution complète
+    - l'imputation s'applique au dataset intermédiaire complet : le mode
+      est une statistique de toute la colonne (simple fillna vectorisé)
+    - la base SQL reçoit les lignes finales par upsert
+    Sans instantané précédent cohérent, toutes les étapes sont exécutées.
+    """
+
+    @staticmethod
+    def _decouper(etapes):
+        """
+        Sépare les étapes aux sauvegardes
+
+        Return
+        ---------------
+            segments : list de (étape de sauvegarde, étapes qui la précèdent)
+            restantes : list d'étapes après la dernière sauvegarde
+        """
+        from pipeline.etapes import Etape
+
+        segments, courant = [], []
+        for etape in map(Etape.depuis, etapes):
+            if getattr(etape.fonction, 'classe', None) is not None:
+                segments.append((etape, courant))
+                courant = []
+            else:
+                courant.append(etape)
+        return segments, courant
+
+    @staticmethod
+    def _precedents(segments):
+        """
+        Lit les instantanés précédents
+
+        Return
+        ---------------
+            brut, intermediaire : pd.DataFrame
+            gardees : np.ndarray, position dans l'instantané brut de chaque
+                      ligne intermédiaire (les lignes en quarantaine en sont absentes)
+            quarantaine : pd.DataFrame ou None, lignes écartées par la validation
+            (None si les instantanés sont incohérents)
+        """
+        from data.load.save_raw_data import SaveRawData
+        from data.load.save_interim_data import SaveInterimData
+        from transformation.validation import QUARANTAINE_PATH
+
+        classes = [sauvegarde.fonction.classe for sauvegarde, _ in segments]
+        if classes[:2] != [SaveRawData, SaveInterimData]:
+            return None
+
+        chemins = ["data/raw/cacao_raw.csv", "data/interim/cacao_interim.csv"]
+        if not all(os.path.exists(c) for c in chemins):
+            return None
+
+        brut, intermediaire = (pd.read_csv(c) for c in chemins)
+        quarantaine = pd.read_csv(QUARANTAINE_PATH) if os.path.exists(QUARANTAINE_PATH) else None
+        rejetees = quarantaine['_ligne'].to_numpy() if quarantaine is not None else np.empty(0, dtype=np.int64)
+        gardees = np.setdiff1d(np.arange(len(brut)), rejetees)
+        if len(gardees) != len(intermediaire) or len(gardees) + len(rejetees) != len(brut):
+            return None
+        return brut, intermediaire, gardees, quarantaine
+
+    @staticmethod
+    def appliquer(df, etapes, bus, run_id, annulation=None, journal=None):
+        """
+        Exécute les étapes en ne nettoyant que les lignes changées
+
+        Arguments
+        ---------------
+            df : pd.DataFrame, la nouvelle extraction
+            etapes : list d'Etape, étapes du pipeline (sauvegardes comprises)
+            bus : BusEvenements, publication de la progression
+            run_id : str, identifiant de l'exécution
+            journal : JournalLignee, cellules modifiées (lignes repérées par leur
+                      position dans la nouvelle extraction)
+
+        Return
+        ---------------
+            df : pd.DataFrame, le dataset final complet
+        """
+        from pipeline.execution import _executer_etapes
+        from pipeline.etapes import Etape
+        from data.load.save_sql_data import SaveSqlData
+        from transformation.validation import ValidateurQualite
+
+        segments, restantes = PipelineIncremental._decouper(etapes)
+        precedents = PipelineIncremental._precedents(segments)
+        nouveau = CaptureChangements.normaliser(df)
+
+        changements = None
+        if precedents is not None and list(precedents[0].columns) == list(nouveau.columns):
+            with bus.etape(run_id, "Capture des changements") as suivi:
+                changements = CaptureChangements.comparer(precedents[0], nouveau)
+                suivi.lignes = int((~changements.inchanges).sum())
+            bus.publier(run_id, 'cdc', **changements.resume())
+            print(f"Changements depuis le dernier instantané : {changements.resume()}")
+
+        if changements is None:
+            print("Aucun instantané précédent cohérent : exécution complète")
+            return _executer_etapes(df, etapes, bus, run_id, annulation, journal)
+
+        # 1. Instantané brut complet
+        (sauvegarde_brut, avant_brut), (sauvegarde_interim, nettoyage) = segments[0], segments[1]
+        df = _executer_etapes(nouveau, avant_brut + [sauvegarde_brut], bus, run_id, annulation)
+
+        # 2. Lignes inchangées : reprises du dataset intermédiaire ou de la quarantaine précédente
+        brut, intermediaire, gardees, quarantaine = precedents
+        vers_interim = np.full(len(brut), -1)
+        vers_interim[gardees] = np.arange(len(gardees))
+        lignes = np.flatnonzero(changements.inchanges)
+        dans_interim = vers_interim[changements.position[lignes]]
+        reprises = intermediaire.iloc[dans_interim[dans_interim >= 0]]
+        reprises.index = df.index[lignes[dans_interim >= 0]]
+        requarantaine = df.iloc[0:0]
+        if quarantaine is not None and (dans_interim < 0).any():
+            requarantaine = (quarantaine.drop(columns='_regles').set_index('_ligne')
+                             .reindex(changements.position[lignes[dans_interim < 0]]))
+            requarantaine.index = df.index[lignes[dans_interim < 0]]
+
+        # 3. Nettoyage des seules lignes insérées ou modifiées, validation de toutes les lignes
+        validation = next((i for i, e in enumerate(nettoyage) if e.fonction is ValidateurQualite.valider), None)
+        avant_validation = nettoyage if validation is None else nettoyage[:validation]
+        apres_validation = [] if validation is None else nettoyage[validation + 1:]
+
+        partiel = df[~changements.inchanges]
+        if len(partiel):
+            partiel = _executer_etapes(partiel, avant_validation, bus, run_id, annulation, journal)
+        if validation is not None and len(df):
+            ensemble = pd.concat([t for t in (reprises, requarantaine, partiel) if len(t)]).sort_index()
+            conformes = _executer_etapes(ensemble, [nettoyage[validation]], bus, run_id, annulation)
+            reprises = reprises[reprises.index.isin(conformes.index)]
+            a_traiter = [t[t.index.isin(conformes.index)] for t in (requarantaine, partiel) if len(t)]
+            partiel = pd.concat(a_traiter).sort_index() if a_traiter else df.iloc[0:0]
+            if len(partiel):
+                partiel = _executer_etapes(partiel, apres_validation, bus, run_id, annulation, journal)
+
+        # 4. Dataset intermédiaire dans l'ordre de la nouvelle extraction
+        df = pd.concat([reprises, partiel]).sort_index() if len(partiel) else reprises
+        # (index gardé : positions dans l'extraction, comme en exécution complète, pour le lignage)
+        df = _executer_etapes(df, [sauvegarde_interim], bus, run_id, annulation)
+
+        # 5. Imputation et sauvegardes suivantes ; la base SQL est mise à jour par upsert
+        def upsert_sql(df):
+            SaveSqlData.upsert(df)
+            return df
+        upsert_sql.classe = SaveSqlData
+
+        for sauvegarde, avant in segments[2:]:
+            if sauvegarde.fonction.classe is SaveSqlData:
+                sauvegarde = Etape(sauvegarde.nom, upsert_sql)
+            df = _executer_etapes(df, avant + [sauvegarde], bus, run_id, annulation, journal)
+
+        return _executer_etapes(df, restantes, bus, run_id, annulation, journal)
+
@@ -0,0 +1,220 @@
+"""
+Module de lignage des cellules
+Chaque étape enregistre uniquement les cellules qu'elle a modifiées
+(ligne, colonne, valeur avant, valeur après) ; le journal d'une exécution
+est écrit en Parquet avec dictionnaires (étapes, colonnes et valeurs
+répétées stockées une seule fois) dans data/lignee/<run_id>.parquet
+"""
+
+import os
+import json
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+DOSSIER_LIGNEE = "data/lignee"
+
+
+def _en_texte(valeurs):
+    """Valeurs d'origine en texte (None pour les manquantes), types mélangés possibles"""
+    return [None if pd.isna(v) else str(v) for v in valeurs]
+
+
+class JournalLignee:
+    """
+    Cette classe collecte les modifications cellule par cellule des étapes
+    d'une exécution du pipeline. Les étapes doivent conserver l'index des
+    lignes (elles peuvent en retirer) ; les autres sont ignorées.
+
+    Les lignes sont repérées par leur position dans l'extraction (colonne
+    ligne) ; à la sauvegarde, ligne_finale donne leur position dans le
+    dataset final (cacao_clean.csv), -1 pour les lignes retirées (quarantaine).
+    """
+
+    def __init__(self, run_id):
+        self.run_id = run_id
+        self.etapes = []
+        self.morceaux = []
+
+    @staticmethod
+    def instantane(df, colonnes=None):
+        """Copie des seules colonnes que l'étape peut modifier (toutes si None)"""
+        if colonnes is None:
+            return df.copy()
+        return df[[c for c in df.columns if c in colonnes]].copy()
+
+    @staticmethod
+    def _differences(avant, apres):
+        """Masque des cellules modifiées entre deux colonnes alignées"""
+        manquants = avant.isna().to_numpy() & apres.isna().to_numpy()
+        if avant.dtype == apres.dtype:
+            differents = avant.ne(apres).to_numpy(dtype=bool, na_value=True)
+        else:
+            # Changement de type (ex: '70%' → 70.0) : comparaison des valeurs
+            differents = avant.astype(object).ne(apres.astype(object)).to_numpy(dtype=bool, na_value=True)
+        return differents & ~manquants
+
+    def enregistrer(self, nom, avant, apres):
+        """
+        Enregistre les cellules modifiées par une étape
+
+        Arguments
+        ---------------
+            nom : str, nom de l'étape
+            avant : pd.DataFrame, instantané des colonnes avant l'étape
+            apres : pd.DataFrame, résultat de l'étape
+
+        Return
+        ---------------
+            modifications : dict, nombre de cellules modifiées par colonne
+        """
+        ordre = len(self.etapes)
+        modifications = {}
+
+        if not avant.index.equals(apres.index):
+            if not (avant.index.is_unique and apres.index.isin(avant.index).all()):
+                print(f"Lignage ignoré pour l'étape '{nom}' : les lignes ont changé")
+                self.etapes.append({'etape': nom, 'modifications': None})
+                return None
+            # Étape qui retire des lignes (ex: validation) : comparaison des lignes restantes
+            avant = avant.loc[apres.index]
+
+        for col in apres.columns:
+            if col not in avant.columns:
+                continue
+            masque = JournalLignee._differences(avant[col], apres[col])
+            nb = int(masque.sum())
+            if not nb:
+                continue
+            modifications[col] = nb
+            self.morceaux.append(pd.DataFrame({
+                'ordre': np.full(nb, ordre, dtype=np.int16),
+                'etape': nom,
+                'colonne': col,
+                'ligne': avant.index[masque].to_numpy(dtype=np.int64),
+                'avant': _en_texte(avant[col].to_numpy()[masque]),
+                'apres': _en_texte(apres[col].to_numpy()[masque]),
+            }))
+
+        self.etapes.append({'etape': nom, 'modifications': modifications})
+        return modifications
+
+    def resume(self):
+        """Nombre de cellules modifiées par étape et par colonne"""
+        return {
+            'run_id': self.run_id,
+            'etapes': self.etapes,
+            'total': sum(sum(e['modifications'].values()) for e in self.etapes if e['modifications']),
+        }
+
+    def sauvegarder(self, dossier=DOSSIER_LIGNEE, index_final=None):
+        """
+        Écrit le journal en Parquet (colonnes texte encodées en dictionnaire)
+        et son résumé JSON
+
+        Arguments
+        ---------------
+            dossier : str, dossier du journal
+            index_final : pd.Index, index du dataset final (positions dans
+                          l'extraction des lignes gardées, dans l'ordre du CSV)
+
+        Return
+        ---------------
+            chemin : str, fichier Parquet écrit
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        os.makedirs(dossier, exist_ok=True)
+        colonnes = ['ordre', 'etape', 'colonne', 'ligne', 'avant', 'apres']
+        df = pd.concat(self.morceaux, ignore_index=True) if self.morceaux else pd.DataFrame(columns=colonnes)
+        lignes = df['ligne'].to_numpy(dtype=np.int64)
+        if index_final is None:
+            finales = lignes
+        else:
+            finales = pd.Index(index_final).get_indexer(lignes).astype(np.int64)
+
+        table = pa.table({
+            'ordre': pa.array(df['ordre'].to_numpy(dtype=np.int16)),
+            'etape': pa.array(df['etape'].astype(object), type=pa.string()).dictionary_encode(),
+            'colonne': pa.array(df['colonne'].astype(object), type=pa.string()).dictionary_encode(),
+            'ligne': pa.array(lignes),
+            'ligne_finale': pa.array(finales),
+            'avant': pa.array(df['avant'].astype(object), type=pa.string()).dictionary_encode(),
+            'apres': pa.array(df['apres'].astype(object), type=pa.string()).dictionary_encode(),
+        })
+
+        chemin = os.path.join(dossier, f"{self.run_id}.parquet")
+        temporaire = f"{chemin}.{os.getpid()}.tmp"
+        pq.write_table(table, temporaire, compression="zstd")
+        os.replace(temporaire, chemin)
+
+        resume = self.resume()
+        resume['date'] = datetime.now().isoformat()
+        resume['octets'] = os.path.getsize(chemin)
+        with open(os.path.join(dossier, f"{self.run_id}.json"), "w", encoding="utf-8") as f:
+            json.dump(resume, f, ensure_ascii=False, indent=2)
+
+        print(f"Lignage sauvegardé dans : {chemin} ({len(df)} cellule(s) modifiée(s), {resume['octets']} octets)")
+        return chemin
+
+    @staticmethod
+    def dernier_run(dossier=DOSSIER_LIGNEE):
+        """Identifiant de la dernière exécution journalisée (None si aucune)"""
+        if not os.path.isdir(dossier):
+            return None
+        resumes = [f for f in os.listdir(dossier) if f.endswith(".json")]
+        if not resumes:
+            return None
+        dernier = max(resumes, key=lambda f: os.path.getmtime(os.path.join(dossier, f)))
+        return os.path.splitext(dernier)[0]
+
+    @staticmethod
+    def charger_resume(run_id=None, dossier=DOSSIER_LIGNEE):
+        """Résumé JSON d'une exécution (la dernière par défaut)"""
+        run_id = run_id or JournalLignee.dernier_run(dossier)
+        chemin = os.path.join(dossier, f"{run_id}.json") if run_id else None
+        if chemin is None or not os.path.exists(chemin):
+            return None
+        with open(chemin, encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def historique(ligne=None, colonne=None, run_id=None, dossier=DOSSIER_LIGNEE, extraction=False):
+        """
+        Modifications d'une cellule, d'une ligne ou d'une colonne, dans l'ordre des étapes
+
+        Arguments
+        ---------------
+            ligne : int, position de la ligne dans le dataset final (cacao_clean.csv)
+            colonne : str, nom de la colonne
+            run_id : str, exécution (la dernière par défaut)
+            extraction : bool, ligne est la position dans l'extraction (CSV brut),
+                         seule façon de retrouver une ligne mise en quarantaine
+
+        Return
+        ---------------
+            modifications : pd.DataFrame (ordre, etape, colonne, ligne, ligne_finale, avant, apres)
+        """
+        import pyarrow.parquet as pq
+
+        run_id = run_id or JournalLignee.dernier_run(dossier)
+        chemin = os.path.join(dossier, f"{run_id}.parquet") if run_id else None
+        if chemin is None or not os.path.exists(chemin):
+            raise FileNotFoundError("Aucun lignage enregistré pour cette exécution")
+
+        # Journaux antérieurs à ligne_finale : seule la position dans l'extraction est connue
+        if 'ligne_finale' not in pq.read_schema(chemin).names:
+            extraction = True
+        filtres = []
+        if ligne is not None:
+            filtres.append(('ligne' if extraction else 'ligne_finale', '=', int(ligne)))
+        if colonne is not None:
+            filtres.append(('colonne', '=', colonne))
+
+        table = pq.read_table(chemin, filters=filtres or None)
+        df = table.to_pandas()
+        for col in ('etape', 'colonne', 'avant', 'apres'):
+            df[col] = df[col].astype(object).where(df[col].notna(), None)
+        return df.sort_values(['ligne', 'colonne', 'ordre'], kind='stable').reset_index(drop=True)
@@ -0,0 +1,283 @@
+"""
+Module des métriques de l'application (format d'exposition Prometheus)
+Chaque worker tient ses compteurs et histogrammes en mémoire ; en
+multiprocessus (dossier ETL_CACAO_METRIQUES ou PROMETHEUS_MULTIPROC_DIR)
+un thread recopie son état dans un fichier chaque seconde s'il a changé et
+/metrics additionne les fichiers de tous les workers, à la manière du
+MultiProcessCollector de prometheus_client
+"""
+
+import os
+import glob
+import json
+import time
+import atexit
+import bisect
+import threading
+from datetime import datetime
+
+# Bornes des histogrammes
+DUREES = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+TAILLES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+# Nom -> (type, aide, bornes des histogrammes)
+METRIQUES = {
+    'etl_cacao_http_requests_total': ('counter', "Requêtes HTTP par route, méthode et statut", None),
+    'etl_cacao_http_request_duration_seconds': ('histogram', "Durée des requêtes HTTP par route", DUREES),
+    'etl_cacao_http_response_size_bytes': ('histogram', "Taille des corps de réponse par route", TAILLES),
+    'etl_cacao_dataset_load_seconds': ('histogram', "Chargements de datasets (read_csv, Arrow) et leur durée", DUREES),
+    'etl_cacao_json_serialization_seconds': ('histogram', "Durée de sérialisation JSON par route", DUREES),
+    'etl_cacao_cache_requests_total': ('counter', "Réponses en cache : hit, miss ou not_modified (304)", None),
+    'etl_cacao_worker_resident_memory_bytes': ('gauge', "Mémoire résidente de chaque worker vivant", None),
+    'etl_cacao_pipeline_step_duration_seconds': ('gauge', "Durée des étapes de la dernière exécution", None),
+    'etl_cacao_pipeline_step_rows': ('gauge', "Lignes en sortie des étapes de la dernière exécution", None),
+    'etl_cacao_pipeline_last_run_timestamp_seconds': ('gauge', "Dernier changement de statut de la dernière exécution", None),
+}
+
+# Événement du bus -> statut de l'exécution
+STATUTS = {'run_start': 'running', 'run_end': 'success', 'run_error': 'error', 'run_cancelled': 'cancelled'}
+
+INTERVALLE_SAUVEGARDE = 1.0
+
+
+def _memoire_residente():
+    """Mémoire résidente du processus en octets (pic si /proc est absent)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _processus_vivant(pid):
+    """Vrai si le processus existe encore"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _nombre(valeur):
+    """Valeur au format d'exposition"""
+    if valeur == float("inf"):
+        return "+Inf"
+    if float(valeur).is_integer():
+        return str(int(valeur))
+    return repr(float(valeur))
+
+
+def _etiquettes(etiquettes):
+    """{a="b",...} avec les caractères échappés"""
+    if not etiquettes:
+        return ""
+    paires = (
+        f'{cle}="' + str(valeur).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for cle, valeur in etiquettes
+    )
+    return "{" + ",".join(paires) + "}"
+
+
+class Metriques:
+    """
+    Cette classe permet de compter les requêtes et d'observer des durées
+    ou des tailles dans des histogrammes, puis d'exposer l'ensemble au
+    format texte de Prometheus
+    - incrementer / observer : appelés à chaque requête (un verrou, quelques opérations)
+    - sauvegarder : fichier du worker, réécrit par un thread à chaque intervalle
+    - exposer : agrégation des workers et texte renvoyé par /metrics
+
+    Les fichiers des workers arrêtés sont conservés pour que les compteurs
+    ne reculent pas ; vider le dossier au démarrage du master gunicorn
+    (Metriques.nettoyer dans le hook on_starting).
+    """
+
+    def __init__(self, dossier=None, intervalle=INTERVALLE_SAUVEGARDE):
+        self.dossier = dossier
+        self.intervalle = intervalle
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+            atexit.register(self.sauvegarder)
+        self._reinitialiser()
+        # Un worker forké (gunicorn --preload) repart de zéro avec son propre fichier
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reinitialiser)
+
+    def _reinitialiser(self):
+        self.pid = os.getpid()
+        self.fichier = (os.path.join(self.dossier, f"metriques_{self.pid}_{time.time_ns()}.json")
+                        if self.dossier else None)
+        self.compteurs = {}
+        self.histogrammes = {}
+        self._modifie = False
+        self._verrou = threading.Lock()
+        if self.fichier is not None:
+            # Les threads ne survivent pas au fork : un par processus
+            threading.Thread(target=self._sauvegarder_en_continu, args=(self.pid,), daemon=True).start()
+
+    def _sauvegarder_en_continu(self, pid):
+        while self.pid == pid:
+            time.sleep(self.intervalle)
+            if self._modifie and self.pid == pid:
+                try:
+                    self.sauvegarder()
+                except OSError as e:
+                    print(f"⚠️ Métriques non sauvegardées : {e}")
+
+    def incrementer(self, nom, valeur=1, **etiquettes):
+        """Ajoute valeur au compteur nom pour ces étiquettes"""
+        cle = (nom, tuple(etiquettes.items()))
+        with self._verrou:
+            self.compteurs[cle] = self.compteurs.get(cle, 0) + valeur
+            self._modifie = True
+
+    def observer(self, nom, valeur, **etiquettes):
+        """Range valeur dans l'histogramme nom pour ces étiquettes"""
+        bornes = METRIQUES[nom][2]
+        cle = (nom, tuple(etiquettes.items()))
+        with self._verrou:
+            histogramme = self.histogrammes.get(cle)
+            if histogramme is None:
+                # Comptes par intervalle (le dernier pour +Inf), puis la somme
+                histogramme = self.histogrammes[cle] = [0] * (len(bornes) + 1) + [0.0]
+            histogramme[bisect.bisect_left(bornes, valeur)] += 1
+            histogramme[-1] += valeur
+            self._modifie = True
+
+    def etat(self):
+        """État du worker (sérialisable en JSON)"""
+        with self._verrou:
+            return {
+                'pid': self.pid,
+                'memoire': _memoire_residente(),
+                'compteurs': [[nom, etiquettes, valeur] for (nom, etiquettes), valeur in self.compteurs.items()],
+                'histogrammes': [[nom, etiquettes, list(h)] for (nom, etiquettes), h in self.histogrammes.items()],
+            }
+
+    def sauvegarder(self):
+        """Réécrit le fichier du worker (sans effet hors multiprocessus)"""
+        if self.fichier is None:
+            return
+        self._modifie = False
+        temporaire = f"{self.fichier}.tmp"
+        with open(temporaire, "w", encoding="utf-8") as f:
+            json.dump(self.etat(), f, ensure_ascii=False)
+        os.replace(temporaire, self.fichier)
+
+    def collecter(self):
+        """
+        Additionne l'état de tous les workers (le sien lu en mémoire)
+
+        Return
+        ----------------
+            compteurs : dict, (nom, étiquettes) -> valeur
+            histogrammes : dict, (nom, étiquettes) -> comptes et somme
+            memoires : dict, pid -> mémoire résidente des workers vivants
+        """
+        etats = [self.etat()]
+        if self.dossier:
+            for chemin in glob.glob(os.path.join(self.dossier, "metriques_*.json")):
+                if chemin == self.fichier:
+                    continue
+                try:
+                    with open(chemin, encoding="utf-8") as f:
+                        etats.append(json.load(f))
+                except (OSError, ValueError):
+                    # Fichier supprimé ou en cours de remplacement
+                    continue
+
+        compteurs, histogrammes, memoires = {}, {}, {}
+        for etat in etats:
+            if etat['pid'] == self.pid or _processus_vivant(etat['pid']):
+                memoires[etat['pid']] = etat['memoire']
+            for nom, etiquettes, valeur in etat['compteurs']:
+                cle = (nom, tuple(tuple(paire) for paire in etiquettes))
+                compteurs[cle] = compteurs.get(cle, 0) + valeur
+            for nom, etiquettes, valeurs in etat['histogrammes']:
+                cle = (nom, tuple(tuple(paire) for paire in etiquettes))
+                total = histogrammes.get(cle)
+                histogrammes[cle] = valeurs if total is None else [a + b for a, b in zip(total, valeurs)]
+        return compteurs, histogrammes, memoires
+
+    def exposer(self, jauges=()):
+        """
+        Texte au format d'exposition Prometheus (version 0.0.4)
+
+        Arguments
+        ---------------
+            jauges : list de (nom, étiquettes, valeur), ex: Metriques.jauges_pipeline(bus)
+
+        Return
+        ----------------
+            texte : str
+        """
+        compteurs, histogrammes, memoires = self.collecter()
+        series = {nom: [] for nom in METRIQUES}
+
+        for (nom, etiquettes), valeur in sorted(compteurs.items()):
+            series[nom].append(f"{nom}{_etiquettes(etiquettes)} {_nombre(valeur)}")
+
+        for (nom, etiquettes), valeurs in sorted(histogrammes.items()):
+            bornes = METRIQUES[nom][2]
+            cumul = 0
+            for borne, compte in zip(bornes + (float("inf"),), valeurs):
+                cumul += compte
+                series[nom].append(f"{nom}_bucket{_etiquettes(etiquettes + (('le', _nombre(borne)),))} {cumul}")
+            series[nom].append(f"{nom}_sum{_etiquettes(etiquettes)} {_nombre(valeurs[-1])}")
+            series[nom].append(f"{nom}_count{_etiquettes(etiquettes)} {cumul}")
+
+        for pid, memoire in sorted(memoires.items()):
+            series['etl_cacao_worker_resident_memory_bytes'].append(
+                f"etl_cacao_worker_resident_memory_bytes{_etiquettes((('pid', pid),))} {memoire}")
+
+        for nom, etiquettes, valeur in jauges:
+            series[nom].append(f"{nom}{_etiquettes(tuple(etiquettes.items()))} {_nombre(valeur)}")
+
+        lignes = []
+        for nom, (type_metrique, aide, _) in METRIQUES.items():
+            if series[nom]:
+                lignes.append(f"# HELP {nom} {aide}")
+                lignes.append(f"# TYPE {nom} {type_metrique}")
+                lignes.extend(series[nom])
+        return "\n".join(lignes) + "\n"
+
+    @staticmethod
+    def jauges_pipeline(bus):
+        """
+        Durée et lignes de chaque étape de la dernière exécution, relues
+        dans le bus d'événements (partagé par tous les workers)
+
+        Return
+        ----------------
+            jauges : list de (nom, étiquettes, valeur)
+        """
+        run_id = bus.dernier_run()
+        if run_id is None:
+            return []
+
+        jauges, statut, horodatage = [], 'running', None
+        for evenement in bus.lire(run_id=run_id, limite=100000):
+            if evenement['type'] == 'step_end':
+                etiquettes = {'step': evenement['etape']}
+                if evenement['duree'] is not None:
+                    jauges.append(('etl_cacao_pipeline_step_duration_seconds', etiquettes, evenement['duree']))
+                if evenement['lignes'] is not None:
+                    jauges.append(('etl_cacao_pipeline_step_rows', etiquettes, evenement['lignes']))
+            elif evenement['type'] in STATUTS:
+                statut = STATUTS[evenement['type']]
+                horodatage = evenement['horodatage']
+
+        # Sans événement de statut (historique purgé ou tronqué), pas d'horodatage à exposer
+        if horodatage is not None:
+            jauges.append(('etl_cacao_pipeline_last_run_timestamp_seconds', {'run_id': run_id, 'status': statut},
+                           datetime.fromisoformat(horodatage).timestamp()))
+        return jauges
+
+    @staticmethod
+    def nettoyer(dossier):
+        """Supprime les fichiers des workers d'un démarrage précédent"""
+        for chemin in glob.glob(os.path.join(dossier, "metriques_*.json*")):
+            os.remove(chemin)
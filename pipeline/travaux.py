@@ -0,0 +1,318 @@
+"""
+Module de la file des exécutions du pipeline
+Les exécutions demandées par l'API sont enregistrées dans la base SQLite du
+bus d'événements et prises en charge par des threads dédiés : le thread de
+la requête ne fait qu'enfiler. La file est commune à tous les processus
+(workers gunicorn) : dédoublonnage, capacité, nombre d'exécutions
+simultanées, suivi et annulation sont globaux.
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+import contextlib
+from datetime import datetime
+
+from pipeline.evenements import BusEvenements
+from pipeline.execution import ExecutionAnnulee, PipelineCacao
+
+# Attente maximale entre deux recherches de travail en attente (secondes)
+INTERVALLE_SCRUTATION = 1.0
+# Bail d'un travail en cours (secondes), renouvelé au tiers de sa durée par le
+# worker qui l'exécute : un bail expiré (worker arrêté) libère la place
+DUREE_BAIL = 30.0
+
+
+class FilePleine(Exception):
+    """Levée quand la file d'attente a atteint sa capacité"""
+
+
+class Travail:
+    """Une exécution du pipeline demandée par l'API (ligne de la table travaux)"""
+
+    COLONNES = ('id', 'parametres', 'statut', 'cree_le', 'debut', 'fin', 'lignes', 'erreur')
+
+    def __init__(self, ligne):
+        valeurs = dict(zip(Travail.COLONNES, ligne))
+        self.id = valeurs['id']
+        self.parametres = json.loads(valeurs['parametres'])
+        self.statut = valeurs['statut']
+        self.cree_le = valeurs['cree_le']
+        self.debut = valeurs['debut']
+        self.fin = valeurs['fin']
+        self.lignes = valeurs['lignes']
+        self.erreur = valeurs['erreur']
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'status': self.statut,
+            'parameters': self.parametres,
+            'created_at': self.cree_le,
+            'started_at': self.debut,
+            'finished_at': self.fin,
+            'rows': self.lignes,
+            'error': self.erreur,
+        }
+
+
+class _AnnulationPartagee:
+    """Drapeau d'annulation relu dans la base (posé depuis n'importe quel worker)"""
+
+    def __init__(self, file_travaux, job_id):
+        self.file_travaux = file_travaux
+        self.job_id = job_id
+
+    def is_set(self):
+        with self.file_travaux._connexion() as connexion:
+            ligne = connexion.execute("SELECT annulation FROM travaux WHERE id = ?", (self.job_id,)).fetchone()
+        return bool(ligne and ligne[0])
+
+
+class FileTravaux:
+    """
+    Cette classe gère la file bornée des exécutions du pipeline, partagée
+    entre processus par la base SQLite du bus :
+    - capacité maximale de travaux en attente (FilePleine au-delà)
+    - nb_workers exécutions simultanées au plus, tous processus confondus
+      (1 par défaut : une seule exécution écrit les datasets à la fois)
+    - une demande identique à un travail encore en attente renvoie ce travail
+    - annulation des travaux en attente ou en cours (entre deux étapes)
+    Un travail en cours dont le bail n'est plus renouvelé (processus arrêté,
+    même si son pid a été réutilisé) est marqué 'failed'. Les workers
+    inactifs ne prennent le verrou d'écriture que s'il y a un travail à
+    réclamer (ou un bail expiré).
+    """
+
+    def __init__(self, bus=None, nb_workers=1, capacite=4, historique=50):
+        self.bus = bus or BusEvenements()
+        self.nb_workers = nb_workers
+        self.capacite = capacite
+        self.historique = historique
+        self.reveil = threading.Event()
+
+        with self._connexion() as connexion:
+            connexion.execute("""
+                CREATE TABLE IF NOT EXISTS travaux (
+                    id TEXT PRIMARY KEY,
+                    parametres TEXT NOT NULL,
+                    statut TEXT NOT NULL,
+                    cree_le TEXT NOT NULL,
+                    debut TEXT,
+                    fin TEXT,
+                    lignes INTEGER,
+                    erreur TEXT,
+                    annulation INTEGER NOT NULL DEFAULT 0,
+                    pid INTEGER,
+                    bail REAL
+                )
+            """)
+            if 'bail' not in [ligne[1] for ligne in connexion.execute("PRAGMA table_info(travaux)")]:
+                connexion.execute("ALTER TABLE travaux ADD COLUMN bail REAL")
+            connexion.execute("CREATE INDEX IF NOT EXISTS travaux_statut ON travaux (statut, cree_le)")
+
+        for i in range(nb_workers):
+            threading.Thread(target=self._boucle, name=f"pipeline-worker-{i}", daemon=True).start()
+
+    def _connexion(self):
+        # isolation_level=None : transactions explicites (BEGIN IMMEDIATE)
+        connexion = sqlite3.connect(self.bus.chemin, timeout=10, isolation_level=None)
+        connexion.execute("PRAGMA journal_mode=WAL")
+        return contextlib.closing(connexion)
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Transaction avec verrou d'écriture pris dès le début (une seule à la fois, tous processus)"""
+        with self._connexion() as connexion:
+            connexion.execute("BEGIN IMMEDIATE")
+            try:
+                yield connexion
+            except BaseException:
+                connexion.execute("ROLLBACK")
+                raise
+            connexion.execute("COMMIT")
+
+    @staticmethod
+    def _lire(connexion, job_id):
+        ligne = connexion.execute(
+            f"SELECT {', '.join(Travail.COLONNES)} FROM travaux WHERE id = ?", (job_id,)
+        ).fetchone()
+        return Travail(ligne) if ligne else None
+
+    def soumettre(self, parametres):
+        """
+        Met une exécution en file
+
+        Arguments
+        ---------------
+            parametres : dict, paramètres de PipelineCacao.executer (ex: {'source': ...})
+
+        Return
+        ---------------
+            travail : Travail, le travail créé ou le travail identique déjà en attente
+            doublon : bool, True si une demande identique était déjà en attente
+        """
+        cle = json.dumps(parametres, sort_keys=True)
+        with self._transaction() as connexion:
+            ligne = connexion.execute(
+                "SELECT id FROM travaux WHERE statut = 'pending' AND parametres = ?", (cle,)
+            ).fetchone()
+            if ligne:
+                return self._lire(connexion, ligne[0]), True
+
+            en_attente = connexion.execute("SELECT COUNT(*) FROM travaux WHERE statut = 'pending'").fetchone()[0]
+            if en_attente >= self.capacite:
+                raise FilePleine(f"File d'attente pleine ({self.capacite} exécutions en attente)")
+
+            job_id = uuid.uuid4().hex[:12]
+            connexion.execute(
+                "INSERT INTO travaux (id, parametres, statut, cree_le) VALUES (?, ?, 'pending', ?)",
+                (job_id, cle, datetime.now().isoformat())
+            )
+            self._purger(connexion)
+            travail = self._lire(connexion, job_id)
+
+        self.reveil.set()
+        return travail, False
+
+    def annuler(self, job_id):
+        """
+        Annule un travail en attente (immédiatement) ou en cours (avant l'étape suivante)
+
+        Return
+        ---------------
+            travail : Travail ou None si l'identifiant est inconnu
+        """
+        with self._transaction() as connexion:
+            connexion.execute("UPDATE travaux SET annulation = 1 WHERE id = ?", (job_id,))
+            connexion.execute(
+                "UPDATE travaux SET statut = 'cancelled', fin = ? WHERE id = ? AND statut = 'pending'",
+                (datetime.now().isoformat(), job_id)
+            )
+            return self._lire(connexion, job_id)
+
+    def obtenir(self, job_id):
+        """Renvoie le travail (ou None)"""
+        with self._connexion() as connexion:
+            return self._lire(connexion, job_id)
+
+    def lister(self):
+        """Renvoie les travaux, du plus récent au plus ancien"""
+        with self._connexion() as connexion:
+            lignes = connexion.execute(
+                f"SELECT {', '.join(Travail.COLONNES)} FROM travaux ORDER BY cree_le DESC"
+            ).fetchall()
+        return [Travail(ligne) for ligne in lignes]
+
+    def progression(self, job_id):
+        """
+        Progression par étape d'un travail, reconstruite depuis le bus d'événements
+
+        Return
+        ---------------
+            etapes : list de dict (nom, statut, lignes, durée)
+        """
+        etapes = {}
+        for evenement in self.bus.lire(0, run_id=job_id):
+            nom = evenement['etape']
+            if nom is None:
+                continue
+            statut = {'step_start': 'running', 'step_end': 'completed', 'step_error': 'failed'}[evenement['type']]
+            etapes[nom] = {'step': nom, 'status': statut, 'rows': evenement['lignes'], 'duration': evenement['duree']}
+        return list(etapes.values())
+
+    def _purger(self, connexion):
+        """Oublie les travaux terminés les plus anciens au-delà de l'historique"""
+        connexion.execute("""
+            DELETE FROM travaux WHERE id IN (
+                SELECT id FROM travaux WHERE statut NOT IN ('pending', 'running')
+                ORDER BY cree_le DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.historique,))
+
+    def _reclamer(self):
+        """
+        Prend le plus ancien travail en attente si moins de nb_workers
+        exécutions sont en cours (tous processus confondus)
+
+        Return
+        ---------------
+            travail : Travail ou None
+        """
+        maintenant = time.time()
+        # Simple lecture d'abord : pas de verrou d'écriture tant que rien n'est à faire
+        with self._connexion() as connexion:
+            a_faire = connexion.execute(
+                "SELECT EXISTS (SELECT 1 FROM travaux WHERE statut = 'pending') "
+                "OR EXISTS (SELECT 1 FROM travaux WHERE statut = 'running' AND COALESCE(bail, 0) < ?)",
+                (maintenant,)
+            ).fetchone()[0]
+        if not a_faire:
+            return None
+
+        with self._transaction() as connexion:
+            connexion.execute(
+                "UPDATE travaux SET statut = 'failed', fin = ?, erreur = ? "
+                "WHERE statut = 'running' AND COALESCE(bail, 0) < ?",
+                (datetime.now().isoformat(), "Worker arrêté pendant l'exécution (bail expiré)", maintenant)
+            )
+            en_cours = connexion.execute("SELECT COUNT(*) FROM travaux WHERE statut = 'running'").fetchone()[0]
+            if en_cours >= self.nb_workers:
+                return None
+            ligne = connexion.execute(
+                "SELECT id FROM travaux WHERE statut = 'pending' ORDER BY cree_le LIMIT 1"
+            ).fetchone()
+            if ligne is None:
+                return None
+            connexion.execute(
+                "UPDATE travaux SET statut = 'running', debut = ?, pid = ?, bail = ? WHERE id = ?",
+                (datetime.now().isoformat(), os.getpid(), maintenant + DUREE_BAIL, ligne[0])
+            )
+            return self._lire(connexion, ligne[0])
+
+    def _renouveler_bail(self, job_id, fini):
+        """Prolonge le bail du travail en cours jusqu'à ce que fini soit posé"""
+        while not fini.wait(DUREE_BAIL / 3):
+            try:
+                with self._connexion() as connexion:
+                    connexion.execute("UPDATE travaux SET bail = ? WHERE id = ? AND statut = 'running'",
+                                      (time.time() + DUREE_BAIL, job_id))
+            except sqlite3.Error:
+                continue
+
+    def _terminer(self, job_id, statut, lignes=None, erreur=None):
+        with self._transaction() as connexion:
+            connexion.execute(
+                "UPDATE travaux SET statut = ?, fin = ?, lignes = ?, erreur = ? WHERE id = ?",
+                (statut, datetime.now().isoformat(), lignes, erreur, job_id)
+            )
+
+    def _boucle(self):
+        while True:
+            try:
+                travail = self._reclamer()
+            except sqlite3.Error:
+                travail = None
+            if travail is None:
+                self.reveil.wait(INTERVALLE_SCRUTATION)
+                self.reveil.clear()
+                continue
+
+            fini = threading.Event()
+            threading.Thread(target=self._renouveler_bail, args=(travail.id, fini),
+                             name=f"bail-{travail.id}", daemon=True).start()
+            try:
+                df = PipelineCacao.executer(
+                    bus=self.bus, run_id=travail.id, annulation=_AnnulationPartagee(self, travail.id),
+                    **travail.parametres
+                )
+                self._terminer(travail.id, 'completed', lignes=len(df))
+            except ExecutionAnnulee:
+                self._terminer(travail.id, 'cancelled')
+            except Exception as e:
+                self._terminer(travail.id, 'failed', erreur=str(e))
+            finally:
+                fini.set()
@@ -0,0 +1,99 @@
+"""
+Tests de parité entre les backends pandas et Polars
+Chaque transformation puis le pipeline complet doivent produire les mêmes
+résultats cellule par cellule, sur le CSV brut comme sur les cas limites.
+Les étapes qui écrivent des fichiers (quarantaine, valeurs aberrantes,
+stockages) s'exécutent dans un dossier temporaire.
+
+Usage : python -m pytest tests
+"""
+
+import io
+import os
+import shutil
+import contextlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pl = pytest.importorskip("polars")
+
+from benchmarks.bench_backend_polars import comparer, jeu_synthetique, verifier_parite
+from pipeline.evenements import BusEvenements
+from pipeline.execution import PipelineCacao
+from transformation.backend_polars import TransformationsPolars
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CSV_BRUT = os.path.join(RACINE, 'data', 'raw', 'cacao_raw.csv')
+
+
+@pytest.fixture
+def dossier_temporaire(tmp_path, monkeypatch):
+    """Dossier de travail isolé contenant data/raw/cacao_raw.csv"""
+    os.makedirs(tmp_path / 'data' / 'raw')
+    shutil.copy(CSV_BRUT, tmp_path / 'data' / 'raw' / 'cacao_raw.csv')
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def _relus(df):
+    """Le même CSV relu par chaque backend"""
+    tampon = io.StringIO()
+    df.to_csv(tampon, index=False)
+    return (pd.read_csv(io.StringIO(tampon.getvalue())),
+            TransformationsPolars.lire_csv(io.BytesIO(tampon.getvalue().encode('utf-8'))))
+
+
+def test_lecture_csv_brut():
+    comparer(pd.read_csv(CSV_BRUT), TransformationsPolars.lire_csv(CSV_BRUT), "lecture du CSV brut")
+
+
+def test_parite_csv_brut(dossier_temporaire):
+    verifier_parite(pd.read_csv(CSV_BRUT), TransformationsPolars.lire_csv(CSV_BRUT), "CSV brut")
+
+
+def test_parite_cas_limites(dossier_temporaire):
+    synthetique = jeu_synthetique(5_000)
+    verifier_parite(synthetique, pl.from_pandas(synthetique), "Cas limites")
+
+
+def test_parite_cas_limites_relus(dossier_temporaire):
+    verifier_parite(*_relus(jeu_synthetique(5_000, graine=1)), "Cas limites relus")
+
+
+@pytest.mark.parametrize("colonne, valeurs", [
+    ('Company', ['', ' ', '\t\n', '\xa0']),
+    ('Company', ['Na\x01ve', 'Bon\x7fnat', 'CafÃ© Noir', 'Ã‰clat']),
+    ('Broad Bean Origin', ['U.S.A.', 'dominican republic', 'venezuela/ ghana', np.nan]),
+    ("Localisation de l'entreprise", ['u.k.', 'UK', 'new zealand', 'sao tome & principe']),
+    ('Pourcentage de cacao', ['70.5%', ' 72% ', '100%', '0%']),
+    ('Type de fève', ['\xa0', 'Criollo (Ã©)', 'Forastero�', np.nan]),
+])
+def test_parite_cas_limite_isole(dossier_temporaire, colonne, valeurs):
+    df = pd.read_csv(CSV_BRUT).head(len(valeurs) * 10).copy()
+    df['REF'] = np.arange(1, len(df) + 1)
+    df[colonne] = np.resize(np.array(valeurs, dtype=object), len(df))
+    verifier_parite(*_relus(df), f"{colonne} : {valeurs!r}")
+
+
+def test_pipeline_complet_fichiers_identiques(tmp_path, monkeypatch):
+    contenus = {}
+    for backend in ("pandas", "polars"):
+        dossier = tmp_path / backend
+        os.makedirs(dossier / 'data' / 'raw')
+        shutil.copy(CSV_BRUT, dossier / 'data' / 'raw' / 'source.csv')
+        monkeypatch.chdir(dossier)
+        with contextlib.redirect_stdout(io.StringIO()):
+            PipelineCacao.executer(source='data/raw/source.csv', backend=backend,
+                                   bus=BusEvenements('evenements.sqlite'))
+        contenus[backend] = {}
+        for etage in ('raw', 'interim', 'processed'):
+            for nom in sorted(os.listdir(os.path.join('data', etage))):
+                if nom.endswith('.csv') and nom != 'source.csv':
+                    with open(os.path.join('data', etage, nom), 'rb') as f:
+                        contenus[backend][f"{etage}/{nom}"] = f.read()
+
+    assert contenus['pandas'].keys() == contenus['polars'].keys()
+    for nom, contenu in contenus['pandas'].items():
+        assert contenu == contenus['polars'][nom], f"{nom} diffère entre pandas et Polars"
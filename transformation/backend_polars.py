@@ -0,0 +1,223 @@
+"""
+Module du backend Polars des transformations
+Les mêmes opérations que les classes pandas du package, écrites en
+expressions colonnaires Polars (multithreadées, sans boucle Python par
+cellule). Le résultat est identique à celui du chemin pandas : voir
+benchmarks/bench_backend_polars.py pour la vérification de parité.
+Nécessite polars (dépendance optionnelle).
+"""
+
+from transformation.schema import SchemaColonnes
+
+# Valeurs lues comme manquantes par pandas.read_csv (na_values par défaut)
+VALEURS_MANQUANTES = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+    '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None',
+    'n/a', 'nan', 'null',
+]
+
+CARACTERES_SPECIAUX = ['#', '@', '$', '&', '*', '+', '=', '|', '\\', '/', '?', '!', '~', '`', '^', '°']
+
+# Mêmes corrections, dans le même ordre, que DetecteurProblemesEncodage
+PROBLEMES_ENCODAGE = {
+    '\uFFFD': '',  # caractère de remplacement Unicode
+    'Nave': 'Naive',
+    'Nve': 'Naive',
+    'Ã©': 'é',
+    'Ã ': 'à',
+    'Ã¨': 'è',
+    'Ã§': 'ç',
+    'Ã´': 'ô',
+    'Ã®': 'î',
+    'Ã¯': 'ï',
+}
+
+EXCEPTIONS_PAYS = ["U.S.A.", "USA", "U.K.", "UK", "UAE", "U.A.E."]
+
+
+def _pl():
+    """Import de polars à la demande (dépendance optionnelle)"""
+    try:
+        import polars as pl
+    except ImportError:
+        raise ValueError("Le backend 'polars' nécessite polars (pip install polars)")
+    return pl
+
+
+class TransformationsPolars:
+    """
+    Cette classe regroupe les transformations du pipeline cacao pour des
+    DataFrames Polars. Les étapes globales ne portent que sur les colonnes
+    texte du schéma partagé (SchemaColonnes), comme les versions pandas.
+    """
+
+    @staticmethod
+    def disponible():
+        """Indique si polars est installé"""
+        try:
+            import polars  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    @staticmethod
+    def lire_csv(chemin):
+        """
+        Lit un CSV brut avec les mêmes valeurs manquantes que pandas.read_csv
+
+        Arguments
+        ---------------
+            chemin : str, fichier CSV
+
+        Return
+        ---------------
+            df : pl.DataFrame
+        """
+        pl = _pl()
+        return pl.read_csv(chemin, null_values=VALEURS_MANQUANTES, infer_schema_length=10000)
+
+    @staticmethod
+    def _colonnes_texte(df):
+        # Même routage que le chemin pandas (schéma partagé)
+        return SchemaColonnes.colonnes(df)
+
+    @staticmethod
+    def _appliquer(df, expression):
+        """Applique expression(col) à toutes les colonnes texte en un seul plan"""
+        colonnes = TransformationsPolars._colonnes_texte(df)
+        if not colonnes:
+            return df
+        return df.lazy().with_columns([expression(c) for c in colonnes]).collect()
+
+    @staticmethod
+    def _verifier(df, colonne):
+        pl = _pl()
+        if not isinstance(df, pl.DataFrame):
+            raise ValueError("df doit être un DataFrame polars")
+        if colonne is not None and colonne not in df.columns:
+            raise ValueError(f"La colonne '{colonne}' n'existe pas dans le DataFrame")
+
+    @staticmethod
+    def cellules_vides(df):
+        """Équivalent de Nettoyeur.clean_empty_cells : chaînes blanches → null"""
+        pl = _pl()
+        TransformationsPolars._verifier(df, None)
+        # Toutes les colonnes de chaînes, comme Nettoyeur.clean_empty_cells
+        colonnes = SchemaColonnes.chaines(df)
+        if not colonnes:
+            return df
+        return df.lazy().with_columns([
+            pl.when(pl.col(c).str.contains(r'^\s*$')).then(None).otherwise(pl.col(c)).alias(c) for c in colonnes
+        ]).collect()
+
+    @staticmethod
+    def caracteres_controle(df):
+        """Équivalent de DetecteurCaracteresControle : suppression des catégories C* sauf \\n\\r\\t"""
+        pl = _pl()
+        TransformationsPolars._verifier(df, None)
+        return TransformationsPolars._appliquer(
+            df, lambda c: pl.col(c).str.replace_all(r'[\p{C}--[\t\n\r]]', '')
+        )
+
+    @staticmethod
+    def caracteres_speciaux(df, caracteres_cibles=None):
+        """
+        Équivalent de DetecteurCaracteresSpeciaux : caractères cibles retirés
+        en début et fin de chaîne ; comme la version pandas, la valeur n'est
+        réécrite (sans ses blancs extérieurs) que si un caractère a été retiré
+        """
+        pl = _pl()
+        TransformationsPolars._verifier(df, None)
+        cibles = ''.join(caracteres_cibles if caracteres_cibles is not None else CARACTERES_SPECIAUX)
+
+        def expression(c):
+            texte = pl.col(c).str.strip_chars()
+            nettoye = texte.str.strip_chars(cibles)
+            return pl.when(nettoye != texte).then(nettoye).otherwise(pl.col(c)).alias(c)
+
+        return TransformationsPolars._appliquer(df, expression)
+
+    @staticmethod
+    def problemes_encodage(df):
+        """Équivalent de DetecteurProblemesEncodage : corrections appliquées dans l'ordre"""
+        pl = _pl()
+        TransformationsPolars._verifier(df, None)
+
+        def expression(c):
+            e = pl.col(c)
+            for faux, correct in PROBLEMES_ENCODAGE.items():
+                e = e.str.replace_all(faux, correct, literal=True)
+            return e.alias(c)
+
+        return TransformationsPolars._appliquer(df, expression)
+
+    @staticmethod
+    def pourcentage(df, colonne="Pourcentage de cacao"):
+        """
+        Équivalent de TransformateurPourcentageCacao : '%' retiré puis
+        conversion numérique (entiers si toutes les valeurs sont entières et
+        présentes, comme pandas.to_numeric)
+        """
+        pl = _pl()
+        TransformationsPolars._verifier(df, colonne)
+
+        texte = df[colonne].cast(pl.String).str.replace_all('%', '', literal=True).str.strip_chars()
+        valeurs = texte.cast(pl.Float64, strict=False)
+        if valeurs.null_count() == 0 and texte.str.contains(r'^[+-]?\d+$').all():
+            valeurs = texte.cast(pl.Int64)
+
+        return df.with_columns(valeurs.alias(colonne))
+
+    @staticmethod
+    def convertir_colonnes(df, colonnes, dtype=None):
+        """Équivalent de TypeColonne.convertir_colonnes (entiers 64 bits par défaut)"""
+        pl = _pl()
+        if isinstance(colonnes, str):
+            colonnes = [colonnes]
+        for col in colonnes:
+            TransformationsPolars._verifier(df, col)
+        return df.with_columns([pl.col(c).cast(dtype or pl.Int64) for c in colonnes])
+
+    @staticmethod
+    def uniformiser_pays(df, colonnes, exceptions=None):
+        """Équivalent de UniformiserPays.uniformiser (mode 'capitalisation')"""
+        pl = _pl()
+        if exceptions is None:
+            exceptions = EXCEPTIONS_PAYS
+
+        expressions = []
+        for col in colonnes:
+            if col not in df.columns:
+                print(f"Colonne '{col}' introuvable dans le DataFrame")
+                continue
+
+            # Comme str.split() + capitalize() : découpage sur les blancs,
+            # première lettre de chaque mot en majuscule, le reste en minuscules
+            texte = pl.col(col).str.strip_chars()
+            mot = pl.element()
+            capitalise = (
+                texte.str.replace_all(r'\s+', ' ').str.split(' ')
+                .list.eval(mot.str.slice(0, 1).str.to_uppercase() + mot.str.slice(1).str.to_lowercase())
+                .list.join(' ')
+            )
+            expressions.append(
+                pl.when(texte == '').then(pl.col(col))
+                .when(texte.is_in(exceptions)).then(texte)
+                .otherwise(capitalise)
+                .alias(col)
+            )
+
+        return df.lazy().with_columns(expressions).collect() if expressions else df
+
+    @staticmethod
+    def imputer_autre(df, colonne):
+        """Équivalent de ImputationAutre.imputer_colonne"""
+        TransformationsPolars._verifier(df, colonne)
+        return df.with_columns(df[colonne].fill_null("Autre"))
+
+    @staticmethod
+    def imputer_mode(df, colonne):
+        """Équivalent de ImputationMode.imputer_colonne (plus petite valeur en cas d'égalité)"""
+        TransformationsPolars._verifier(df, colonne)
+        mode = df[colonne].drop_nulls().mode().sort()[0]
+        return df.with_columns(df[colonne].fill_null(mode))
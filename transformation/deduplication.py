@@ -0,0 +1,296 @@
+"""
+Module de détection des doublons
+Classe pour détecter les doublons exacts (hachage des lignes) et les
+quasi-doublons (blocage + similarité MinHash sur n-grammes)
+"""
+
+import re
+import zlib
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+# Nombre premier de Mersenne (2^31 - 1) : a * h reste dans un entier 64 bits
+_PREMIER = (1 << 31) - 1
+
+# Quasi-doublons : noms comparés, à l'intérieur des blocs de même REF,
+# pourcentage et origine (deux barres de sessions différentes ne sont jamais comparées)
+COLONNES_NOMS = ["Company", "Origine spécifique du harirot"]
+COLONNES_BLOCAGE = ["REF", "Pourcentage de cacao", "Broad Bean Origin"]
+
+
+def _produits_distincts(mots_a, mots_b):
+    """
+    Vrai si, pour une colonne, une valeur reprend l'autre en ajoutant des
+    mots ('Palos Blancos' / 'Palos Blancos + nibs') ou avec d'autres nombres
+    ('120hr c.' / '96hr c.') : c'est un autre produit, pas une variante
+    d'orthographe
+    """
+    for a, b in zip(mots_a, mots_b):
+        if a == b:
+            continue
+        if a < b or b < a:
+            return True
+        if set(re.findall(r"\d+", " ".join(a))) != set(re.findall(r"\d+", " ".join(b))):
+            return True
+    return False
+
+
+class Dedoublonneur:
+    """
+    Cette classe permet de détecter et supprimer les doublons d'un DataFrame :
+    - doublons exacts sur des colonnes clés, en flux sur des morceaux
+    - quasi-doublons (même barre avec une orthographe légèrement différente)
+    """
+
+    @staticmethod
+    def hacher_lignes(df, colonnes=None):
+        """
+        Calcule un hachage 64 bits par ligne sur les colonnes clés
+
+        Arguments
+        ---------------
+            df: pd.DataFrame, la base de données à hacher
+            colonnes: list, colonnes clés (par défaut toutes les colonnes)
+
+        Return
+        ----------------
+            hachages : np.ndarray (uint64), un hachage par ligne
+        """
+
+        if colonnes is not None:
+            df = df[colonnes]
+        return pd.util.hash_pandas_object(df, index=False).to_numpy()
+
+    @staticmethod
+    def doublons_exacts(df, colonnes=None, deja_vus=None):
+        """
+        Repère les doublons exacts d'un morceau en tenant compte des morceaux précédents
+
+        Arguments
+        ---------------
+            df: pd.DataFrame, le morceau à analyser
+            colonnes: list, colonnes clés (par défaut toutes les colonnes)
+            deja_vus: np.ndarray, hachages triés des lignes déjà vues (None au départ)
+
+        Return
+        ----------------
+            masque : np.ndarray (bool), True pour les lignes déjà vues
+            deja_vus : np.ndarray, ensemble compact (trié) des hachages mis à jour
+        """
+
+        if not isinstance(df, pd.DataFrame):
+            raise ValueError("df doit être un DataFrame")
+
+        if deja_vus is None:
+            deja_vus = np.empty(0, dtype=np.uint64)
+
+        hachages = Dedoublonneur.hacher_lignes(df, colonnes)
+
+        # Doublons internes au morceau puis doublons des morceaux précédents
+        masque = pd.Series(hachages).duplicated().to_numpy() | np.isin(hachages, deja_vus)
+
+        return masque, np.union1d(deja_vus, hachages)
+
+    @staticmethod
+    def compter_doublons_fichier(chemin, colonnes=None, chunksize=100_000):
+        """
+        Compte les doublons exacts d'un fichier CSV lu par morceaux
+
+        Arguments
+        ---------------
+            chemin: str, chemin du fichier CSV
+            colonnes: list, colonnes clés (par défaut toutes les colonnes)
+            chunksize: int, nombre de lignes par morceau
+
+        Return
+        ----------------
+            nb_doublons : int, le nombre total de doublons
+        """
+
+        nb_doublons = 0
+        deja_vus = None
+        for morceau in pd.read_csv(chemin, chunksize=chunksize, usecols=colonnes):
+            masque, deja_vus = Dedoublonneur.doublons_exacts(morceau, colonnes, deja_vus)
+            nb_doublons += int(masque.sum())
+
+        return nb_doublons
+
+    @staticmethod
+    def _normaliser(texte):
+        """Minuscules, sans accents ni ponctuation, espaces compactés"""
+        texte = unicodedata.normalize("NFKD", texte)
+        texte = "".join(c for c in texte if not unicodedata.combining(c)).lower()
+        return re.sub(r"\s+", " ", re.sub(r"[^\w\s]", " ", texte)).strip()
+
+    @staticmethod
+    def _ngrammes(texte, n=3):
+        """Ensemble des n-grammes de caractères d'un texte normalisé"""
+        texte = f" {texte} "
+        if len(texte) <= n:
+            return {texte}
+        return {texte[i:i + n] for i in range(len(texte) - n + 1)}
+
+    @staticmethod
+    def quasi_doublons(df, colonnes=None, colonnes_blocage=None, seuil=0.8,
+                       nb_permutations=64, nb_bandes=16, n=3, graine=42):
+        """
+        Repère les quasi-doublons par blocage puis similarité MinHash / LSH
+
+        Seules les lignes ayant les mêmes valeurs sur les colonnes de blocage
+        et partageant au moins une bande LSH sont comparées, ce qui évite
+        la comparaison de toutes les paires. Une paire dont une valeur ajoute
+        des mots à l'autre ou en change les nombres n'est pas retenue.
+
+        Arguments
+        ---------------
+            df: pd.DataFrame, la base de données à analyser
+            colonnes: list, colonnes textuelles comparées (par défaut COLONNES_NOMS)
+            colonnes_blocage: list, colonnes qui doivent être identiques
+                              (par défaut COLONNES_BLOCAGE)
+            seuil: float, similarité de Jaccard minimale sur les n-grammes
+            nb_permutations: int, taille des signatures MinHash
+            nb_bandes: int, nombre de bandes LSH (doit diviser nb_permutations)
+            n: int, taille des n-grammes de caractères
+            graine: int, graine des permutations
+
+        Return
+        ----------------
+            paires : pd.DataFrame, colonnes 'ligne_a', 'ligne_b', 'similarite'
+        """
+
+        if not isinstance(df, pd.DataFrame):
+            raise ValueError("df doit être un DataFrame")
+
+        if colonnes is None:
+            colonnes = COLONNES_NOMS
+        if colonnes_blocage is None:
+            colonnes_blocage = COLONNES_BLOCAGE
+        if nb_permutations % nb_bandes != 0:
+            raise ValueError("nb_bandes doit diviser nb_permutations")
+
+        for col in colonnes + colonnes_blocage:
+            if col not in df.columns:
+                raise ValueError(f"La colonne '{col}' n'existe pas dans le DataFrame")
+
+        paires = pd.DataFrame(columns=["ligne_a", "ligne_b", "similarite"])
+        if df.empty:
+            return paires
+
+        valeurs = df[colonnes].astype("string").fillna("")
+        textes = valeurs.agg(" | ".join, axis=1)
+
+        # Signature MinHash calculée une seule fois par texte distinct
+        rng = np.random.default_rng(graine)
+        a = rng.integers(1, _PREMIER, size=nb_permutations, dtype=np.uint64)
+        b = rng.integers(0, _PREMIER, size=nb_permutations, dtype=np.uint64)
+        codes, distincts = pd.factorize(textes)
+        ngrammes = [Dedoublonneur._ngrammes(Dedoublonneur._normaliser(t), n) for t in distincts]
+        # Mots de chaque colonne comparée, par texte distinct (première ligne qui le porte)
+        premieres = np.unique(codes, return_index=True)[1]
+        lignes_valeurs = valeurs.to_numpy()
+        mots = [[frozenset(Dedoublonneur._normaliser(v).split()) for v in lignes_valeurs[p]] for p in premieres]
+        signatures = np.empty((len(distincts), nb_permutations), dtype=np.uint64)
+        for i, grammes in enumerate(ngrammes):
+            h = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grammes), dtype=np.uint64)
+            signatures[i] = ((np.outer(a, h) + b[:, None]) % _PREMIER).min(axis=1)
+
+        # Buckets LSH à l'intérieur de chaque bloc
+        cles_blocage = pd.factorize(pd.MultiIndex.from_frame(df[colonnes_blocage].astype("string").fillna("")))[0]
+        lignes = df.index.to_numpy()
+        largeur = nb_permutations // nb_bandes
+        buckets = defaultdict(list)
+        for pos, (code, bloc) in enumerate(zip(codes, cles_blocage)):
+            signature = signatures[code]
+            for bande in range(nb_bandes):
+                buckets[(bloc, bande, signature[bande * largeur:(bande + 1) * largeur].tobytes())].append(pos)
+
+        candidats = set()
+        for positions in buckets.values():
+            for i in range(len(positions)):
+                for j in range(i + 1, len(positions)):
+                    candidats.add((positions[i], positions[j]))
+
+        # Vérification exacte des candidats
+        resultats = []
+        for i, j in sorted(candidats):
+            if _produits_distincts(mots[codes[i]], mots[codes[j]]):
+                continue
+            gi, gj = ngrammes[codes[i]], ngrammes[codes[j]]
+            similarite = len(gi & gj) / len(gi | gj)
+            if similarite >= seuil:
+                resultats.append((lignes[i], lignes[j], round(similarite, 4)))
+
+        if resultats:
+            paires = pd.DataFrame(resultats, columns=["ligne_a", "ligne_b", "similarite"])
+
+        return paires
+
+    @staticmethod
+    def dedoublonner(df, colonnes_cles=None, quasi=True, supprimer=False, **options_quasi):
+        """
+        Détecte les doublons exacts et les quasi-doublons, affiche un rapport
+        et les supprime éventuellement (première occurrence conservée)
+
+        Arguments
+        ---------------
+            df: pd.DataFrame, la base de données à dédoublonner
+            colonnes_cles: list, colonnes clés des doublons exacts (par défaut toutes)
+            quasi: bool, rechercher aussi les quasi-doublons
+            supprimer: bool, supprimer les doublons trouvés
+            options_quasi: paramètres transmis à quasi_doublons
+
+        Return
+        ----------------
+            df_clean : pd.DataFrame, le DataFrame (dédoublonné si supprimer=True)
+        """
+
+        if not isinstance(df, pd.DataFrame):
+            raise ValueError("df doit être un DataFrame")
+
+        if df.empty:
+            return df
+
+        masque_exacts, _ = Dedoublonneur.doublons_exacts(df, colonnes_cles)
+        a_supprimer = set(df.index[masque_exacts])
+        print(f"Doublons exacts détectés : {len(a_supprimer)}")
+
+        if quasi:
+            paires = Dedoublonneur.quasi_doublons(df[~masque_exacts], **options_quasi)
+
+            # Regroupement des paires (union-find) : on garde la première ligne du groupe
+            parent = {}
+
+            def racine(x):
+                while parent.get(x, x) != x:
+                    x = parent[x]
+                return x
+
+            for ligne_a, ligne_b in zip(paires["ligne_a"], paires["ligne_b"]):
+                ra, rb = racine(ligne_a), racine(ligne_b)
+                if ra != rb:
+                    parent[max(ra, rb)] = min(ra, rb)
+
+            quasi_supprimees = {ligne for ligne in parent if racine(ligne) != ligne}
+            print(f"Quasi-doublons détectés : {len(quasi_supprimees)} ({len(paires)} paire(s))")
+            for ligne_a, ligne_b, similarite in paires.head(3).itertuples(index=False):
+                print(f"  - Lignes {ligne_a} / {ligne_b} (similarité {similarite})")
+            a_supprimer |= quasi_supprimees
+
+        if supprimer and a_supprimer:
+            df_clean = df.drop(index=list(a_supprimer))
+            print(f"{len(a_supprimer)} doublon(s) supprimé(s) - {len(df_clean)} lignes restantes")
+            return df_clean
+
+        return df.copy()
+
+    @staticmethod
+    def signaler(df):
+        """
+        Étape du pipeline : affiche les doublons exacts et quasi-doublons
+        du dataset final sans rien supprimer ; le DataFrame est renvoyé tel quel.
+        """
+        Dedoublonneur.dedoublonner(df, supprimer=False)
+        return df
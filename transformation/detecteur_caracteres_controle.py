@@ -6,6 +6,8 @@ Classe pour détecter les caractères de contrôle
 import pandas as pd
 import unicodedata
 
+from transformation.schema import SchemaColonnes
+
 class DetecteurCaracteresControle:
     """
     Cette classe permet de détecter les caractères de contrôle dans un DataFrame
@@ -35,8 +37,8 @@ class DetecteurCaracteresControle:
         df_clean = df.copy()
         colonnes_problematiques = []
         
-        # Analyser chaque colonne
-        for col in df_clean.columns:
+        # Analyser chaque colonne texte
+        for col in SchemaColonnes.colonnes(df_clean):
             colonne = df_clean[col]
             caracteres_controle_trouves = False
             
@@ -6,6 +6,8 @@ Classe pour détecter et supprimer les caractères spéciaux
 import pandas as pd
 import re
 
+from transformation.schema import SchemaColonnes
+
 class DetecteurCaracteresSpeciaux:
     """
     Cette classe permet de détecter et supprimer les caractères spéciaux dans un DataFrame
@@ -40,8 +42,8 @@ class DetecteurCaracteresSpeciaux:
         df_clean = df.copy()
         colonnes_problematiques = []
         
-        # Analyser chaque colonne
-        for col in df_clean.columns:
+        # Analyser chaque colonne texte
+        for col in SchemaColonnes.colonnes(df_clean):
             colonne = df_clean[col]
             caracteres_speciaux_trouves = False
             details_suppression = []
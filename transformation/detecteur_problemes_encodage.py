@@ -7,6 +7,8 @@ import pandas as pd
 import re
 import unicodedata
 
+from transformation.schema import SchemaColonnes
+
 class DetecteurProblemesEncodage:
     """
     Classe pour détecter les problèmes d'encodage dans un DataFrame
@@ -29,7 +31,7 @@ class DetecteurProblemesEncodage:
         df_clean = df.copy()
         
         colonnes_avec_problemes = []
-        for col in df.columns:
+        for col in SchemaColonnes.colonnes(df):
             colonne = df[col]
             total_lignes = len(colonne)
             lignes_non_vides = colonne.notna().sum()
@@ -3,6 +3,8 @@ import numpy as np
 import re
 from datetime import datetime
 
+from transformation.schema import SchemaColonnes
+
 class NettoyeurFormat:
     """
     Cette classe permet de nettoyer et uniformiser les formats de données
@@ -12,13 +14,64 @@ class NettoyeurFormat:
     """
     
     @staticmethod
-    def nettoyer_pourcentages(df, colonne='Cocoa Percent'):
+    def _convertir_distincts(serie, convertisseur):
+        """
+        Applique un convertisseur aux seules valeurs distinctes d'une série
+        puis redistribue le résultat sur toutes les lignes
+
+        Args:
+            serie (Series): Série à convertir
+            convertisseur (callable): Fonction Series -> Series appliquée aux valeurs distinctes
+
+        Returns:
+            Series: Série convertie, même index que l'entrée
+        """
+        codes, distincts = pd.factorize(serie)
+        if len(distincts) == 0:
+            return convertisseur(serie)
+        convertis = convertisseur(pd.Series(distincts))
+        resultat = convertis.take(np.where(codes >= 0, codes, 0)).reset_index(drop=True)
+        resultat = resultat.where(codes >= 0)
+        resultat.index = serie.index
+        return resultat
+
+    @staticmethod
+    def _rapport_erreurs(avant, apres, colonne, erreurs):
+        """
+        Repère les valeurs non vides qui n'ont pas pu être converties
+
+        Args:
+            avant (Series): Valeurs d'origine
+            apres (Series): Valeurs converties (NaN / NaT en cas d'échec)
+            colonne (str): Nom de la colonne
+            erreurs (str): 'raise' pour lever une erreur, 'coerce' pour garder NaN
+
+        Returns:
+            dict: nombre de valeurs en erreur et exemples
+        """
+        masque = avant.notna() & apres.isna()
+        rapport = {
+            'colonne': colonne,
+            'nb_erreurs': int(masque.sum()),
+            'exemples': avant[masque].unique()[:5].tolist()
+        }
+
+        if rapport['nb_erreurs']:
+            if erreurs == 'raise':
+                raise ValueError(f"{rapport['nb_erreurs']} valeur(s) non convertible(s) dans '{colonne}': {rapport['exemples']}")
+            print(f"⚠️ {rapport['nb_erreurs']} valeur(s) non convertible(s) remplacée(s) par NaN - Exemples: {rapport['exemples']}")
+
+        return rapport
+
+    @staticmethod
+    def nettoyer_pourcentages(df, colonne='Cocoa Percent', erreurs='coerce'):
         """
         Supprime le symbole % et convertit en float
         
         Args:
             df (DataFrame): DataFrame à nettoyer
             colonne (str): Nom de la colonne contenant les pourcentages
+            erreurs (str): 'coerce' (valeurs invalides → NaN et rapport) ou 'raise'
             
         Returns:
             DataFrame: DataFrame avec la colonne transformée
@@ -31,21 +84,33 @@ class NettoyeurFormat:
             # Compter les valeurs avant transformation
             valeurs_avant = df_clean[colonne].value_counts().head(5)
             
-            # Supprimer le symbole % et convertir en float
-            df_clean[colonne] = df_clean[colonne].astype(str).str.replace('%', '').astype(float)
+            # Supprimer le symbole % et convertir en float (une fois par valeur distincte)
+            avant = df_clean[colonne]
+            if not pd.api.types.is_numeric_dtype(avant):
+                df_clean[colonne] = NettoyeurFormat._convertir_distincts(
+                    avant,
+                    lambda v: pd.to_numeric(v.astype(str).str.replace('%', '', regex=False).str.strip(), errors='coerce')
+                ).astype(float)
+                NettoyeurFormat._rapport_erreurs(avant, df_clean[colonne], colonne, erreurs)
             
             print(f"✅ Pourcentages nettoyés - Exemples: {valeurs_avant.head(3).to_dict()}")
             
         return df_clean
     
     @staticmethod
-    def nettoyer_dates(df, colonne='Review Date'):
+    def nettoyer_dates(df, colonne='Review Date', format=None, format_sortie=None, erreurs='coerce'):
         """
         Uniformise le format des dates
         
         Args:
             df (DataFrame): DataFrame à nettoyer
             colonne (str): Nom de la colonne contenant les dates
+            format (str): 'annee' pour une colonne ne contenant que des années
+                (convertie en entier Int64), un format explicite (ex: '%d/%m/%Y'),
+                ou None pour détecter les années puis inférer le format
+            format_sortie (str): Si renseigné (ex: '%Y-%m-%d'), les dates sont
+                reconverties en chaînes ; sinon le type datetime natif est conservé
+            erreurs (str): 'coerce' (valeurs invalides → NaT et rapport) ou 'raise'
             
         Returns:
             DataFrame: DataFrame avec les dates formatées
@@ -57,12 +122,29 @@ class NettoyeurFormat:
             
             # Compter les valeurs avant transformation
             valeurs_avant = df_clean[colonne].value_counts().head(5)
+            avant = df_clean[colonne]
+            
+            # Chemin rapide : une colonne d'années se convertit directement en entier
+            if format is None:
+                distincts = pd.Series(avant.dropna().unique()).astype(str)
+                if len(distincts) and distincts.str.fullmatch(r'\d{4}(\.0)?').all():
+                    format = 'annee'
             
-            # Convertir en datetime si ce n'est pas déjà fait
-            df_clean[colonne] = pd.to_datetime(df_clean[colonne], errors='coerce')
+            if format == 'annee':
+                df_clean[colonne] = NettoyeurFormat._convertir_distincts(
+                    avant, lambda v: pd.to_numeric(v, errors='coerce')
+                ).round().astype('Int64')
+            elif not pd.api.types.is_datetime64_any_dtype(avant):
+                # Conversion une seule fois par valeur distincte
+                df_clean[colonne] = NettoyeurFormat._convertir_distincts(
+                    avant, lambda v: pd.to_datetime(v, format=format, errors='coerce')
+                )
             
-            # Formater en YYYY-MM-DD
-            df_clean[colonne] = df_clean[colonne].dt.strftime('%Y-%m-%d')
+            NettoyeurFormat._rapport_erreurs(avant, df_clean[colonne], colonne, erreurs)
+            
+            # Reconversion en chaînes uniquement si demandée
+            if format_sortie is not None and format != 'annee':
+                df_clean[colonne] = df_clean[colonne].dt.strftime(format_sortie)
             
             print(f"✅ Dates nettoyées - Exemples: {valeurs_avant.head(3).to_dict()}")
             
@@ -71,7 +153,8 @@ class NettoyeurFormat:
     @staticmethod
     def uniformiser_chaines(df, colonnes_texte=None):
         """
-        Uniformise la capitalisation des chaînes de caractères
+        Uniformise la capitalisation des chaînes de caractères ; les colonnes
+        non textuelles sont ignorées et les valeurs manquantes conservées
         
         Args:
             df (DataFrame): DataFrame à nettoyer
@@ -88,25 +171,32 @@ class NettoyeurFormat:
         
         print("🔄 Uniformisation des chaînes de caractères...")
         
+        texte = set(SchemaColonnes.colonnes(df_clean))
         for colonne in colonnes_texte:
-            if colonne in df_clean.columns:
+            if colonne in texte:
                 # Compter les valeurs avant transformation
                 valeurs_avant = df_clean[colonne].value_counts().head(3)
                 
                 # Uniformiser la capitalisation (première lettre majuscule)
-                df_clean[colonne] = df_clean[colonne].astype(str).str.title()
+                # .str conserve les NaN (astype(str) les changeait en 'nan')
+                df_clean[colonne] = df_clean[colonne].str.title()
                 
                 print(f"   ✅ {colonne}: {valeurs_avant.head(2).to_dict()}")
         
         return df_clean
     
     @staticmethod
-    def nettoyer_format_complet(df):
+    def nettoyer_format_complet(df, schema=None):
         """
         Effectue un nettoyage complet du format
         
         Args:
             df (DataFrame): DataFrame à nettoyer
+            schema (dict): Type de chaque colonne à nettoyer, par exemple
+                {'Pourcentage de cacao': 'pourcentage', 'Date de la revue': 'annee'}.
+                Les types reconnus sont 'pourcentage', 'annee', 'date' (format
+                inféré) ou un format de date explicite. Par défaut : 'Cocoa Percent'
+                et 'Review Date'.
             
         Returns:
             DataFrame: DataFrame complètement nettoyé
@@ -116,11 +206,18 @@ class NettoyeurFormat:
         
         df_clean = df.copy()
         
-        # 1. Nettoyer les pourcentages
-        df_clean = NettoyeurFormat.nettoyer_pourcentages(df_clean)
-        
-        # 2. Nettoyer les dates
-        df_clean = NettoyeurFormat.nettoyer_dates(df_clean)
+        if schema is None:
+            schema = {'Cocoa Percent': 'pourcentage', 'Review Date': 'date'}
+        
+        for colonne, type_colonne in schema.items():
+            # 1. Nettoyer les pourcentages
+            if type_colonne == 'pourcentage':
+                df_clean = NettoyeurFormat.nettoyer_pourcentages(df_clean, colonne)
+            # 2. Nettoyer les dates
+            else:
+                df_clean = NettoyeurFormat.nettoyer_dates(
+                    df_clean, colonne, format=None if type_colonne == 'date' else type_colonne
+                )
         
         # 3. Uniformiser les chaînes
         df_clean = NettoyeurFormat.uniformiser_chaines(df_clean)
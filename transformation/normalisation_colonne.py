@@ -1,9 +1,171 @@
+import json
+
+import numpy as np
 import pandas as pd
 
 
+class Normaliseur:
+    """
+    Cette classe ajuste une seule fois les paramètres de normalisation de
+    plusieurs colonnes, puis les applique à de nouveaux lots de données :
+    - 'min_max' : x_norm = (x - min) / (max - min)
+    - 'z_score' : x_norm = (x - moyenne) / écart-type
+    - 'robuste' : x_norm = (x - médiane) / (Q3 - Q1)
+    Les paramètres peuvent être sauvegardés puis rechargés, ce qui garantit
+    la même normalisation pour tous les lots d'un flux sans réajustement.
+    """
+
+    METHODES = ("min_max", "z_score", "robuste")
+
+    def __init__(self, methode="min_max"):
+        if methode not in Normaliseur.METHODES:
+            raise ValueError(f"Méthode '{methode}' inconnue (attendu : {', '.join(Normaliseur.METHODES)})")
+
+        self.methode = methode
+        self.colonnes = []
+        self.parametres = {}
+
+    def ajuster(self, df: pd.DataFrame, colonnes):
+        """
+        Calcule les paramètres des trois méthodes pour toutes les colonnes
+
+        Arguments
+        ---------------
+        df : pd.DataFrame
+            Le DataFrame de référence.
+        colonnes : str ou list
+            La ou les colonnes numériques à normaliser.
+
+        Return
+        ----------------
+        self : Normaliseur
+            Le normaliseur ajusté.
+        """
+        if isinstance(colonnes, str):
+            colonnes = [colonnes]
+
+        for col in colonnes:
+            if col not in df.columns:
+                raise ValueError(f"La colonne '{col}' n'existe pas dans le DataFrame.")
+
+        # Un seul tableau 2D : chaque statistique est calculée pour toutes les colonnes à la fois
+        valeurs = df[colonnes].to_numpy(dtype=np.float64)
+        q1, mediane, q3 = np.nanpercentile(valeurs, [25, 50, 75], axis=0)
+
+        self.colonnes = list(colonnes)
+        self.parametres = {
+            'min': np.nanmin(valeurs, axis=0).tolist(),
+            'max': np.nanmax(valeurs, axis=0).tolist(),
+            'moyenne': np.nanmean(valeurs, axis=0).tolist(),
+            'ecart_type': np.nanstd(valeurs, axis=0).tolist(),
+            'mediane': mediane.tolist(),
+            'iqr': (q3 - q1).tolist(),
+        }
+
+        return self
+
+    def _centre_echelle(self, methode):
+        """Renvoie les vecteurs (centre, échelle) float32 de la méthode"""
+        p = self.parametres
+        if methode == "min_max":
+            centre = np.array(p['min'])
+            echelle = np.array(p['max']) - centre
+        elif methode == "z_score":
+            centre, echelle = np.array(p['moyenne']), np.array(p['ecart_type'])
+        else:
+            centre, echelle = np.array(p['mediane']), np.array(p['iqr'])
+
+        # Colonne constante : échelle ramenée à 1 pour éviter la division par zéro
+        echelle = np.where(echelle == 0, 1.0, echelle)
+
+        return centre.astype(np.float32), echelle.astype(np.float32)
+
+    def transformer(self, df: pd.DataFrame, methode=None, inplace=False):
+        """
+        Applique la normalisation ajustée à un DataFrame (lot ou morceau)
+
+        Arguments
+        ---------------
+        df : pd.DataFrame
+            Le DataFrame à normaliser.
+        methode : str
+            Méthode à appliquer (par défaut celle du normaliseur).
+        inplace : bool
+            Modifier df directement au lieu d'une copie.
+
+        Return
+        ----------------
+        df_norm : pd.DataFrame
+            Le DataFrame avec les colonnes normalisées en float32.
+        """
+        if not self.colonnes:
+            raise ValueError("Le normaliseur doit être ajusté avant la transformation.")
+
+        methode = methode or self.methode
+        if methode not in Normaliseur.METHODES:
+            raise ValueError(f"Méthode '{methode}' inconnue (attendu : {', '.join(Normaliseur.METHODES)})")
+
+        df_norm = df if inplace else df.copy()
+        centre, echelle = self._centre_echelle(methode)
+
+        # Arithmétique en place sur un seul tableau float32
+        valeurs = df_norm[self.colonnes].to_numpy(dtype=np.float32, copy=True)
+        valeurs -= centre
+        valeurs /= echelle
+
+        for i, col in enumerate(self.colonnes):
+            df_norm[col] = valeurs[:, i]
+
+        return df_norm
+
+    def ajuster_transformer(self, df: pd.DataFrame, colonnes, methode=None):
+        """Ajuste le normaliseur sur df puis le transforme"""
+        return self.ajuster(df, colonnes).transformer(df, methode)
+
+    def sauvegarder(self, chemin):
+        """
+        Sauvegarde les paramètres ajustés dans un fichier JSON
+
+        Arguments
+        ---------------
+        chemin : str
+            Chemin du fichier JSON.
+        """
+        with open(chemin, "w", encoding="utf-8") as f:
+            json.dump({
+                'methode': self.methode,
+                'colonnes': self.colonnes,
+                'parametres': self.parametres,
+            }, f, ensure_ascii=False, indent=2)
+
+    @staticmethod
+    def charger(chemin):
+        """
+        Recharge un normaliseur sauvegardé
+
+        Arguments
+        ---------------
+        chemin : str
+            Chemin du fichier JSON.
+
+        Return
+        ----------------
+        normaliseur : Normaliseur
+            Le normaliseur prêt à transformer de nouveaux lots.
+        """
+        with open(chemin, encoding="utf-8") as f:
+            contenu = json.load(f)
+
+        normaliseur = Normaliseur(contenu['methode'])
+        normaliseur.colonnes = contenu['colonnes']
+        normaliseur.parametres = contenu['parametres']
+
+        return normaliseur
+
+
 class Normalise:
     """
-    Cette classe permet de calculer le nombre de valeurs manquantes
+    Cette classe permet de normaliser une colonne d'un DataFrame
     """
 
     @staticmethod
@@ -24,15 +186,11 @@ class Normalise:
             Return
             ----------------
             df : pd.DataFrame
-                Le DataFrame avec la colonne normalisée (valeurs entre 0 et 1).
+                Le DataFrame avec la colonne normalisée (valeurs entre 0 et 1), modifié
+                en place. Pour plusieurs colonnes, des lots successifs ou un résultat
+                float32 sans modifier df, utiliser Normaliseur.
         """
 
         df[col] = (df[col] - df[col].min()) / (df[col].max() - df[col].min())
 
         return df
-    
-
-    
-
-
-
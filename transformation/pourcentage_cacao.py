@@ -35,6 +35,10 @@ class TransformateurPourcentageCacao:
         # Copier le DataFrame
         df_clean = df.copy()
         
+        # Colonne déjà numérique : rien à convertir
+        if pd.api.types.is_numeric_dtype(df_clean[colonne]):
+            return df_clean
+        
         # Supprimer le % et convertir en float
         df_clean[colonne] = (
             df_clean[colonne]
@@ -0,0 +1,112 @@
+"""
+Référentiel des pays et régions d'origine du cacao
+Chaque nom canonique est associé à ses variantes connues (abréviations,
+fautes fréquentes, autres langues). Les pays proches d'un autre nom
+('Niger' / 'Nigeria', 'Dominica' / 'Dominican Republic') sont déclarés
+pour être reconnus par correspondance exacte, jamais approchée.
+"""
+
+PAYS_REFERENCE = {
+    # Amériques
+    "Argentina": [],
+    "Belize": [],
+    "Bolivia": [],
+    "Brazil": ["Brasil"],
+    "Canada": [],
+    "Chile": [],
+    "Colombia": ["Columbia"],
+    "Costa Rica": ["C. Rica"],
+    "Cuba": [],
+    "Dominica": [],
+    "Dominican Republic": ["DR", "D.R.", "Dom. Rep.", "Dom. Rep", "Domin. Rep", "Dominican Rep."],
+    "Ecuador": ["Ecu.", "Ecuad."],
+    "El Salvador": [],
+    "Grenada": ["Gre."],
+    "Guatemala": ["Guat."],
+    "Haiti": [],
+    "Honduras": [],
+    "Jamaica": ["Jam"],
+    "Martinique": [],
+    "Mexico": ["Mex"],
+    "Nicaragua": ["Nic."],
+    "Panama": [],
+    "Peru": [],
+    "Puerto Rico": [],
+    "St. Lucia": ["Saint Lucia", "St Lucia"],
+    "Suriname": ["Surinam"],
+    "Tobago": [],
+    "Trinidad": ["Tri"],
+    "U.S.A.": ["USA", "US", "United States", "United States of America"],
+    "Venezuela": ["Ven", "Ven.", "Venez"],
+    # Afrique
+    "Cameroon": [],
+    "Congo": [],
+    "Equatorial Guinea": [],
+    "Gabon": [],
+    "Ghana": [],
+    "Guinea": [],
+    "Ivory Coast": ["Cote d'Ivoire", "Côte d'Ivoire"],
+    "Liberia": [],
+    "Madagascar": ["Mad", "Mad."],
+    "Niger": [],
+    "Nigeria": [],
+    "Principe": [],
+    "Sao Tome": ["São Tomé"],
+    "Sao Tome & Principe": ["Sao Tome and Principe"],
+    "South Africa": [],
+    "Tanzania": [],
+    "Togo": [],
+    "Uganda": [],
+    # Asie - Océanie
+    "Australia": [],
+    "Burma": ["Myanmar"],
+    "Fiji": [],
+    "Hawaii": ["Haw."],
+    "India": [],
+    "Indonesia": [],
+    "Israel": [],
+    "Japan": [],
+    "Java": [],
+    "Bali": [],
+    "Malaysia": [],
+    "New Zealand": [],
+    "Papua New Guinea": ["PNG", "P.N.G."],
+    "Philippines": [],
+    "Samoa": [],
+    "Singapore": [],
+    "Solomon Islands": [],
+    "South Korea": ["Korea"],
+    "Sri Lanka": [],
+    "Vanuatu": [],
+    "Vietnam": ["Viet Nam"],
+    # Europe
+    "Austria": [],
+    "Belgium": [],
+    "Czech Republic": ["Czechia"],
+    "Denmark": [],
+    "Finland": [],
+    "France": [],
+    "Germany": [],
+    "Hungary": [],
+    "Iceland": [],
+    "Ireland": [],
+    "Italy": [],
+    "Lithuania": [],
+    "Netherlands": ["Holland", "Amsterdam"],
+    "Poland": [],
+    "Portugal": [],
+    "Russia": [],
+    "Scotland": [],
+    "Spain": [],
+    "Sweden": [],
+    "Switzerland": [],
+    "U.K.": ["UK", "United Kingdom", "England"],
+    "Wales": [],
+    # Régions
+    "Africa": [],
+    "West Africa": [],
+    "Caribbean": ["Carribean", "Caribean"],
+    "Central America": ["C. Am.", "C. America"],
+    "Central and South America": ["Central and S. America"],
+    "South America": ["S. America"],
+}
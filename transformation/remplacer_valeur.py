@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 
+from transformation.schema import SchemaColonnes
+
 class Nettoyeur:
     """
     Cette classe permet de nettoyer un DataFrame en remplaçant
@@ -11,7 +13,9 @@ class Nettoyeur:
     def clean_empty_cells(df: pd.DataFrame) -> pd.DataFrame:
         """
         Remplace toutes les chaînes vides, espaces, ou valeurs uniquement
-        composées de blancs par NaN dans un DataFrame.
+        composées de blancs par NaN dans les colonnes de chaînes d'un
+        DataFrame, y compris les colonnes numériques lues comme texte (REF et
+        Date extraites du web) ; les colonnes numériques ne peuvent pas en contenir.
 
         Arguments
         ---------------
@@ -23,4 +27,8 @@ class Nettoyeur:
             df : pd.DataFrame
                 Le DataFrame nettoyé avec les cellules vides remplacées par NaN.
         """
-        return df.replace(r'^\s*$', np.nan, regex=True)
+        colonnes = SchemaColonnes.chaines(df)
+        df_clean = df.copy()
+        if colonnes:
+            df_clean[colonnes] = df_clean[colonnes].replace(r'^\s*$', np.nan, regex=True)
+        return df_clean
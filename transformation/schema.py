@@ -0,0 +1,112 @@
+"""
+Module du schéma des colonnes
+Genre de chaque colonne du dataset cacao (texte ou numérique), déclaré pour
+les colonnes connues et déduit du type pour les autres : les étapes de
+nettoyage de texte ne parcourent que les colonnes texte, les valeurs
+manquantes restent des valeurs manquantes (jamais la chaîne 'nan')
+"""
+
+import pandas as pd
+
+TEXTE = "texte"
+NUMERIQUE = "numerique"
+AUTRE = "autre"
+
+# Genre attendu des colonnes extraites ; 'Pourcentage de cacao' est un
+# texte ('70%') jusqu'à sa conversion par TransformateurPourcentageCacao
+SCHEMA_CACAO = {
+    "Company": TEXTE,
+    "Origine spécifique du harirot": TEXTE,
+    "REF": NUMERIQUE,
+    "Date de la revue": NUMERIQUE,
+    "Pourcentage de cacao": TEXTE,
+    "Localisation de l'entreprise": TEXTE,
+    "Note": NUMERIQUE,
+    "Type de fève": TEXTE,
+    "Broad Bean Origin": TEXTE,
+}
+
+
+class SchemaColonnes:
+    """
+    Cette classe indique à chaque étape les colonnes qu'elle peut modifier.
+    Une colonne est du texte si son type réel est texte et que le schéma
+    déclaré ne dit pas le contraire : une colonne numérique lue comme texte
+    (REF, Date extraites du web) n'est pas traitée comme du texte libre.
+    Une colonne de type réel numérique est numérique, même déclarée texte
+    (pourcentage déjà converti). Les cellules blanches sont à retirer de
+    toutes les colonnes de chaînes (voir chaines).
+    Fonctionne avec les DataFrames pandas et Polars.
+    """
+
+    @staticmethod
+    def genre(dtype):
+        """Genre d'un type pandas ou Polars : 'texte', 'numerique' ou 'autre'"""
+        if type(dtype).__module__.startswith("polars"):
+            import polars as pl
+            if dtype == pl.String:
+                return TEXTE
+            return NUMERIQUE if dtype.is_numeric() else AUTRE
+
+        if pd.api.types.is_bool_dtype(dtype):
+            return AUTRE
+        if pd.api.types.is_numeric_dtype(dtype):
+            return NUMERIQUE
+        if pd.api.types.is_string_dtype(dtype) or dtype == object:
+            return TEXTE
+        return AUTRE
+
+    @staticmethod
+    def inferer(df, schema=None):
+        """
+        Genre effectif de chaque colonne
+
+        Arguments
+        ---------------
+            df : pd.DataFrame ou pl.DataFrame
+            schema : dict, genres déclarés (par défaut SCHEMA_CACAO)
+
+        Return
+        ---------------
+            genres : dict, colonne -> 'texte', 'numerique' ou 'autre'
+        """
+        schema = SCHEMA_CACAO if schema is None else schema
+        types = df.schema.items() if hasattr(df, "schema") else df.dtypes.items()
+
+        genres = {}
+        for colonne, dtype in types:
+            reel = SchemaColonnes.genre(dtype)
+            declare = schema.get(colonne, reel)
+            genres[colonne] = reel if reel in (declare, NUMERIQUE) else AUTRE
+        return genres
+
+    @staticmethod
+    def colonnes(df, genre=TEXTE, schema=None):
+        """
+        Colonnes du genre demandé, dans l'ordre du DataFrame
+
+        Arguments
+        ---------------
+            df : pd.DataFrame ou pl.DataFrame
+            genre : str, 'texte' (par défaut) ou 'numerique'
+            schema : dict, genres déclarés (par défaut SCHEMA_CACAO)
+
+        Return
+        ---------------
+            colonnes : list
+        """
+        return [c for c, g in SchemaColonnes.inferer(df, schema).items() if g == genre]
+
+    @staticmethod
+    def chaines(df):
+        """
+        Colonnes dont le type réel est texte, déclarées texte ou non (ex: REF
+        et Date extraites du web) : les seules qui peuvent contenir des
+        cellules blanches
+
+        Return
+        ---------------
+            colonnes : list
+        """
+        types = df.schema.items() if hasattr(df, "schema") else df.dtypes.items()
+        return [c for c, dtype in types if SchemaColonnes.genre(dtype) == TEXTE]
@@ -1,7 +1,147 @@
 # transformation/uniformiser_pays.py
 
+import re
+import difflib
+import unicodedata
+from collections import defaultdict
+
 import pandas as pd
 
+from transformation.referentiel_pays import PAYS_REFERENCE
+
+
+class IndexPays:
+    """
+    Index de recherche approximative des pays construit une seule fois
+    à partir du référentiel :
+    - dictionnaire des noms et variantes normalisés (correspondance exacte)
+    - index inversé de trigrammes (recherche des fautes d'orthographe)
+    Un nom du référentiel l'emporte toujours sur une correspondance
+    approchée ; entre noms courts (longueur_courte caractères au plus),
+    une lettre de plus ou de moins change de pays ('Niger' / 'Nigeria') :
+    la similarité exigée est alors seuil_court.
+    Les résolutions sont mémorisées par valeur brute distincte.
+    """
+
+    _defaut = None
+
+    def __init__(self, reference=None, seuil=0.8, seuil_court=0.9, longueur_courte=6):
+        if reference is None:
+            reference = PAYS_REFERENCE
+
+        self.seuil = seuil
+        self.seuil_court = seuil_court
+        self.longueur_courte = longueur_courte
+        self.cache = {}
+        self.alias = {}
+        self.trigrammes = defaultdict(set)
+
+        for canonique, variantes in reference.items():
+            for nom in [canonique] + list(variantes):
+                cle = IndexPays.normaliser(nom)
+                self.alias[cle] = canonique
+                for trigramme in IndexPays._trigrammes(cle):
+                    self.trigrammes[trigramme].add(cle)
+
+    @staticmethod
+    def par_defaut():
+        """Renvoie l'index du référentiel par défaut (construit au premier appel)"""
+        if IndexPays._defaut is None:
+            IndexPays._defaut = IndexPays()
+        return IndexPays._defaut
+
+    @staticmethod
+    def normaliser(texte):
+        """Minuscules, sans accents, points ni espaces superflus"""
+        texte = unicodedata.normalize("NFKD", str(texte))
+        texte = "".join(c for c in texte if not unicodedata.combining(c)).lower()
+        texte = texte.replace(".", " ")
+        return " ".join(texte.split())
+
+    @staticmethod
+    def _trigrammes(cle):
+        cle = f"  {cle} "
+        return {cle[i:i + 3] for i in range(len(cle) - 2)}
+
+    def resoudre_nom(self, nom):
+        """
+        Résout un nom de pays unique
+
+        Arguments
+        ---------------
+            nom : str, le nom brut
+
+        Return
+        ---------------
+            canonique : str ou None si aucun pays ne correspond
+        """
+        cle = IndexPays.normaliser(nom)
+        if not cle:
+            return None
+
+        if cle in self.alias:
+            return self.alias[cle]
+
+        # Candidats partageant au moins un trigramme, puis similarité fine
+        votes = defaultdict(int)
+        for trigramme in IndexPays._trigrammes(cle):
+            for candidat in self.trigrammes.get(trigramme, ()):
+                votes[candidat] += 1
+
+        meilleur, score_max = None, 0.0
+        for candidat in sorted(votes, key=votes.get, reverse=True)[:20]:
+            court = min(len(cle), len(candidat)) <= self.longueur_courte
+            score = difflib.SequenceMatcher(None, cle, candidat).ratio()
+            if score >= (self.seuil_court if court else self.seuil) and score > score_max:
+                meilleur, score_max = candidat, score
+
+        return self.alias[meilleur] if meilleur is not None else None
+
+    def resoudre(self, valeur):
+        """
+        Résout une valeur brute pouvant contenir plusieurs pays
+        (ex: 'Venezuela/ Ghana', 'Carribean(DR/Jam/Tri)'), avec mémorisation
+
+        Arguments
+        ---------------
+            valeur : str, la valeur brute
+
+        Return
+        ---------------
+            resultat : str, pays canoniques séparés par ', ' ; les parties
+            non reconnues sont conservées telles quelles
+        """
+        if valeur in self.cache:
+            return self.cache[valeur]
+
+        # Une valeur sans séparateur est un seul pays ; sinon seule la
+        # correspondance exacte est tentée avant le découpage
+        if re.search(r"[,/&()]|(?<=\w)-(?=\w)", valeur):
+            resultat = self.alias.get(IndexPays.normaliser(valeur))
+        else:
+            resultat = self.resoudre_nom(valeur)
+
+        if resultat is None:
+            pays = []
+            # Le contenu entre parenthèses n'est gardé que s'il est reconnu
+            principal = re.sub(r"\(.*?\)", ",", valeur)
+            details = re.findall(r"\((.*?)\)", valeur)
+            for partie, obligatoire in ([(p, True) for p in re.split(r"[,/&]|(?<=\w)-(?=\w)", principal)]
+                                        + [(p, False) for d in details for p in re.split(r"[,/&]", d)]):
+                partie = partie.strip()
+                if not partie:
+                    continue
+                canonique = self.resoudre_nom(partie)
+                if canonique is None and obligatoire:
+                    canonique = partie
+                if canonique is not None and canonique not in pays:
+                    pays.append(canonique)
+            resultat = ", ".join(pays) if pays else valeur
+
+        self.cache[valeur] = resultat
+        return resultat
+
+
 class UniformiserPays:
     """
     Classe pour uniformiser l'écriture des pays :
@@ -11,7 +151,7 @@ class UniformiserPays:
     """
 
     @staticmethod
-    def uniformiser(df, colonnes, exceptions=None):
+    def uniformiser(df, colonnes, exceptions=None, mode="capitalisation"):
         """
         Uniformise les colonnes contenant des pays.
 
@@ -20,6 +160,8 @@ class UniformiserPays:
             df : pd.DataFrame
             colonnes : list, liste des colonnes à traiter
             exceptions : list, valeurs à garder en majuscules (ex: ['U.S.A.', 'UK'])
+            mode : str, 'capitalisation' (par défaut) ou 'canonique' pour
+                   ramener chaque pays à son nom du référentiel (voir canonicaliser)
 
         Return
         ---------------
@@ -29,6 +171,11 @@ class UniformiserPays:
         if not isinstance(df, pd.DataFrame):
             raise ValueError("df doit être un DataFrame")
 
+        if mode == "canonique":
+            return UniformiserPays.canonicaliser(df, colonnes)
+        if mode != "capitalisation":
+            raise ValueError(f"Mode '{mode}' inconnu (attendu : 'capitalisation' ou 'canonique')")
+
         df_clean = df.copy()
 
         # Exceptions par défaut
@@ -59,3 +206,46 @@ class UniformiserPays:
                 print(f"Colonne '{col}' introuvable dans le DataFrame")
 
         return df_clean
+
+    @staticmethod
+    def canonicaliser(df, colonnes, index=None):
+        """
+        Ramène les pays à leur nom canonique du référentiel : corrige les
+        fautes ('Domincan Republic'), les abréviations ('Dom. Rep.') et
+        sépare les origines multiples ('Venezuela/ Ghana' → 'Venezuela, Ghana').
+        Chaque orthographe distincte n'est résolue qu'une seule fois.
+
+        Arguments
+        ---------------
+            df : pd.DataFrame
+            colonnes : list, liste des colonnes à traiter
+            index : IndexPays, index à utiliser (par défaut le référentiel intégré)
+
+        Return
+        ---------------
+            df_clean : pd.DataFrame
+        """
+
+        if not isinstance(df, pd.DataFrame):
+            raise ValueError("df doit être un DataFrame")
+
+        if index is None:
+            index = IndexPays.par_defaut()
+
+        df_clean = df.copy()
+
+        for col in colonnes:
+            if col not in df_clean.columns:
+                print(f"Colonne '{col}' introuvable dans le DataFrame")
+                continue
+
+            # Résolution des seules valeurs distinctes puis redistribution par code
+            codes, distincts = pd.factorize(df_clean[col])
+            resolus = pd.Index([index.resoudre(str(v).strip()) for v in distincts], dtype=object)
+            valeurs = resolus.take(codes, allow_fill=True, fill_value=None)
+            df_clean[col] = pd.Series(valeurs, index=df_clean.index).where(codes >= 0, df_clean[col])
+
+            modifiees = sum(1 for v, r in zip(distincts, resolus) if v != r)
+            print(f"Colonne '{col}' canonicalisée : {modifiees}/{len(distincts)} orthographe(s) distincte(s) corrigée(s)")
+
+        return df_clean
@@ -0,0 +1,237 @@
+"""
+Module de validation de la qualité des données
+Les règles sont déclarées sous forme de dictionnaires puis compilées en
+masques vectorisés (NumPy / pandas) ; toutes les règles sont évaluées en
+une seule passe par morceau, les lignes en échec sont mises en quarantaine
+dans un fichier à part au lieu d'interrompre le pipeline
+"""
+
+import os
+import json
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+# REF seule n'est pas unique (un REF regroupe les avis d'une même session) :
+# l'unicité porte sur la clé naturelle d'un avis
+CLE_AVIS = ["REF", "Company", "Origine spécifique du harirot", "Pourcentage de cacao"]
+
+REGLES = [
+    {'nom': 'note_1_5', 'type': 'intervalle', 'colonne': 'Note', 'min': 1, 'max': 5},
+    {'nom': 'pourcentage_0_100', 'type': 'intervalle', 'colonne': 'Pourcentage de cacao', 'min': 0, 'max': 100},
+    {'nom': 'annee_plausible', 'type': 'annee', 'colonne': 'Date de la revue', 'min': 1900},
+    {'nom': 'ref_entier', 'type': 'entier', 'colonne': 'REF', 'min': 1},
+    {'nom': 'avis_unique', 'type': 'unique', 'colonnes': CLE_AVIS},
+]
+
+QUARANTAINE_PATH = "data/interim/cacao_quarantaine.csv"
+RAPPORT_PATH = "data/interim/cacao_validation.json"
+
+
+class RegleCompilee:
+    """Une règle prête à être évaluée : masque des lignes en échec"""
+
+    def __init__(self, nom, colonnes, gravite, masque):
+        self.nom = nom
+        self.colonnes = colonnes
+        self.gravite = gravite
+        self.masque = masque
+
+
+def _valeur_json(valeur):
+    """Valeur d'exemple sérialisable (types NumPy convertis, None pour les manquantes)"""
+    if pd.isna(valeur):
+        return None
+    return valeur.item() if hasattr(valeur, 'item') else valeur
+
+
+def _nombres(serie):
+    """Valeurs numériques de la colonne (NaN si absentes ou non numériques)"""
+    if pd.api.types.is_numeric_dtype(serie.dtype) and not pd.api.types.is_bool_dtype(serie.dtype):
+        return serie.to_numpy(dtype=np.float64, na_value=np.nan)
+    return pd.to_numeric(serie, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+class ValidateurQualite:
+    """
+    Cette classe compile et évalue les règles de qualité du dataset cacao :
+    - intervalle : valeur numérique présente entre min et max
+    - entier / annee : valeur entière présente (annee : entre min et
+      l'année prochaine)
+    - unique : combinaison de colonnes jamais vue (morceaux précédents compris)
+    Une règle de gravité 'avertissement' est comptée sans mise en quarantaine.
+    """
+
+    @staticmethod
+    def compiler(regles=None):
+        """
+        Transforme les règles déclarées en masques vectorisés
+
+        Arguments
+        ---------------
+            regles : list de dict (par défaut REGLES)
+
+        Return
+        ---------------
+            compilees : list de RegleCompilee
+        """
+        compilees = []
+        for regle in regles or REGLES:
+            type_regle = regle['type']
+            colonnes = list(regle.get('colonnes') or [regle['colonne']])
+            gravite = regle.get('gravite', 'erreur')
+
+            if type_regle in ('intervalle', 'entier', 'annee'):
+                colonne = colonnes[0]
+                minimum = regle.get('min', -np.inf)
+                maximum = regle.get('max', date.today().year + 1 if type_regle == 'annee' else np.inf)
+                entier = type_regle != 'intervalle'
+
+                def masque(df, etat, colonne=colonne, minimum=minimum, maximum=maximum, entier=entier):
+                    valeurs = _nombres(df[colonne])
+                    with np.errstate(invalid="ignore"):
+                        valides = (valeurs >= minimum) & (valeurs <= maximum)
+                        if entier:
+                            valides &= np.floor(valeurs) == valeurs
+                    return ~valides
+
+            elif type_regle == 'unique':
+                def masque(df, etat, colonnes=colonnes, nom=regle['nom']):
+                    cles = pd.util.hash_pandas_object(df[colonnes].astype(str), index=False).to_numpy()
+                    deja_vues = etat.setdefault(nom, np.empty(0, dtype=np.uint64))
+                    echecs = pd.Series(cles).duplicated().to_numpy() | np.isin(cles, deja_vues)
+                    etat[nom] = np.union1d(deja_vues, cles)
+                    return echecs
+
+            else:
+                raise ValueError(f"Type de règle inconnu : '{type_regle}'")
+
+            compilees.append(RegleCompilee(regle['nom'], colonnes, gravite, masque))
+        return compilees
+
+    @staticmethod
+    def evaluer(df, compilees, etat=None):
+        """
+        Évalue toutes les règles en une passe
+
+        Arguments
+        ---------------
+            df : pd.DataFrame, un morceau du dataset
+            compilees : list de RegleCompilee
+            etat : dict, clés déjà vues par les règles d'unicité (morceaux précédents)
+
+        Return
+        ---------------
+            echecs : np.ndarray (lignes x règles) de booléens
+        """
+        etat = {} if etat is None else etat
+        echecs = np.zeros((len(df), len(compilees)), dtype=bool)
+        for j, regle in enumerate(compilees):
+            manquantes = [c for c in regle.colonnes if c not in df.columns]
+            if manquantes:
+                raise ValueError(f"Règle '{regle.nom}' : colonne(s) absente(s) {manquantes}")
+            echecs[:, j] = regle.masque(df, etat)
+        return echecs
+
+    @staticmethod
+    def valider_morceaux(morceaux, regles=None, quarantaine=QUARANTAINE_PATH, rapport=RAPPORT_PATH,
+                         taille_echantillon=5):
+        """
+        Valide un dataset morceau par morceau ; les lignes conformes sont
+        renvoyées, les autres écrites dans le fichier de quarantaine
+
+        Arguments
+        ---------------
+            morceaux : itérable de pd.DataFrame
+            regles : list de dict (par défaut REGLES)
+            quarantaine : str, CSV des lignes rejetées (avec les règles en échec)
+            rapport : str, JSON des comptes et exemples par règle (None : pas de fichier)
+            taille_echantillon : int, nombre d'exemples gardés par règle
+
+        Return
+        ---------------
+            conformes : pd.DataFrame, les lignes valides (index d'origine conservé)
+            bilan : dict, comptes et exemples par règle
+        """
+        compilees = ValidateurQualite.compiler(regles)
+        bloquantes = np.array([r.gravite == 'erreur' for r in compilees], dtype=bool)
+        etat = {}
+        bilan = {
+            'lignes': 0,
+            'regles': [{'nom': r.nom, 'colonnes': r.colonnes, 'gravite': r.gravite, 'echecs': 0, 'exemples': []}
+                       for r in compilees],
+        }
+        conformes, rejetees = [], []
+
+        for morceau in morceaux:
+            echecs = ValidateurQualite.evaluer(morceau, compilees, etat)
+            bilan['lignes'] += len(morceau)
+
+            for j, infos in enumerate(bilan['regles']):
+                lignes = np.flatnonzero(echecs[:, j])
+                infos['echecs'] += len(lignes)
+                manque = taille_echantillon - len(infos['exemples'])
+                if manque > 0 and len(lignes):
+                    exemples = morceau.iloc[lignes[:manque]]
+                    infos['exemples'] += [{'ligne': int(i), **{c: _valeur_json(ligne[c]) for c in infos['colonnes']}}
+                                          for i, ligne in exemples.iterrows()]
+
+            rejet = echecs[:, bloquantes].any(axis=1)
+            conformes.append(morceau[~rejet])
+            if rejet.any():
+                noms = np.array([r.nom for r in compilees], dtype=object)
+                motifs = [";".join(noms[ligne & bloquantes]) for ligne in echecs[rejet]]
+                rejetees.append(morceau[rejet].assign(_ligne=morceau.index[rejet], _regles=motifs))
+
+        conformes = pd.concat(conformes) if conformes else pd.DataFrame()
+        bilan['conformes'] = len(conformes)
+        bilan['quarantaine'] = bilan['lignes'] - len(conformes)
+
+        if quarantaine is not None:
+            if os.path.exists(quarantaine):
+                os.remove(quarantaine)
+            if rejetees:
+                os.makedirs(os.path.dirname(quarantaine) or ".", exist_ok=True)
+                pd.concat(rejetees).to_csv(quarantaine, index=False)
+                print(f"{bilan['quarantaine']} ligne(s) mise(s) en quarantaine dans : {quarantaine}")
+
+        if rapport is not None:
+            os.makedirs(os.path.dirname(rapport) or ".", exist_ok=True)
+            with open(rapport, "w", encoding="utf-8") as f:
+                json.dump(bilan, f, ensure_ascii=False, indent=2)
+
+        return conformes, bilan
+
+    @staticmethod
+    def valider(df, regles=None, quarantaine=QUARANTAINE_PATH, rapport=RAPPORT_PATH):
+        """
+        Valide le DataFrame et retire les lignes en échec (voir valider_morceaux)
+
+        Arguments
+        ---------------
+            df: pd.DataFrame, la base de données à valider
+            regles: list de dict, règles déclarées (par défaut REGLES)
+
+        Return
+        ----------------
+            df_valide : pd.DataFrame, les lignes conformes (index d'origine conservé)
+        """
+        if not isinstance(df, pd.DataFrame):
+            raise ValueError("df doit être un DataFrame")
+
+        conformes, bilan = ValidateurQualite.valider_morceaux([df], regles, quarantaine, rapport)
+        for infos in bilan['regles']:
+            if infos['echecs']:
+                print(f"Règle '{infos['nom']}' ({infos['gravite']}) : {infos['echecs']} ligne(s) en échec")
+        if not bilan['quarantaine']:
+            print("Validation : toutes les lignes respectent les règles de qualité")
+        return conformes
+
+    @staticmethod
+    def charger_rapport(rapport=RAPPORT_PATH):
+        """Dernier rapport de validation (None s'il n'existe pas)"""
+        if not os.path.exists(rapport):
+            return None
+        with open(rapport, encoding="utf-8") as f:
+            return json.load(f)